@@ -3,10 +3,14 @@ from typing import Dict
 from typing import List
 
 import numpy as np
+import os
+import tempfile
+import zipfile
 from barril.curve.curve import Curve
 from barril.units import Array
 from barril.units import Scalar
 from enum import Enum
+from pathlib import Path
 
 from alfasim_score.constants import AIR_DENSITY_STANDARD
 from alfasim_score.constants import WATER_DENSITY_STANDARD
@@ -146,3 +150,52 @@ def filter_duplicated_materials_by_name(
     """Remove the duplicated materials parsed by the reader."""
     filtered = {material["name"]: material for material in material_list}
     return list(filtered.values())
+
+
+def simplify_polyline(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Select the points of a polyline needed to reproduce it by linear interpolation within the
+    given tolerance (a Ramer-Douglas-Peucker variant that uses the error measured along y).
+    The first and last points are always kept.
+
+    :return:
+        A boolean mask with the points to keep.
+    """
+    keep = np.zeros(len(x), dtype=bool)
+    if len(x) == 0:
+        return keep
+    keep[[0, -1]] = True
+    segments = [(0, len(x) - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        interior = slice(first + 1, last)
+        error = np.abs(y[interior] - np.interp(x[interior], x[[first, last]], y[[first, last]]))
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            segments.extend([(first, split), (split, last)])
+    return keep
+
+
+# the errors raised when reading a npz file that is truncated or corrupted
+INVALID_NPZ_FILE_ERRORS = (zipfile.BadZipFile, EOFError, KeyError, ValueError, OSError)
+
+
+def save_npz_file(filepath: Path, arrays: Dict[str, Any]) -> None:
+    """
+    Save the arrays in a compressed npz file. The arrays are written to a temporary file in the
+    same folder, which then replaces the file at once, so a file being written is never read.
+    """
+    temporary_file = tempfile.NamedTemporaryFile(
+        dir=filepath.parent, prefix=f"{filepath.name}.", suffix=".tmp", delete=False
+    )
+    try:
+        with temporary_file:
+            np.savez_compressed(temporary_file, **arrays)
+        os.replace(temporary_file.name, filepath)
+    except BaseException:
+        Path(temporary_file.name).unlink(missing_ok=True)
+        raise
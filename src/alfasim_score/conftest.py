@@ -1,4 +1,8 @@
+import h5py
+import json
+import numpy as np
 import pytest
+import shutil
 from pathlib import Path
 
 from alfasim_score.converter.alfacase.base_operation import BaseOperationBuilder
@@ -64,3 +68,53 @@ def production_operation_steady_state(shared_datadir: Path) -> ProductionOperati
 def production_operation_pseudo_transient(shared_datadir: Path) -> ProductionOperationBuilder:
     score_input_reader = ScoreInputReader(shared_datadir / SCORE_PSEUDO_TRANSIENT_EXAMPLE_FILENAME)
     return ProductionOperationBuilder(ScoreInputData(score_input_reader))
+
+
+@pytest.fixture
+def nan_results_with_trends(shared_datadir: Path) -> Path:
+    """
+    The `nan_results.data` results with positional trends of the annuli APB and volumes, as
+    requested by the current operation builders. The trends at the wellbore start have the
+    values of the first cell of the profiles (interpolated at the trend times), and the trends
+    further down the wellbore have doubled values.
+    """
+    results_folder = shared_datadir / "nan_results_with_trends.data"
+    shutil.copytree(shared_datadir / "nan_results.data", results_folder)
+    with h5py.File(results_folder / "results" / "results_00000", "r+") as result_file:
+        profiles_metadata = json.loads(result_file["meta"].attrs["profiles"])
+        trends_metadata = json.loads(result_file["meta"].attrs["trends"])
+        profile_times = result_file["profiles"]["time_set"][:]
+        trend_times = result_file["trends"]["time_set"][:]
+        trend_columns = [result_file["trends"]["trends"][:, index] for index in range(2)]
+        for profile_metadata in profiles_metadata.values():
+            property_name = profile_metadata["property_id"]
+            quantity = property_name.rsplit("_", 1)[-1]
+            if not property_name.startswith("annulus_") or quantity not in {
+                "apb",
+                "tlv",
+                "atv",
+                "vte",
+            }:
+                continue
+            profile_values = result_file["profiles"][profile_metadata["data_id"]][:, 0]
+            for position, factor in [(0.0, 1.0), (500.0, 2.0)]:
+                trend_id = f"trend_at_{position}"
+                trends_metadata[f"{property_name}@{trend_id}"] = {
+                    "property_id": property_name,
+                    "trend_id": trend_id,
+                    "unit": profile_metadata["unit"],
+                    "category": profile_metadata["category"],
+                    "network_element_name": "WELLBORE",
+                    "position": position,
+                    "index": len(trend_columns),
+                }
+                trend_columns.append(factor * np.interp(trend_times, profile_times, profile_values))
+        trend_values = np.column_stack(trend_columns)
+        for dataset_name in ["trends", "trends_statistic"]:
+            del result_file["trends"][dataset_name]
+        result_file["trends"].create_dataset("trends", data=trend_values, maxshape=(None, None))
+        result_file["trends"].create_dataset(
+            "trends_statistic", data=np.vstack([trend_values.min(0), trend_values.max(0)])
+        )
+        result_file["meta"].attrs["trends"] = json.dumps(trends_metadata)
+    return results_folder
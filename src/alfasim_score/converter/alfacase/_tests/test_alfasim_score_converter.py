@@ -0,0 +1,102 @@
+import json
+import pytest
+from barril.units import Scalar
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+from alfasim_score.converter.alfacase.convert_alfacase import ScoreAlfacaseConverter
+from alfasim_score.converter.alfacase.convert_plugin_data import ScoreAPBPluginConverter
+from alfasim_score.converter.alfacase.score_input_data import ScoreInputData
+from alfasim_score.units import TEMPERATURE_UNIT
+
+
+def test_get_all_pvt_table_names(score_data_gas_lift: ScoreInputData) -> None:
+    assert score_data_gas_lift.get_all_pvt_table_names() == [
+        "DFLT_BLACK_OIL_27.40_230.00_1.17",
+        "DFLT_FCBA_9.00",
+        "DFLT_FPBA_BARITE_8.60_35000",
+    ]
+
+
+def test_generate_pvt_table_files(
+    shared_datadir: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "score_input_gas_lift.json", tmp_path / "output.json"
+    )
+    library_folder = tmp_path / "library"
+    fluid_names = converter.score_data.get_all_pvt_table_names()
+    with pytest.raises(FileNotFoundError, match="DFLT_FCBA_9.00"):
+        converter.generate_pvt_table_files(library_folder, tmp_path)
+
+    for name in fluid_names:
+        (library_folder / name).mkdir(parents=True)
+    generate_mock = mocker.patch(
+        "alfasim_score.converter.alfacase.alfasim_score_converter.generate_pvt_table_files"
+    )
+    converter.generate_pvt_table_files(library_folder, tmp_path, max_workers=4)
+    generate_mock.assert_called_once_with(
+        [library_folder / name for name in fluid_names], tmp_path, 4
+    )
+
+    link_mock = mocker.patch(
+        "alfasim_score.converter.alfacase.alfasim_score_converter.link_pvt_table_files"
+    )
+    converter.generate_pvt_table_files(library_folder, tmp_path, store_folder=tmp_path / "store")
+    link_mock.assert_called_once_with(
+        [library_folder / name for name in fluid_names], tmp_path, tmp_path / "store", None
+    )
+    assert generate_mock.call_count == 1
+
+
+def test_build_alfacase_only_when_used(
+    shared_datadir: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    build_spy = mocker.spy(ScoreAlfacaseConverter, "build_base_alfacase_description")
+    converter = AlfasimScoreConverter(shared_datadir / "nan_results.json", tmp_path / "output.json")
+    converter.generate_score_output_file(shared_datadir / "nan_results.data")
+    assert (tmp_path / "output.json").is_file()
+    assert build_spy.call_count == 0
+
+    converter.generate_alfasim_input_file(tmp_path / "case.alfacase")
+    converter.generate_alfasim_input_file(tmp_path / "case.alfacase")
+    assert build_spy.call_count == 1
+
+
+def test_check_operation_data_on_creation(shared_datadir: Path, tmp_path: Path) -> None:
+    score_input = json.loads(
+        (shared_datadir / "score_input_gas_lift.json").read_text(encoding="utf-8")
+    )
+    del score_input["operation"]["data"]["method_data"]["valve_depth"]
+    score_input_file = tmp_path / "score_input.json"
+    score_input_file.write_text(json.dumps(score_input), encoding="utf-8")
+    # the invalid input is reported by the converter creation, before converting anything
+    with pytest.raises(KeyError, match="valve_depth"):
+        AlfasimScoreConverter(score_input_file, tmp_path / "output.json")
+
+
+@pytest.mark.parametrize(
+    "score_input_filename", ["score_input_gas_lift.json", "score_input_injection_operation.json"]
+)
+def test_plugin_converter_options(
+    shared_datadir: Path, tmp_path: Path, score_input_filename: str
+) -> None:
+    tolerance = Scalar(0.5, TEMPERATURE_UNIT)
+    converter = AlfasimScoreConverter(
+        shared_datadir / score_input_filename,
+        tmp_path / "output.json",
+        temperature_tolerance=tolerance,
+        skip_default_annuli=True,
+    )
+    (plugin_converter,) = converter.alfacase_builder.plugin_converters
+    assert isinstance(plugin_converter, ScoreAPBPluginConverter)
+    assert plugin_converter.temperature_tolerance == tolerance
+    assert plugin_converter.skip_default_annuli
+
+    converter = AlfasimScoreConverter(
+        shared_datadir / score_input_filename, tmp_path / "output.json"
+    )
+    (plugin_converter,) = converter.alfacase_builder.plugin_converters
+    assert plugin_converter.temperature_tolerance is None
+    assert not plugin_converter.skip_default_annuli
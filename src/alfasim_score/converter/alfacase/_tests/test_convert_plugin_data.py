@@ -0,0 +1,66 @@
+import numpy as np
+from barril.units import Array
+from barril.units import Scalar
+
+from alfasim_score.common import AnnulusLabel
+from alfasim_score.common import simplify_polyline
+from alfasim_score.converter.alfacase.apb_plugin_data import Annuli
+from alfasim_score.converter.alfacase.apb_plugin_data import Annulus
+from alfasim_score.converter.alfacase.apb_plugin_data import AnnulusTemperatureTable
+from alfasim_score.converter.alfacase.convert_plugin_data import ScoreAPBPluginConverter
+from alfasim_score.converter.alfacase.score_input_data import ScoreInputData
+from alfasim_score.units import LENGTH_UNIT
+from alfasim_score.units import TEMPERATURE_UNIT
+
+
+def test_build_annular_temperature_table_with_tolerance(
+    score_data_gas_lift: ScoreInputData,
+) -> None:
+    final_depth = Scalar(2000.0, LENGTH_UNIT)
+    full_table = ScoreAPBPluginConverter(score_data_gas_lift)._build_annular_temperature_table(
+        final_depth
+    )
+    tolerance = Scalar(0.5, TEMPERATURE_UNIT)
+    coarse_table = ScoreAPBPluginConverter(
+        score_data_gas_lift, temperature_tolerance=tolerance
+    )._build_annular_temperature_table(final_depth)
+
+    full_depths = full_table.depths.GetValues(LENGTH_UNIT)
+    coarse_depths = coarse_table.depths.GetValues(LENGTH_UNIT)
+    assert full_depths[-1] == final_depth.GetValue(LENGTH_UNIT)
+    assert coarse_depths[[0, -1]].tolist() == full_depths[[0, -1]].tolist()
+    assert len(coarse_depths) <= len(full_depths)
+    interpolated = np.interp(
+        full_depths, coarse_depths, coarse_table.temperatures.GetValues(TEMPERATURE_UNIT)
+    )
+    error = np.abs(interpolated - full_table.temperatures.GetValues(TEMPERATURE_UNIT))
+    assert np.all(error <= tolerance.GetValue(TEMPERATURE_UNIT))
+
+
+def test_simplify_polyline() -> None:
+    x = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    y = np.array([0.0, 1.0, 2.0, 2.0, 2.0])
+    assert simplify_polyline(x, y, 0.1).tolist() == [True, False, True, False, True]
+    assert simplify_polyline(x, y, 1.0).tolist() == [True, False, False, False, True]
+    assert simplify_polyline(x[:0], y[:0], 1.0).tolist() == []
+
+
+def test_annuli_to_dict_with_long_tables() -> None:
+    depths = Array(np.linspace(0.0, 5000.0, 200_000), LENGTH_UNIT)
+    temperatures = Array(np.linspace(4.0, 120.0, 200_000), TEMPERATURE_UNIT)
+    annuli = Annuli(
+        annulus_a=Annulus(
+            is_active=True,
+            annulus_temperature_table=AnnulusTemperatureTable(depths, temperatures),
+        )
+    )
+    data = annuli.to_dict()
+    temperature_columns = data["annulus_temperature_table_a"]["columns"]
+    # the serialized data must refer to the same arrays instead of copies
+    assert temperature_columns["temperature_depth_a"] is depths
+    assert temperature_columns["temperature_a"] is temperatures
+    assert data["initial_top_pressure_a"] is annuli.annulus_a.initial_top_pressure
+    assert {key[-1] for key in data} == {label.value for label in AnnulusLabel}
+
+    data = annuli.to_dict(skip_default_annuli=True)
+    assert {key[-1] for key in data} == {AnnulusLabel.A.value}
@@ -1,10 +1,16 @@
+import numpy as np
 import pytest
+from barril.units import Array
+from barril.units import Scalar
 from pathlib import Path
 from pytest_mock import MockerFixture
 from pytest_regressions.file_regression import FileRegressionFixture
 
 from alfasim_score.common import AnnulusLabel
+from alfasim_score.converter.alfacase import profile_curves_reader
 from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+from alfasim_score.converter.alfacase.profile_curves_reader import ProfileCurvesReader
+from alfasim_score.converter.alfacase.score_output_tables import get_output_tables
 
 
 @pytest.mark.parametrize(
@@ -40,3 +46,298 @@ def test_generate_output_file_results(
     converter.generate_score_output_file(alfasim_results_path)
     output_content = converter.output_builder.score_output_filepath.read_text(encoding="utf-8")
     file_regression.check(output_content, extension=".json", encoding="utf-8")
+
+
+def test_generate_output_results_with_history(shared_datadir: Path, mocker: MockerFixture) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    output_builder = converter.output_builder
+    output = output_builder.generate_output_results(shared_datadir / "nan_results.data")
+    assert all("history" not in annulus for annulus in output["annuli"].values())
+
+    output = output_builder.generate_output_results(
+        shared_datadir / "nan_results.data", history_interval=Scalar(1.0, "h")
+    )
+    for annulus in output["annuli"].values():
+        history = annulus["history"]
+        assert set(history.keys()) == {"time", "APB", "TLV", "ATV", "VTE"}
+        # the results have time steps about every 36 minutes in 6 hours, so it has samples at
+        # each hour and the final time step
+        assert len(history["time"]) == 8
+        assert history["time"][0] == 0.0
+        assert not np.signbit(history["time"][0])
+        assert np.all(np.diff(history["time"]) > 0.0)
+        assert history["time"][-1] == pytest.approx(21603.76983206 / 86400.0 / 30)
+        for values in history.values():
+            assert len(values) == len(history["time"])
+        # the last sample is the final time step
+        assert history["APB"][-1] == annulus["pressure"]["APB"]
+        assert history["ATV"][-1] == annulus["volume"]["final"]
+        assert history["ATV"][-1] - history["VTE"][-1] == pytest.approx(annulus["volume"]["start"])
+
+
+def test_generate_output_results_with_envelopes(
+    shared_datadir: Path, mocker: MockerFixture
+) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    output_builder = converter.output_builder
+    output = output_builder.generate_output_results(shared_datadir / "nan_results.data")
+    assert all("envelope" not in annulus for annulus in output["annuli"].values())
+    assert all("envelope" not in wall for wall in output["layers"].values())
+
+    output = output_builder.generate_output_results(
+        shared_datadir / "nan_results.data", include_envelopes=True
+    )
+    final_time = 21603.76983206 / 86400.0 / 30
+    for annulus in output["annuli"].values():
+        envelope = annulus["envelope"]
+        for property_name in ["temperature", "pressure"]:
+            assert set(envelope[property_name].keys()) == {"max", "min", "time_of_max"}
+            for values in envelope[property_name].values():
+                assert len(values) == len(annulus["MD"])
+            assert np.all(envelope[property_name]["max"] >= annulus[property_name]["final"])
+            assert np.all(envelope[property_name]["max"] >= annulus[property_name]["start"])
+            assert np.all(envelope[property_name]["min"] <= annulus[property_name]["final"])
+            assert np.all(envelope[property_name]["min"] <= annulus[property_name]["start"])
+            time_of_max = envelope[property_name]["time_of_max"]
+            assert np.all((time_of_max >= 0.0) & (time_of_max <= final_time))
+            assert not np.any(np.signbit(time_of_max))
+    assert len(output["layers"]) > 0
+    for wall in output["layers"].values():
+        envelope = wall["envelope"]["temperature"]
+        assert np.all(envelope["max"] >= wall["temperature"])
+        assert np.all(envelope["min"] <= wall["temperature"])
+
+
+def test_generate_output_results_from_trends(
+    shared_datadir: Path, nan_results_with_trends: Path, mocker: MockerFixture
+) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    output_builder = converter.output_builder
+    # the results without trends (generated by older versions) have the same final values
+    profiles_output = output_builder.generate_output_results(
+        shared_datadir / "nan_results.data", history_interval=Scalar(1.0, "h")
+    )
+    read_profiles_spy = mocker.spy(ProfileCurvesReader, "read_profiles")
+    output = output_builder.generate_output_results(
+        nan_results_with_trends, history_interval=Scalar(1.0, "h")
+    )
+    # the scalar quantities are not read from the profiles
+    (curve_keys,) = read_profiles_spy.call_args.args[1:]
+    assert not any(property_name.endswith("_apb") for property_name, _ in curve_keys)
+    for annulus_index, annulus in output["annuli"].items():
+        profiles_annulus = profiles_output["annuli"][annulus_index]
+        assert annulus["pressure"]["APB"] == pytest.approx(profiles_annulus["pressure"]["APB"])
+        assert annulus["volume"] == pytest.approx(profiles_annulus["volume"])
+        assert annulus["leakage_bbl"] == pytest.approx(profiles_annulus["leakage_bbl"])
+        # the history is sampled from the trends, which have more time steps
+        history = annulus["history"]
+        assert history["time"][-1] == profiles_annulus["history"]["time"][-1]
+        assert history["APB"][-1] == annulus["pressure"]["APB"]
+        assert history["ATV"][-1] == annulus["volume"]["final"]
+
+
+def test_generate_output_results_with_cache(
+    shared_datadir: Path, nan_results_with_trends: Path, mocker: MockerFixture
+) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+
+    def generate_score_output_file() -> None:
+        converter.generate_score_output_file(
+            nan_results_with_trends,
+            history_interval=Scalar(1.0, "h"),
+            include_envelopes=True,
+            use_cache=True,
+        )
+
+    generate_score_output_file()
+    expected_content = converter.output_builder.score_output_filepath.read_text(encoding="utf-8")
+    assert (nan_results_with_trends / "score_curves_cache.npz").is_file()
+
+    # the output is generated again from the cache, without reading the results
+    open_mock = mocker.patch.object(
+        profile_curves_reader, "open_result_files", side_effect=AssertionError
+    )
+    generate_score_output_file()
+    content = converter.output_builder.score_output_filepath.read_text(encoding="utf-8")
+    assert content == expected_content
+    assert open_mock.call_count == 0
+
+
+def test_annuli_columnar_post_processing(shared_datadir: Path) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    output_builder = converter.output_builder
+    measured_depths = np.array([0.0, 100.0, 200.0, 300.0, 400.0])
+    temperature = np.array(
+        [
+            [80.0, 70.0, 60.0, 50.0, 40.0],
+            [80.0, 70.0, 60.0, np.nan, np.nan],
+            [80.0, 70.0, -273.15, -273.15, -273.15],
+        ]
+    )
+    pressure = np.array(
+        [
+            [1.0, 2.0, 3.0, 4.0, 5.0],
+            [1.0, 2.0, 3.0, 4.0, 5.0],
+            [1.0, 2.0, 3.0, 4.0, 5.0],
+        ]
+    )
+    valid_lengths = output_builder._get_annuli_valid_lengths(temperature, pressure)
+    assert valid_lengths.tolist() == [5, 3, 2]
+
+    # the interpolation of each annulus is limited to its valid MDs, like `np.interp`
+    density = np.array(
+        [
+            [10.0, 11.0, 12.0, 13.0, 14.0],
+            [10.0, 12.0, 14.0, np.nan, np.nan],
+            [10.0, 13.0, 0.0, 0.0, 0.0],
+        ]
+    )
+    for positions in [[250.0, 150.0, 50.0], [-10.0, 200.0, 100.0], [400.0, 350.0, 500.0]]:
+        interpolated = output_builder._interpolate_profiles(
+            np.array(positions), measured_depths, density, valid_lengths
+        )
+        expected = [
+            np.interp(position, measured_depths[:length], values[:length])
+            for position, values, length in zip(positions, density, valid_lengths)
+        ]
+        assert interpolated.tolist() == expected
+
+
+def test_generate_output_results_resampled(shared_datadir: Path, mocker: MockerFixture) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    output_builder = converter.output_builder
+    results_folder = shared_datadir / "nan_results.data"
+    output = output_builder.generate_output_results(results_folder, include_envelopes=True)
+    measured_depths = np.linspace(output["MD"][0] - 10.0, output["MD"][-1], 20)
+    resampled_output = output_builder.generate_output_results(
+        results_folder,
+        include_envelopes=True,
+        output_measured_depths=Array(measured_depths, "m"),
+    )
+    assert resampled_output["MD"].tolist() == measured_depths.tolist()
+    for quantity, values in resampled_output["production_tubing"].items():
+        expected = np.interp(
+            measured_depths, output["MD"], output["production_tubing"][quantity]["final"]
+        )
+        assert values["final"] == pytest.approx(expected)
+    for wall_index, wall in resampled_output["layers"].items():
+        assert wall["MD"].tolist() == measured_depths.tolist()
+        expected = np.interp(
+            measured_depths, output["MD"], output["layers"][wall_index]["temperature"]
+        )
+        assert wall["temperature"] == pytest.approx(expected)
+
+    # the MDs beyond the end of the annuli are dropped, the annuli aren't extrapolated
+    for annulus_index, annulus in resampled_output["annuli"].items():
+        original_annulus = output["annuli"][annulus_index]
+        annulus_measured_depths = measured_depths[measured_depths <= original_annulus["MD"][-1]]
+        assert annulus["MD"].tolist() == annulus_measured_depths.tolist()
+        for quantity in ["temperature", "pressure", "density"]:
+            for time in ["start", "final"]:
+                expected = np.interp(
+                    annulus_measured_depths,
+                    original_annulus["MD"],
+                    original_annulus[quantity][time],
+                )
+                assert annulus[quantity][time] == pytest.approx(expected)
+        assert annulus["pressure"]["diff"] == pytest.approx(
+            annulus["pressure"]["final"] - annulus["pressure"]["start"]
+        )
+        for quantity in ["APB"]:
+            assert annulus["pressure"][quantity] == original_annulus["pressure"][quantity]
+        assert annulus["volume"] == original_annulus["volume"]
+        assert annulus["leakage_mass"] == original_annulus["leakage_mass"]
+        envelope = annulus["envelope"]["temperature"]
+        assert len(envelope["max"]) == len(envelope["time_of_max"]) == len(annulus_measured_depths)
+        assert set(envelope["time_of_max"]) <= set(
+            original_annulus["envelope"]["temperature"]["time_of_max"]
+        )
+
+
+def test_get_score_measured_depths(shared_datadir: Path) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "score_input_gas_lift.json", shared_datadir / "output_score.json"
+    )
+    measured_depths = converter.output_builder.get_score_measured_depths()
+    assert measured_depths.unit == "m"
+    assert len(measured_depths) > 0
+    assert np.all(np.diff(measured_depths.GetValues("m")) > 0)
+
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    with pytest.raises(RuntimeError, match="has no results with the measured depths"):
+        converter.output_builder.get_score_measured_depths()
+
+
+def test_generate_output_results_resampled_beyond_domain(
+    shared_datadir: Path, mocker: MockerFixture
+) -> None:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    output_builder = converter.output_builder
+    results_folder = shared_datadir / "nan_results.data"
+    output = output_builder.generate_output_results(results_folder, include_envelopes=True)
+    # the output MDs go beyond the last cell of the ALFAsim mesh
+    measured_depths = np.linspace(output["MD"][0], output["MD"][-1] + 500.0, 30)
+    resampled_output = output_builder.generate_output_results(
+        results_folder,
+        include_envelopes=True,
+        output_measured_depths=Array(measured_depths, "m"),
+    )
+    # all columns of each MD-indexed table have the same length
+    for table_name, table in get_output_tables(resampled_output).items():
+        if table_name == "annuli":
+            continue
+        assert len({len(values) for values in table.values()}) == 1, table_name
+    for wall_index, wall in resampled_output["layers"].items():
+        assert len(wall["MD"]) == len(measured_depths)
+        envelope = wall["envelope"]["temperature"]
+        original_envelope = output["layers"][wall_index]["envelope"]["temperature"]
+        # the envelope is clamped at the last cell, like the wall temperature
+        assert envelope["max"][-1] == original_envelope["max"][-1]
+        assert envelope["time_of_max"][-1] == original_envelope["time_of_max"][-1]
+        assert wall["temperature"][-1] == output["layers"][wall_index]["temperature"][-1]
@@ -0,0 +1,274 @@
+from typing import List
+from typing import Optional
+
+import h5py
+import numpy as np
+import os
+import pytest
+from alfasim_sdk.result_reader import Results
+from alfasim_sdk.result_reader.aggregator import TimeSetInfoItem
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.converter.alfacase import profile_curves_reader
+from alfasim_score.converter.alfacase.profile_curves_reader import ProfileCurvesReader
+from alfasim_score.converter.alfacase.profile_curves_reader import ProfileEnvelope
+from alfasim_score.converter.alfacase.profile_curves_reader import get_result_file_time_step
+from alfasim_score.converter.alfacase.profile_curves_reader import read_dataset_row
+
+
+def test_profile_curves_reader(shared_datadir: Path, mocker: MockerFixture) -> None:
+    results = Results(shared_datadir / "nan_results.data")
+    curves = ProfileCurvesReader(results, "WELLBORE")
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curve_keys = [
+        ("annulus_a_temperature", 0),
+        ("annulus_a_temperature", -1),
+        ("annulus_a_pressure", 0),
+        ("annulus_a_pressure", -1),
+        ("pressure", -1),
+        ("pressure", -1),
+    ]
+    curves.read_profiles(curve_keys)
+    # the result files are opened once for all curves
+    assert open_spy.call_count == 1
+    for property_name, index in curve_keys:
+        curve = results.get_profile_curve(property_name, "WELLBORE", index)
+        for unit in ["bar", "psi"] if "pressure" in property_name else ["degC", "K"]:
+            assert np.array_equal(
+                curves.get_profile(property_name, index, unit),
+                curve.image.GetValues(unit),
+                equal_nan=True,
+            )
+    assert open_spy.call_count == 1
+
+    # curves not read yet are read on demand
+    curve = results.get_profile_curve("annulus_b_rho", "WELLBORE", 3)
+    assert np.array_equal(
+        curves.get_profile("annulus_b_rho", 3, "lbm/galUS"),
+        curve.image.GetValues("lbm/galUS"),
+        equal_nan=True,
+    )
+    assert open_spy.call_count == 2
+    assert np.array_equal(curves.get_domain("pressure", -1, "ft"), curve.domain.GetValues("ft"))
+
+    with pytest.raises(RuntimeError, match="Can not locate 'annulus_z_rho' profile"):
+        curves.get_profile("annulus_z_rho", -1, "kg/m3")
+
+
+def test_read_dataset_row(tmp_path: Path, mocker: MockerFixture) -> None:
+    filepath = tmp_path / "results_00000"
+    values = np.arange(300 * 70, dtype=float).reshape(300, 70)
+    with h5py.File(filepath, "w") as file:
+        file.create_dataset("chunked", data=values, chunks=(128, 17), maxshape=(None, 70))
+        file.create_dataset("contiguous", data=values)
+        file.create_dataset("compressed", data=values, compression="gzip")
+        file.create_dataset("big_endian", data=values, dtype=">f8", chunks=(64, 70))
+        file.create_dataset("domain", data=values[0])
+        file.create_dataset(
+            "empty", shape=(0, 70), dtype=float, chunks=(128, 70), maxshape=(None, 70)
+        )
+
+    file_buffer = np.memmap(filepath, np.uint8, "r")
+    with h5py.File(filepath, "r") as file:
+        # the uncompressed datasets are read from the memory mapped file instead of h5py
+        h5py_read_mock = mocker.patch.object(h5py.Dataset, "__getitem__")
+        for name in ["chunked", "contiguous", "big_endian"]:
+            for row in [0, 1, 127, 128, 299]:
+                assert np.array_equal(read_dataset_row(file[name], file_buffer, row), values[row])
+        assert np.array_equal(read_dataset_row(file["domain"], file_buffer), values[0])
+        assert h5py_read_mock.call_count == 0
+        mocker.stopall()
+
+        for name in ["compressed"]:
+            for row in [0, 1, 127, 128, 299]:
+                assert np.array_equal(read_dataset_row(file[name], file_buffer, row), values[row])
+        assert np.array_equal(read_dataset_row(file["domain"], file_buffer), values[0])
+        assert np.array_equal(read_dataset_row(file["chunked"], file_buffer), values)
+        with pytest.raises(IndexError):
+            read_dataset_row(file["empty"], file_buffer, 0)
+
+
+def test_get_result_file_time_step() -> None:
+    time_set_info = {
+        0: TimeSetInfoItem(0, 5, ""),
+        1: TimeSetInfoItem(5, 3, ""),
+        2: TimeSetInfoItem(8, 4, ""),
+    }
+    assert get_result_file_time_step(time_set_info, (0, 1, 2), 0) == (0, 0)
+    assert get_result_file_time_step(time_set_info, (0, 1, 2), 6) == (1, 1)
+    assert get_result_file_time_step(time_set_info, (0, 1, 2), -1) == (2, 3)
+    assert get_result_file_time_step(time_set_info, (0, 1, 2), -5) == (1, 2)
+    assert get_result_file_time_step(time_set_info, (1, 2), 3) == (2, 0)
+    with pytest.raises(IndexError):
+        get_result_file_time_step(time_set_info, (0, 1, 2), 12)
+    with pytest.raises(IndexError):
+        get_result_file_time_step(time_set_info, (0, 1, 2), -13)
+
+
+def test_read_profile_histories(shared_datadir: Path, mocker: MockerFixture) -> None:
+    results = Results(shared_datadir / "nan_results.data")
+    curves = ProfileCurvesReader(results, "WELLBORE")
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curves.read_histories(["annulus_a_apb", "annulus_b_tlv", "annulus_a_apb"])
+    assert open_spy.call_count == 1
+
+    times = curves.get_time_set("annulus_a_apb", "h")
+    assert times.shape == (12,)
+    assert times[-1] == pytest.approx(21603.76983206 / 3600.0)
+    apb_history = curves.get_history("annulus_a_apb", "psi")
+    tlv_history = curves.get_history("annulus_b_tlv", "bbl")
+    assert open_spy.call_count == 1
+    for index in range(12):
+        apb_curve = results.get_profile_curve("annulus_a_apb", "WELLBORE", index)
+        tlv_curve = results.get_profile_curve("annulus_b_tlv", "WELLBORE", index)
+        assert apb_history[index] == apb_curve.image.GetValues("psi")[0]
+        assert tlv_history[index] == tlv_curve.image.GetValues("bbl")[0]
+
+
+@pytest.mark.parametrize("block_size", [None, 5])
+def test_read_profile_envelopes(
+    shared_datadir: Path, mocker: MockerFixture, block_size: Optional[int]
+) -> None:
+    results = Results(shared_datadir / "nan_results.data")
+    curves = ProfileCurvesReader(results, "WELLBORE")
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curves.read_envelopes(["annulus_a_pressure", "wall_0_temperature"], block_size)
+    assert open_spy.call_count == 1
+
+    times = curves.get_time_set("annulus_a_pressure", "h")
+    for property_name, unit in [("annulus_a_pressure", "psi"), ("wall_0_temperature", "degC")]:
+        envelope = curves.get_envelope(property_name, unit, "h")
+        all_values = np.array(
+            [curves.get_profile(property_name, index, unit) for index in range(len(times))]
+        )
+        # the cells beyond the annulus end are NaN at all time steps
+        is_valid = ~np.all(np.isnan(all_values), axis=0)
+        assert np.any(is_valid)
+        assert np.all(np.isnan(envelope.maximum[~is_valid]))
+        valid_values = all_values[:, is_valid]
+        assert np.array_equal(envelope.maximum[is_valid], np.nanmax(valid_values, axis=0))
+        assert np.array_equal(envelope.minimum[is_valid], np.nanmin(valid_values, axis=0))
+        assert np.array_equal(
+            envelope.time_of_maximum[is_valid], times[np.nanargmax(valid_values, axis=0)]
+        )
+    assert open_spy.call_count == 1 + 12 * 2
+
+
+def test_profile_envelope_update() -> None:
+    envelope = ProfileEnvelope.create_empty(3)
+    envelope.update(np.array([[1.0, np.nan, np.nan], [3.0, 2.0, np.nan]]), np.array([0.0, 1.0]))
+    envelope.update(np.array([[3.0, 1.0, np.nan], [2.0, 5.0, np.nan]]), np.array([2.0, 3.0]))
+    assert np.array_equal(envelope.maximum, [3.0, 5.0, np.nan], equal_nan=True)
+    assert np.array_equal(envelope.minimum, [1.0, 1.0, np.nan], equal_nan=True)
+    # the first time the maximum was reached is kept
+    assert np.array_equal(envelope.time_of_maximum, [1.0, 3.0, np.nan], equal_nan=True)
+
+
+def test_read_trends(nan_results_with_trends: Path, mocker: MockerFixture) -> None:
+    results = Results(nan_results_with_trends)
+    curves = ProfileCurvesReader(results, "WELLBORE")
+    assert curves.has_trend("annulus_a_apb")
+    assert not curves.has_trend("annulus_a_pressure")
+    assert not curves.has_trend("timestep")
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curves.read_trends(["annulus_a_apb", "annulus_b_tlv", "annulus_a_apb"])
+    assert open_spy.call_count == 1
+
+    # the trends at the wellbore start are read
+    for property_name, unit in [("annulus_a_apb", "psi"), ("annulus_b_tlv", "bbl")]:
+        curve = results.get_positional_trend_curve(property_name, "WELLBORE", (0.0, "m"))
+        assert np.array_equal(curves.get_trend(property_name, unit), curve.image.GetValues(unit))
+        assert np.array_equal(
+            curves.get_trend_time_set(property_name, "h"), curve.domain.GetValues("h")
+        )
+    assert open_spy.call_count == 1
+
+    with pytest.raises(RuntimeError, match="Can not locate 'annulus_a_pressure' trend"):
+        curves.get_trend("annulus_a_pressure", "bar")
+
+
+def test_profile_curves_cache(
+    shared_datadir: Path, nan_results_with_trends: Path, mocker: MockerFixture
+) -> None:
+    cache_filepath = nan_results_with_trends / "curves_cache.npz"
+    curves = ProfileCurvesReader(Results(nan_results_with_trends), "WELLBORE", cache_filepath)
+    curves.read_profiles([("annulus_a_pressure", 0), ("annulus_a_pressure", -1)])
+    curves.read_domains([("pressure", -1)])
+    curves.read_histories(["annulus_b_tlv"])
+    curves.read_trends(["annulus_a_apb"])
+    curves.read_envelopes(["wall_0_temperature"])
+    curves.save_cache()
+    assert cache_filepath.is_file()
+
+    def get_values(curves: ProfileCurvesReader) -> List[np.ndarray]:
+        envelope = curves.get_envelope("wall_0_temperature", "degC", "h")
+        return [
+            curves.get_profile("annulus_a_pressure", 0, "psi"),
+            curves.get_profile("annulus_a_pressure", -1, "psi"),
+            curves.get_domain("pressure", -1, "ft"),
+            curves.get_history("annulus_b_tlv", "bbl"),
+            curves.get_time_set("annulus_b_tlv", "h"),
+            curves.get_trend("annulus_a_apb", "psi"),
+            curves.get_trend_time_set("annulus_a_apb", "h"),
+            envelope.maximum,
+            envelope.minimum,
+            envelope.time_of_maximum,
+        ]
+
+    expected_values = get_values(curves)
+    # the results aren't read when the curves are in the cache
+    open_mock = mocker.patch.object(
+        profile_curves_reader, "open_result_files", side_effect=AssertionError
+    )
+    metadata_mock = mocker.patch.object(
+        Results, "metadata", new_callable=mocker.PropertyMock, side_effect=AssertionError
+    )
+    cached_curves = ProfileCurvesReader(
+        Results(nan_results_with_trends), "WELLBORE", cache_filepath
+    )
+    for values, expected in zip(get_values(cached_curves), expected_values):
+        assert np.array_equal(values, expected, equal_nan=True)
+    assert cached_curves.has_trend("annulus_b_apb")
+    assert not cached_curves.has_trend("annulus_b_pressure")
+    assert open_mock.call_count == 0
+    assert metadata_mock.call_count == 0
+    mocker.stopall()
+
+    # the cache is not used for other elements or after the results are modified
+    other_curves = ProfileCurvesReader(Results(nan_results_with_trends), "OTHER", cache_filepath)
+    with pytest.raises(RuntimeError, match="Can not locate 'annulus_a_pressure' profile"):
+        other_curves.get_profile("annulus_a_pressure", 0, "psi")
+    result_filepath = nan_results_with_trends / "results" / "results_00000"
+    os.utime(result_filepath, ns=(0, 0))
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curves = ProfileCurvesReader(Results(nan_results_with_trends), "WELLBORE", cache_filepath)
+    assert np.array_equal(curves.get_domain("pressure", -1, "ft"), expected_values[2])
+    assert open_spy.call_count == 1
+
+
+def test_profile_curves_invalid_cache(nan_results_with_trends: Path, mocker: MockerFixture) -> None:
+    cache_filepath = nan_results_with_trends / "curves_cache.npz"
+    curves = ProfileCurvesReader(Results(nan_results_with_trends), "WELLBORE", cache_filepath)
+    expected_values = curves.get_profile("annulus_a_pressure", -1, "psi")
+    curves.save_cache()
+    assert [filepath.name for filepath in nan_results_with_trends.glob("*.npz*")] == [
+        cache_filepath.name
+    ]
+
+    # a cache file truncated (e.g. by a process killed while writing it) is ignored
+    cache_content = cache_filepath.read_bytes()
+    cache_filepath.write_bytes(cache_content[: len(cache_content) // 2])
+    open_spy = mocker.spy(profile_curves_reader, "open_result_files")
+    curves = ProfileCurvesReader(Results(nan_results_with_trends), "WELLBORE", cache_filepath)
+    values = curves.get_profile("annulus_a_pressure", -1, "psi")
+    assert np.array_equal(values, expected_values, equal_nan=True)
+    assert open_spy.call_count == 1
+
+    # the invalid cache is replaced
+    curves.save_cache()
+    open_spy.reset_mock()
+    curves = ProfileCurvesReader(Results(nan_results_with_trends), "WELLBORE", cache_filepath)
+    values = curves.get_profile("annulus_a_pressure", -1, "psi")
+    assert np.array_equal(values, expected_values, equal_nan=True)
+    assert open_spy.call_count == 0
@@ -0,0 +1,105 @@
+import json
+import pytest
+import shutil
+from barril.units import Scalar
+from pathlib import Path
+
+from alfasim_score.converter.alfacase.score_output_batch import generate_score_output_file
+from alfasim_score.converter.alfacase.score_output_batch import generate_score_output_files
+from alfasim_score.converter.alfacase.score_output_batch import get_output_tables_folder
+from alfasim_score.converter.alfacase.score_output_batch import main
+from alfasim_score.converter.alfacase.score_output_tables import read_output_tables
+
+
+def test_generate_score_output_files(shared_datadir: Path, tmp_path: Path) -> None:
+    score_input_file = shared_datadir / "nan_results.json"
+    results_folders = [tmp_path / "case_1.data", tmp_path / "case_2.data"]
+    for results_folder in results_folders:
+        shutil.copytree(shared_datadir / "nan_results.data", results_folder)
+    cases = {
+        results_folder: (score_input_file, tmp_path / f"{results_folder.stem}.json")
+        for results_folder in results_folders
+    }
+    # a case without results is reported and doesn't stop the others
+    cases[tmp_path / "missing.data"] = (score_input_file, tmp_path / "missing.json")
+    reports = generate_score_output_files(cases, max_workers=2)
+
+    assert [report.alfasim_results_folder for report in reports] == list(cases.keys())
+    assert [report.succeeded for report in reports] == [True, True, False]
+    assert all(report.elapsed_time > 0.0 for report in reports)
+    assert reports[2].error is not None
+    assert not (tmp_path / "missing.json").exists()
+
+    # the output files are the same written one by one
+    expected_report = generate_score_output_file(
+        score_input_file, results_folders[0], tmp_path / "expected.json"
+    )
+    assert expected_report.succeeded
+    expected_content = (tmp_path / "expected.json").read_text(encoding="utf-8")
+    for report in reports[:2]:
+        assert report.score_output_file.read_text(encoding="utf-8") == expected_content
+
+
+def test_generate_score_output_files_options(shared_datadir: Path, tmp_path: Path) -> None:
+    score_input_file = shared_datadir / "nan_results.json"
+    results_folder = shared_datadir / "nan_results.data"
+    score_output_file = tmp_path / "case.json"
+    (report,) = generate_score_output_files(
+        {results_folder: (score_input_file, score_output_file)},
+        max_workers=1,
+        history_interval=Scalar(1.0, "h"),
+        include_envelopes=True,
+        use_cache=True,
+        include_output_tables=True,
+    )
+    assert report.succeeded, report.error
+
+    # the options are applied to the cases like in a single conversion
+    expected_report = generate_score_output_file(
+        score_input_file,
+        results_folder,
+        tmp_path / "expected.json",
+        history_interval=Scalar(1.0, "h"),
+        include_envelopes=True,
+    )
+    assert expected_report.succeeded
+    expected_content = (tmp_path / "expected.json").read_text(encoding="utf-8")
+    assert score_output_file.read_text(encoding="utf-8") == expected_content
+    output = json.loads(expected_content)
+    assert all("history" in annulus for annulus in output["annuli"].values())
+    assert all("envelope" in annulus for annulus in output["annuli"].values())
+    assert (results_folder / "score_curves_cache.npz").is_file()
+    tables_folder = get_output_tables_folder(score_output_file)
+    assert tables_folder == tmp_path / "case_tables"
+    assert "annulus_0_history" in read_output_tables(tables_folder)
+
+
+def test_main(shared_datadir: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    score_input_file = shared_datadir / "nan_results.json"
+    results_folder = shared_datadir / "nan_results.data"
+    arguments = [
+        "--case",
+        str(results_folder),
+        str(score_input_file),
+        str(tmp_path / "case.json"),
+        "--max-workers",
+        "1",
+        "--compact",
+        "--include-envelopes",
+        "--output-tables",
+    ]
+    assert main(arguments) == 0
+    output = json.loads((tmp_path / "case.json").read_text(encoding="utf-8"))
+    assert all("envelope" in annulus for annulus in output["annuli"].values())
+    assert (tmp_path / "case_tables" / "annuli").is_dir()
+    assert f"{results_folder}: ok" in capsys.readouterr().out
+
+    # the exit code reports the failed cases
+    arguments += [
+        "--case",
+        str(tmp_path / "missing.data"),
+        str(score_input_file),
+        str(tmp_path / "missing.json"),
+    ]
+    assert main(arguments) == 1
+    assert f"{tmp_path / 'missing.data'}: failed" in capsys.readouterr().out
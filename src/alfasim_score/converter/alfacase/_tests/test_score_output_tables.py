@@ -0,0 +1,94 @@
+import json
+import numpy as np
+import pytest
+from barril.units import Scalar
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.common import AnnulusLabel
+from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+from alfasim_score.converter.alfacase.score_output_tables import read_output_tables
+
+
+@pytest.fixture
+def converter(shared_datadir: Path, mocker: MockerFixture) -> AlfasimScoreConverter:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    return converter
+
+
+def test_write_output_tables(shared_datadir: Path, converter: AlfasimScoreConverter) -> None:
+    tables_folder = shared_datadir / "output_score_tables"
+    converter.generate_score_output_file(
+        shared_datadir / "nan_results.data",
+        history_interval=Scalar(1.0, "h"),
+        include_envelopes=True,
+        output_tables_folder=tables_folder,
+    )
+    output = json.loads(converter.output_builder.score_output_filepath.read_text(encoding="utf-8"))
+    tables = read_output_tables(tables_folder)
+    assert set(tables) == {
+        "production_tubing",
+        "annuli",
+        *[f"annulus_{index}" for index in output["annuli"]],
+        *[f"annulus_{index}_history" for index in output["annuli"]],
+        *[f"wall_{index}" for index in output["layers"]],
+    }
+
+    production_tubing = tables["production_tubing"]
+    assert set(production_tubing) == {"MD", "temperature_final", "pressure_final", "density_final"}
+    assert production_tubing["MD"].tolist() == pytest.approx(output["MD"], nan_ok=True)
+    assert production_tubing["pressure_final"].tolist() == pytest.approx(
+        output["production_tubing"]["pressure"]["final"], nan_ok=True
+    )
+
+    annuli = tables["annuli"]
+    assert annuli["annulus"].tolist() == [0, 1, 2]
+    for annulus_index, annulus in output["annuli"].items():
+        row = int(annulus_index)
+        annulus_table = tables[f"annulus_{annulus_index}"]
+        assert annulus_table["MD"].tolist() == pytest.approx(annulus["MD"])
+        assert annulus_table["pressure_diff"].tolist() == pytest.approx(annulus["pressure"]["diff"])
+        assert annulus_table["envelope_temperature_time_of_max"].tolist() == pytest.approx(
+            annulus["envelope"]["temperature"]["time_of_max"]
+        )
+        assert annuli["pressure_APB"][row] == pytest.approx(annulus["pressure"]["APB"])
+        assert annuli["volume_diff"][row] == pytest.approx(annulus["volume"]["diff"])
+        ((leakage_time, leakage_mass),) = annulus["leakage_mass"].items()
+        assert annuli["leakage_time"][row] == float(leakage_time)
+        assert annuli["leakage_mass"][row] == pytest.approx(leakage_mass)
+        history_table = tables[f"annulus_{annulus_index}_history"]
+        assert history_table["APB"].tolist() == pytest.approx(annulus["history"]["APB"])
+
+    for wall_index, wall in output["layers"].items():
+        wall_table = tables[f"wall_{wall_index}"]
+        assert set(wall_table) == {
+            "MD",
+            "temperature",
+            "envelope_temperature_max",
+            "envelope_temperature_min",
+            "envelope_temperature_time_of_max",
+        }
+        assert wall_table["temperature"].tolist() == pytest.approx(wall["temperature"])
+
+    # the columns are memory-mapped, and only the tables requested are read
+    assert isinstance(tables["annulus_1"]["MD"], np.memmap)
+    tables = read_output_tables(tables_folder, ["annuli", "annulus_1"], mmap_mode=None)
+    assert set(tables) == {"annuli", "annulus_1"}
+    assert not isinstance(tables["annulus_1"]["MD"], np.memmap)
+    with pytest.raises(KeyError, match="There is no table 'annulus_9'"):
+        read_output_tables(tables_folder, ["annulus_9"])
+
+    # the columns not in a new output are removed
+    converter.generate_score_output_file(
+        shared_datadir / "nan_results.data", output_tables_folder=tables_folder
+    )
+    tables = read_output_tables(tables_folder)
+    assert "envelope_temperature_max" not in tables["annulus_1"]
+    assert "annulus_1_history" not in tables
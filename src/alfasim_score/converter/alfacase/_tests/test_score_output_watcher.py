@@ -0,0 +1,193 @@
+from typing import Dict
+
+import h5py
+import numpy as np
+import pytest
+import shutil
+from barril.units import Scalar
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.common import AnnulusLabel
+from alfasim_score.converter.alfacase import score_output_watcher
+from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+from alfasim_score.converter.alfacase.score_output_watcher import ScoreOutputWatcher
+
+
+def _write_time_steps(
+    result_filepath: Path, profiles_values: Dict[str, np.ndarray], time_steps: int
+) -> None:
+    """Keep only the first time steps of the profiles, as if ALFAsim was still running."""
+    with h5py.File(result_filepath, "r+") as result_file:
+        for name, values in profiles_values.items():
+            dataset = result_file["profiles"][name]
+            dataset.resize(time_steps, axis=0)
+            dataset[:time_steps] = values[:time_steps]
+
+
+@pytest.fixture
+def running_results(shared_datadir: Path) -> Dict[str, np.ndarray]:
+    """The profiles values of all time steps of the results copied to `running_results.data`."""
+    shutil.copytree(shared_datadir / "nan_results.data", shared_datadir / "running_results.data")
+    result_filepath = shared_datadir / "running_results.data" / "results" / "results_00000"
+    with h5py.File(result_filepath, "r") as result_file:
+        return {name: dataset[:] for name, dataset in result_file["profiles"].items()}
+
+
+@pytest.fixture
+def converter(shared_datadir: Path, mocker: MockerFixture) -> AlfasimScoreConverter:
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    return converter
+
+
+def test_update_progress(
+    shared_datadir: Path,
+    running_results: Dict[str, np.ndarray],
+    converter: AlfasimScoreConverter,
+    mocker: MockerFixture,
+) -> None:
+    results_folder = shared_datadir / "running_results.data"
+    result_filepath = results_folder / "results" / "results_00000"
+    on_update = mocker.Mock()
+    watcher = ScoreOutputWatcher(converter.output_builder, results_folder, on_update)
+    _write_time_steps(result_filepath, running_results, 3)
+    progress = watcher.update()
+    assert progress is not None
+    assert progress["time_steps"] == 3
+    assert progress["time"] == running_results["time_set"][2] / 86400.0 / 30
+    assert set(progress["annuli"].keys()) == {"0", "1", "2"}
+    on_update.assert_called_once_with(progress)
+
+    # the result files aren't read again while they're not modified
+    progress_spy = mocker.spy(converter.output_builder, "generate_progress_results")
+    assert watcher.update() is None
+    assert progress_spy.call_count == 0
+
+    _write_time_steps(result_filepath, running_results, 12)
+    progress = watcher.update()
+    assert progress is not None
+    assert progress["time_steps"] == 12
+    assert progress_spy.call_count == 1
+    assert on_update.call_count == 2
+    final_output = converter.output_builder.generate_output_results(results_folder)
+    for annulus_index, annulus in final_output["annuli"].items():
+        assert progress["annuli"][annulus_index]["APB"] == annulus["pressure"]["APB"]
+
+    # results being created are ignored
+    watcher = ScoreOutputWatcher(converter.output_builder, shared_datadir / "missing.data")
+    assert watcher.update() is None
+
+
+def test_watch_score_output_file(
+    shared_datadir: Path,
+    running_results: Dict[str, np.ndarray],
+    converter: AlfasimScoreConverter,
+    mocker: MockerFixture,
+) -> None:
+    results_folder = shared_datadir / "running_results.data"
+    result_filepath = results_folder / "results" / "results_00000"
+    _write_time_steps(result_filepath, running_results, 4)
+    # ALFAsim writes 4 time steps between two checks of the results folder
+    written_time_steps = iter([8, 12])
+    sleep_mock = mocker.patch.object(
+        score_output_watcher.time,
+        "sleep",
+        side_effect=lambda _: _write_time_steps(
+            result_filepath, running_results, next(written_time_steps)
+        ),
+    )
+    progresses = list(converter.watch_score_output_file(results_folder, poll_interval=1.0))
+    # the watch stops when the operation duration is reached
+    assert [progress["time_steps"] for progress in progresses] == [4, 8, 12]
+    assert sleep_mock.call_count == 2
+    assert converter.output_builder.score_output_filepath.is_file()
+
+    # without new time steps, the watch stops after the idle timeout
+    monotonic_mock = mocker.patch.object(
+        score_output_watcher.time, "monotonic", side_effect=[0.0, 30.0, 61.0]
+    )
+    sleep_mock = mocker.patch.object(score_output_watcher.time, "sleep")
+    watcher = ScoreOutputWatcher(converter.output_builder, shared_datadir / "missing.data")
+    assert list(watcher.watch(poll_interval=30.0, idle_timeout=60.0)) == []
+    assert sleep_mock.call_count == 1
+    assert monotonic_mock.call_count == 3
+
+
+def test_update_retries_failed_reads(
+    shared_datadir: Path,
+    running_results: Dict[str, np.ndarray],
+    converter: AlfasimScoreConverter,
+    mocker: MockerFixture,
+) -> None:
+    results_folder = shared_datadir / "running_results.data"
+    result_filepath = results_folder / "results" / "results_00000"
+    _write_time_steps(result_filepath, running_results, 3)
+    generate_progress_results = converter.output_builder.generate_progress_results
+    # the result files can't be read while ALFAsim is writing them
+    progress_mock = mocker.patch.object(
+        converter.output_builder,
+        "generate_progress_results",
+        side_effect=[OSError("Can't read data (truncated file)"), generate_progress_results],
+    )
+    on_update = mocker.Mock()
+    watcher = ScoreOutputWatcher(converter.output_builder, results_folder, on_update)
+    assert watcher.update() is None
+    assert watcher.time_steps == 0
+    assert on_update.call_count == 0
+    # the same time steps are tried again in the next update
+    progress_mock.side_effect = generate_progress_results
+    progress = watcher.update()
+    assert progress is not None
+    assert progress["time_steps"] == 3
+    on_update.assert_called_once_with(progress)
+
+    # the read error is raised after failing in consecutive updates
+    _write_time_steps(result_filepath, running_results, 6)
+    progress_mock.side_effect = OSError("Unable to open file")
+    watcher = ScoreOutputWatcher(converter.output_builder, results_folder, max_failures=3)
+    assert watcher.update() is None
+    assert watcher.update() is None
+    with pytest.raises(OSError, match="Unable to open file"):
+        watcher.update()
+    assert progress_mock.call_count == 5
+
+    # other errors, like the errors of the update callback, aren't handled
+    progress_mock.side_effect = KeyError("profiles")
+    with pytest.raises(KeyError, match="profiles"):
+        ScoreOutputWatcher(converter.output_builder, results_folder).update()
+    progress_mock.side_effect = generate_progress_results
+    on_update = mocker.Mock(side_effect=RuntimeError("Can not write the output"))
+    watcher = ScoreOutputWatcher(converter.output_builder, results_folder, on_update)
+    with pytest.raises(RuntimeError, match="Can not write the output"):
+        watcher.update()
+
+
+@pytest.mark.parametrize("duration", [123.0, 245.0, 246.0, 247.0])
+def test_watch_stops_at_final_time(
+    shared_datadir: Path,
+    running_results: Dict[str, np.ndarray],
+    converter: AlfasimScoreConverter,
+    mocker: MockerFixture,
+    duration: float,
+) -> None:
+    results_folder = shared_datadir / "running_results.data"
+    result_filepath = results_folder / "results" / "results_00000"
+    # the last time step is written exactly at the final time of the operation
+    time_set = running_results["time_set"]
+    running_results["time_set"] = time_set * (duration * 86400.0 / time_set[-1])
+    running_results["time_set"][-1] = duration * 86400.0
+    _write_time_steps(result_filepath, running_results, len(time_set))
+    mocker.patch.dict(converter.score_data.operation_data, {"duration": Scalar(duration, "d")})
+    sleep_mock = mocker.patch.object(score_output_watcher.time, "sleep")
+    watcher = ScoreOutputWatcher(converter.output_builder, results_folder)
+    progresses = list(watcher.watch(poll_interval=1.0))
+    assert len(progresses) == 1
+    assert progresses[0]["finished"]
+    assert sleep_mock.call_count == 0
@@ -0,0 +1,84 @@
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import json
+import numpy as np
+import pytest
+from io import StringIO
+
+from alfasim_score.converter.alfacase import score_output_writer
+from alfasim_score.converter.alfacase.score_output_writer import ScoreOutputWriter
+
+
+def _build_output() -> Dict[str, Any]:
+    measured_depths = np.linspace(2182.0, 4500.0, 25)
+    return {
+        "annuli": {
+            "0": {
+                "MD": measured_depths,
+                "temperature": {"start": np.sin(measured_depths), "final": np.array([1e-20, 3e20])},
+                "volume": {"start": 1.5, "final": np.float64(2.25), "diff": 0.75},
+                "leakage_bbl": {"12.0": 0},
+            },
+            "1": {"MD": measured_depths[:0], "pressure": {}, "flags": [True, False, None]},
+        },
+        "MD": measured_depths,
+        "non_finite": np.array([np.nan, np.inf, -np.inf, 1.0]),
+        "counts": np.arange(5),
+        "nested": [[1, 2.5], ['text "quoted"', np.int64(3)], np.ones((2, 2))],
+        "layers": [],
+    }
+
+
+def _write(output: Dict[str, Any], indent: Optional[int], significant_digits: Optional[int]) -> str:
+    file = StringIO()
+    ScoreOutputWriter(file, indent, significant_digits).write(output)
+    return file.getvalue()
+
+
+def _to_builtins(value: Any) -> Any:
+    """Convert the NumPy values to be serialized by `json.dumps`."""
+    if isinstance(value, dict):
+        return {key: _to_builtins(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtins(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+@pytest.mark.parametrize("chunk_size", [10000, 4])
+def test_write_score_output_as_json_dumps(monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    monkeypatch.setattr(score_output_writer, "SCORE_OUTPUT_WRITE_CHUNK_SIZE", chunk_size)
+    output = _build_output()
+    expected_output = _to_builtins(output)
+    assert _write(output, 2, None) == json.dumps(expected_output, indent=2)
+    assert _write(output, 4, None) == json.dumps(expected_output, indent=4)
+    assert _write(output, None, None) == json.dumps(expected_output, separators=(",", ":"))
+
+
+def test_write_score_output_with_significant_digits() -> None:
+    output = _build_output()
+    content = _write(output, None, 6)
+    assert len(content) < len(_write(output, None, None))
+    loaded_output = json.loads(content)
+    expected_output = _to_builtins(output)
+    assert loaded_output.keys() == expected_output.keys()
+    assert np.allclose(loaded_output["MD"], output["MD"], rtol=5e-6, atol=0.0)
+    assert np.allclose(
+        loaded_output["annuli"]["0"]["temperature"]["start"],
+        output["annuli"]["0"]["temperature"]["start"],
+        rtol=5e-6,
+        atol=0.0,
+    )
+    # integers are kept as integers and floats as floats
+    assert loaded_output["counts"] == expected_output["counts"]
+    assert loaded_output["annuli"]["0"]["volume"] == {"start": 1.5, "final": 2.25, "diff": 0.75}
+    assert all(isinstance(value, float) for value in loaded_output["MD"])
+    assert np.array_equal(
+        loaded_output["non_finite"], [np.nan, np.inf, -np.inf, 1.0], equal_nan=True
+    )
+
+    with pytest.raises(TypeError, match="set is not JSON serializable"):
+        _write({"invalid": {1, 2}}, 2, None)
@@ -0,0 +1,125 @@
+from typing import List
+from typing import Tuple
+
+import json
+import pytest
+from barril.units import Scalar
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.common import AnnulusLabel
+from alfasim_score.common import LiftMethod
+from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+from alfasim_score.converter.alfacase.score_results_warehouse import ScoreResultsWarehouse
+
+
+@pytest.fixture
+def score_runs(shared_datadir: Path, mocker: MockerFixture) -> List[Tuple[Path, Path]]:
+    """Three runs with different GOR, with the APB of each run increasing with the GOR."""
+    converter = AlfasimScoreConverter(
+        shared_datadir / "nan_results.json", shared_datadir / "output_score.json"
+    )
+    mocker.patch.object(
+        converter.score_data,
+        "get_annuli_list",
+        return_value=[AnnulusLabel.A, AnnulusLabel.B, AnnulusLabel.C],
+    )
+    converter.generate_score_output_file(shared_datadir / "nan_results.data")
+    score_input = json.loads((shared_datadir / "nan_results.json").read_text(encoding="utf-8"))
+    score_output = json.loads(
+        converter.output_builder.score_output_filepath.read_text(encoding="utf-8")
+    )
+    runs = []
+    for run_index, gas_oil_ratio in enumerate([100.0, 200.0, 300.0]):
+        score_input["operation"]["data"]["gor"] = gas_oil_ratio
+        for annulus_index, annulus in score_output["annuli"].items():
+            annulus["pressure"]["APB"] = gas_oil_ratio + int(annulus_index)
+        input_filepath = shared_datadir / f"run_{run_index}_input.json"
+        output_filepath = shared_datadir / f"run_{run_index}_output.json"
+        input_filepath.write_text(json.dumps(score_input), encoding="utf-8")
+        output_filepath.write_text(json.dumps(score_output), encoding="utf-8")
+        runs.append((input_filepath, output_filepath))
+    return runs
+
+
+def test_ingest_runs(tmp_path: Path, score_runs: List[Tuple[Path, Path]]) -> None:
+    database_filepath = tmp_path / "warehouse.db"
+    with ScoreResultsWarehouse(database_filepath) as warehouse:
+        assert warehouse.ingest(score_runs) == 3
+        assert len(warehouse.query_annuli()) == 9
+        # the runs not modified aren't ingested again
+        assert warehouse.ingest(score_runs) == 0
+
+    # the warehouse is kept in the database file
+    with ScoreResultsWarehouse(database_filepath) as warehouse:
+        assert warehouse.ingest(score_runs[:1]) == 0
+        input_filepath, output_filepath = score_runs[0]
+        score_output = json.loads(output_filepath.read_text(encoding="utf-8"))
+        score_output["annuli"]["1"]["pressure"]["APB"] = 1000.0
+        output_filepath.write_text(json.dumps(score_output), encoding="utf-8")
+        assert warehouse.ingest(score_runs) == 1
+        assert len(warehouse.query_annuli()) == 9
+        annuli = warehouse.query_annuli(AnnulusLabel.B, order_by="pressure_APB", descending=True)
+        assert annuli[0]["score_output_file"] == str(output_filepath)
+        assert annuli[0]["pressure_APB"] == 1000.0
+
+
+def test_query_annuli(tmp_path: Path, score_runs: List[Tuple[Path, Path]]) -> None:
+    with ScoreResultsWarehouse(tmp_path / "warehouse.db") as warehouse:
+        warehouse.ingest(score_runs)
+        score_output = json.loads(score_runs[0][1].read_text(encoding="utf-8"))
+
+        annuli = warehouse.query_annuli(
+            AnnulusLabel.B,
+            [("gas_oil_ratio", "<", 250.0)],
+            order_by="pressure_APB",
+            descending=True,
+            limit=1,
+        )
+        assert len(annuli) == 1
+        annulus = annuli[0]
+        assert annulus["score_output_file"] == str(score_runs[1][1])
+        assert annulus["annulus"] == 1
+        assert annulus["label"] == "b"
+        assert annulus["pressure_APB"] == 201.0
+        assert annulus["volume_diff"] == pytest.approx(
+            score_output["annuli"]["1"]["volume"]["diff"]
+        )
+        ((leakage_time, leakage_mass),) = score_output["annuli"]["1"]["leakage_mass"].items()
+        assert annulus["leakage_time"] == float(leakage_time)
+        assert annulus["leakage_mass"] == pytest.approx(leakage_mass)
+
+        # the text parameters are compared to the texts
+        conditions = [("lift_method", "=", LiftMethod.NATURAL_FLOW), ("gas_oil_ratio", ">=", 200.0)]
+        annuli = warehouse.query_annuli(AnnulusLabel.A, conditions, order_by="pressure_APB")
+        assert [annulus["pressure_APB"] for annulus in annuli] == [200.0, 300.0]
+        conditions = [("lift_method", "=", LiftMethod.GAS_LIFT)]
+        assert warehouse.query_annuli(conditions=conditions) == []
+
+        with pytest.raises(ValueError, match="Invalid operator"):
+            warehouse.query_annuli(conditions=[("gas_oil_ratio", "> 0 OR 1 =", 1.0)])
+        with pytest.raises(ValueError, match="Invalid order"):
+            warehouse.query_annuli(order_by="annulus; DROP TABLE runs")
+
+
+def test_read_run_data(tmp_path: Path, score_runs: List[Tuple[Path, Path]]) -> None:
+    with ScoreResultsWarehouse(tmp_path / "warehouse.db") as warehouse:
+        warehouse.ingest(score_runs)
+        input_filepath, output_filepath = score_runs[2]
+        parameters = warehouse.get_operation_parameters(output_filepath)
+        assert parameters["gas_oil_ratio"] == Scalar(300.0, "sm3/sm3")
+        assert parameters["lift_method"] == LiftMethod.NATURAL_FLOW.value
+        assert parameters["type"] == "PRODUCTION"
+
+        score_output = json.loads(output_filepath.read_text(encoding="utf-8"))
+        annulus = warehouse.read_profiles(output_filepath, "annulus_1")
+        assert annulus["MD"].tolist() == pytest.approx(score_output["annuli"]["1"]["MD"])
+        assert annulus["pressure_final"].tolist() == pytest.approx(
+            score_output["annuli"]["1"]["pressure"]["final"]
+        )
+        production_tubing = warehouse.read_profiles(output_filepath, "production_tubing")
+        assert production_tubing["pressure_final"].tolist() == pytest.approx(
+            score_output["production_tubing"]["pressure"]["final"], nan_ok=True
+        )
+        with pytest.raises(KeyError, match="There is no table 'annulus_9'"):
+            warehouse.read_profiles(output_filepath, "annulus_9")
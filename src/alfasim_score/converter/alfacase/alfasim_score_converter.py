@@ -1,5 +1,12 @@
-import json
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
 from alfasim_sdk import generate_alfacase_file
+from barril.units import Array
+from barril.units import Scalar
 from pathlib import Path
 
 from alfasim_score.common import OperationType
@@ -9,6 +16,12 @@ from alfasim_score.converter.alfacase.production_operation import ProductionOper
 from alfasim_score.converter.alfacase.score_input_data import ScoreInputData
 from alfasim_score.converter.alfacase.score_input_reader import ScoreInputReader
 from alfasim_score.converter.alfacase.score_output_generator import ScoreOutputBuilder
+from alfasim_score.converter.alfacase.score_output_tables import write_output_tables
+from alfasim_score.converter.alfacase.score_output_watcher import SCORE_OUTPUT_WATCH_POLL_INTERVAL
+from alfasim_score.converter.alfacase.score_output_watcher import ScoreOutputWatcher
+from alfasim_score.converter.alfacase.score_output_writer import ScoreOutputWriter
+from alfasim_score.converter.wellprop.pvt_table_store import link_pvt_table_files
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import generate_pvt_table_files
 
 
 class AlfasimScoreConverter:
@@ -18,9 +31,27 @@ class AlfasimScoreConverter:
     - it can use a ALFAsim result into a SCORE output file.
     """
 
-    def __init__(self, score_input_file: Path, score_output_file: Path):
+    def __init__(
+        self,
+        score_input_file: Path,
+        score_output_file: Path,
+        temperature_tolerance: Optional[Scalar] = None,
+        skip_default_annuli: bool = False,
+    ):
+        """
+        :param temperature_tolerance:
+            When given, the annulus temperature tables of the APB plugin data are downsampled
+            within this tolerance (see `ScoreAPBPluginConverter`).
+        :param skip_default_annuli:
+            Don't write the inactive annuli in the APB plugin data, leaving them to the plugin
+            defaults (not checked, see `Annuli.to_dict`).
+        """
+        self.temperature_tolerance = temperature_tolerance
+        self.skip_default_annuli = skip_default_annuli
         score_reader = ScoreInputReader(score_input_file)
         self.score_data = ScoreInputData(score_reader)
+        # the builder checks the operation data of the input up front, but it only builds the
+        # well description when the alfacase is generated (see `base_alfacase`)
         self.alfacase_builder = self._get_score_to_alfacase_builder()
         self.output_builder = ScoreOutputBuilder(self.score_data, score_output_file)
 
@@ -28,17 +59,118 @@ class AlfasimScoreConverter:
         """Convert SCORE input file to an alfacase description."""
         operation_type = self.score_data.operation_data["type"]
         if operation_type == OperationType.PRODUCTION:
-            return ProductionOperationBuilder(self.score_data)
+            return ProductionOperationBuilder(
+                self.score_data, self.temperature_tolerance, self.skip_default_annuli
+            )
         else:
-            return InjectionOperationBuilder(self.score_data)
+            return InjectionOperationBuilder(
+                self.score_data, self.temperature_tolerance, self.skip_default_annuli
+            )
 
     def generate_alfasim_input_file(self, alfacase_filepath: Path) -> None:
         """Create the ALFAsim input file (AKA alfacase) from an SCORE input file."""
         alfacase_description = self.alfacase_builder.generate_operation_alfacase_description()
         generate_alfacase_file(alfacase_description, alfacase_filepath)
 
-    def generate_score_output_file(self, alfasim_results_folder: Path) -> None:
-        """Create the output file for SCORE based on the results generated by ALFAsim."""
-        output = self.output_builder.generate_output_results(alfasim_results_folder)
-        json_data = json.dumps(output, indent=2)
-        self.output_builder.score_output_filepath.write_text(json_data, encoding="utf-8")
+    def generate_score_output_file(
+        self,
+        alfasim_results_folder: Path,
+        indent: Optional[int] = 2,
+        significant_digits: Optional[int] = None,
+        history_interval: Optional[Scalar] = None,
+        include_envelopes: bool = False,
+        use_cache: bool = False,
+        output_measured_depths: Optional[Array] = None,
+        output_tables_folder: Optional[Path] = None,
+    ) -> None:
+        """
+        Create the output file for SCORE based on the results generated by ALFAsim.
+
+        :param indent:
+            The indentation of the json file, or `None` to write compact json.
+        :param significant_digits:
+            The maximum number of significant digits of the values, or `None` to keep all digits.
+        :param history_interval:
+            When given, the history of the annuli APB and volumes sampled at this interval (e.g.
+            `Scalar(30.0, "d")` for monthly samples) is also written.
+        :param include_envelopes:
+            When true, the maximum and minimum temperature and pressure reached at each MD of the
+            annuli and walls over the whole operation are also written.
+        :param use_cache:
+            When true, the curves read from the results are kept in a cache file in the results
+            folder, used instead of the results while they aren't modified.
+        :param output_measured_depths:
+            When given, the profiles are interpolated at these MDs instead of written at each cell
+            of the ALFAsim mesh (e.g. `self.output_builder.get_score_measured_depths()`).
+        :param output_tables_folder:
+            When given, the same results are also written to this folder as columnar tables (see
+            `write_output_tables`), to be memory-mapped for analysis without parsing the json file.
+        """
+        output = self.output_builder.generate_output_results(
+            alfasim_results_folder,
+            history_interval,
+            include_envelopes,
+            use_cache,
+            output_measured_depths,
+        )
+        with open(self.output_builder.score_output_filepath, "w", encoding="utf-8") as file:
+            ScoreOutputWriter(file, indent, significant_digits).write(output)
+        if output_tables_folder is not None:
+            write_output_tables(output_tables_folder, output)
+
+    def watch_score_output_file(
+        self,
+        alfasim_results_folder: Path,
+        poll_interval: float = SCORE_OUTPUT_WATCH_POLL_INTERVAL,
+        idle_timeout: Optional[float] = None,
+        write_output: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Follow the results of a running ALFAsim simulation, yielding a progress summary (the time
+        in months, the number of time steps and the APB of each annulus) each time new time steps
+        are written, until the end of the operation.
+
+        :param poll_interval:
+            The number of seconds between two checks of the results folder.
+        :param idle_timeout:
+            When given, stop watching after this number of seconds without new time steps.
+        :param write_output:
+            When true, the output file for SCORE is regenerated at each update.
+        """
+
+        def write_output_file(progress: Dict[str, Any]) -> None:
+            self.generate_score_output_file(alfasim_results_folder)
+
+        watcher = ScoreOutputWatcher(
+            self.output_builder,
+            alfasim_results_folder,
+            write_output_file if write_output else None,
+        )
+        yield from watcher.watch(poll_interval, idle_timeout)
+
+    def generate_pvt_table_files(
+        self,
+        wellprop_library_folder: Path,
+        destiny_folder: Path,
+        max_workers: Optional[int] = None,
+        store_folder: Optional[Path] = None,
+    ) -> List[Path]:
+        """
+        Create the pvt table files (`.tab`) for all fluids referenced by the SCORE input.
+        Each fluid is converted from the wellprop folder with the same name found in the library
+        folder. The conversions run in parallel and tables already up to date are kept.
+
+        :param store_folder:
+            When given, the tables are kept in a `PvtTableStore` in this folder and the files in
+            the destiny folder are links to the stored tables.
+        """
+        fluid_names = self.score_data.get_all_pvt_table_names()
+        wellprop_folders = [wellprop_library_folder / name for name in fluid_names]
+        missing_folders = [folder.name for folder in wellprop_folders if not folder.is_dir()]
+        if missing_folders:
+            raise FileNotFoundError(
+                f"Wellprop folders not found in {wellprop_library_folder}: {', '.join(missing_folders)}"
+            )
+        if store_folder is not None:
+            return link_pvt_table_files(wellprop_folders, destiny_folder, store_folder, max_workers)
+        return generate_pvt_table_files(wellprop_folders, destiny_folder, max_workers)
@@ -5,9 +5,9 @@ from typing import Union
 
 from barril.units import Array
 from barril.units import Scalar
-from dataclasses import asdict
 from dataclasses import dataclass
 from dataclasses import field
+from dataclasses import fields
 from enum import Enum
 
 from alfasim_score.common import AnnulusLabel
@@ -19,6 +19,15 @@ from alfasim_score.units import TEMPERATURE_UNIT
 from alfasim_score.units import VOLUME_UNIT
 
 
+def to_flat_dict(instance: Any) -> Dict[str, Any]:
+    """
+    Convert the fields of a dataclass to a dict.
+    Unlike `dataclasses.asdict` it doesn't recurse nor (deep) copy the values, so the dict
+    refers to the same `Array` and `Scalar` instances of the dataclass.
+    """
+    return {data_field.name: getattr(instance, data_field.name) for data_field in fields(instance)}
+
+
 class ThermalPropertyUpdateMode(str, Enum):
     DISABLED = "Disabled"
     FIRST_TIME_STEP = "First time step"
@@ -59,7 +68,7 @@ class SolidMechanicalProperties:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert data to dict in order to write data to the alfacase."""
-        return asdict(self)
+        return to_flat_dict(self)
 
 
 @dataclass
@@ -112,7 +121,7 @@ class Annulus:
     def to_dict(self, annulus_label: AnnulusLabel) -> Dict[str, Any]:
         """Convert data to dict in order to write data to the alfacase."""
         output = {}
-        for key, value in asdict(self).items():
+        for key, value in to_flat_dict(self).items():
             if key == "annulus_depth_table":
                 value = self.annulus_depth_table.to_dict(annulus_label)
             elif key == "annulus_temperature_table":
@@ -133,11 +142,23 @@ class Annuli:
     annulus_d: Annulus = field(default_factory=lambda: Annulus())
     annulus_e: Annulus = field(default_factory=lambda: Annulus())
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert data to dict in order to write data to the alfacase."""
+    def to_dict(self, skip_default_annuli: bool = False) -> Dict[str, Any]:
+        """
+        Convert data to dict in order to write data to the alfacase.
+
+        :param skip_default_annuli:
+            Don't write the annuli that are left with default values (inactive), so the plugin
+            fills the missing ones with its own defaults. These defaults aren't checked against
+            the plugin schema and may differ from the `Annulus` defaults (e.g. the zero
+            `initial_top_pressure` and `water_depth_pressure`), so it's off by default.
+        """
         data = {}
+        default_annulus = Annulus()
         for annulus_label in AnnulusLabel:
-            data.update(getattr(self, f"annulus_{annulus_label.value}").to_dict(annulus_label))
+            annulus = getattr(self, f"annulus_{annulus_label.value}")
+            if skip_default_annuli and annulus == default_annulus:
+                continue
+            data.update(annulus.to_dict(annulus_label))
         return data
 
 
@@ -151,4 +172,4 @@ class Options:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert data to dict in order to write data to the alfacase."""
-        return asdict(self)
+        return to_flat_dict(self)
@@ -1,3 +1,4 @@
+from typing import Optional
 from typing import Union
 
 from alfasim_sdk import CaseDescription
@@ -20,6 +21,7 @@ from alfasim_sdk import NodeDescription
 from alfasim_sdk import NumericalOptionsDescription
 from alfasim_sdk import OutputAttachmentLocation
 from alfasim_sdk import PhysicsDescription
+from alfasim_sdk import PositionalPipeTrendDescription
 from alfasim_sdk import PressureContainerDescription
 from alfasim_sdk import PressureNodePropertiesDescription
 from alfasim_sdk import ProfileOutputDescription
@@ -37,6 +39,7 @@ from alfasim_sdk._internal.constants import FLUID_WATER
 from barril.units import Array
 from barril.units import Scalar
 from copy import deepcopy
+from functools import cached_property
 from pathlib import Path
 from typing_extensions import assert_never
 
@@ -65,13 +68,25 @@ from alfasim_score.units import VELOCITY_UNIT
 
 
 class BaseOperationBuilder:
-    def __init__(self, score_input_data: ScoreInputData):
+    def __init__(
+        self,
+        score_input_data: ScoreInputData,
+        temperature_tolerance: Optional[Scalar] = None,
+        skip_default_annuli: bool = False,
+    ):
+        """
+        :param temperature_tolerance:
+            When given, the tolerance to downsample the annulus temperature tables of the APB
+            plugin data (see `ScoreAPBPluginConverter`).
+        :param skip_default_annuli:
+            Don't write the inactive annuli in the APB plugin data. It's off by default since the
+            plugin defaults used instead aren't checked (see `Annuli.to_dict`).
+        """
         self.operation_type: Union[None, OperationType] = None
         self.score_data = score_input_data
-        self.base_alfacase = ScoreAlfacaseConverter(
-            self.score_data
-        ).build_base_alfacase_description()
-        self.plugin_converters = [ScoreAPBPluginConverter(self.score_data)]
+        self.plugin_converters = [
+            ScoreAPBPluginConverter(self.score_data, temperature_tolerance, skip_default_annuli)
+        ]
         self.default_output_profiles = [
             "elevation",
             "holdup",
@@ -90,6 +105,20 @@ class BaseOperationBuilder:
             "annulus_c_pressure",
             "annulus_d_pressure",
             "annulus_e_pressure",
+            "annulus_a_rho",
+            "annulus_b_rho",
+            "annulus_c_rho",
+            "annulus_d_rho",
+            "annulus_e_rho",
+            "wall_0_temperature",
+            "wall_1_temperature",
+            "wall_2_temperature",
+            "wall_3_temperature",
+            "wall_4_temperature",
+            "wall_5_temperature",
+        ]
+        # the annuli scalar quantities are the same in all cells, so they're requested as trends
+        self.default_output_trends = [
             "annulus_a_apb",
             "annulus_b_apb",
             "annulus_c_apb",
@@ -113,19 +142,16 @@ class BaseOperationBuilder:
             "annulus_c_vte",
             "annulus_d_vte",
             "annulus_e_vte",
-            "annulus_a_rho",
-            "annulus_b_rho",
-            "annulus_c_rho",
-            "annulus_d_rho",
-            "annulus_e_rho",
-            "wall_0_temperature",
-            "wall_1_temperature",
-            "wall_2_temperature",
-            "wall_3_temperature",
-            "wall_4_temperature",
-            "wall_5_temperature",
         ]
 
+    @cached_property
+    def base_alfacase(self) -> CaseDescription:
+        """
+        The alfacase description of the well, built when first used (the trajectory refinement,
+        materials, formation and casings are only needed to generate the operation alfacase).
+        """
+        return ScoreAlfacaseConverter(self.score_data).build_base_alfacase_description()
+
     def assert_operation_type(self, operation: OperationType) -> None:
         """Make sure the configured operation is the same of that configured in SCORE input."""
         score_configured_operation = self.score_data.operation_data["type"]
@@ -241,7 +267,15 @@ class BaseOperationBuilder:
         """Configure the outputs for the case."""
         alfacase.outputs = CaseOutputDescription(
             trends=TrendsOutputDescription(
-                global_trends=[GlobalTrendDescription(curve_names=["timestep"])]
+                positional_pipe_trends=[
+                    PositionalPipeTrendDescription(
+                        curve_names=self.default_output_trends,
+                        location=OutputAttachmentLocation.Main,
+                        position=Scalar(0.0, LENGTH_UNIT),
+                        element_name=WELLBORE_NAME,
+                    )
+                ],
+                global_trends=[GlobalTrendDescription(curve_names=["timestep"])],
             ),
             profiles=[
                 ProfileOutputDescription(
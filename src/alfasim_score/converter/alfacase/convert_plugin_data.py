@@ -1,6 +1,8 @@
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
 import numpy as np
 from alfasim_sdk import PluginDescription
@@ -9,6 +11,7 @@ from barril.units import Scalar
 
 from alfasim_score.common import WellItemFunction
 from alfasim_score.common import filter_duplicated_materials_by_name
+from alfasim_score.common import simplify_polyline
 from alfasim_score.constants import HAS_FLUID_RETURN
 from alfasim_score.converter.alfacase.apb_plugin_data import Annuli
 from alfasim_score.converter.alfacase.apb_plugin_data import Annulus
@@ -27,8 +30,49 @@ from alfasim_score.units import TEMPERATURE_UNIT
 
 
 class ScoreAPBPluginConverter:
-    def __init__(self, score_input_data: ScoreInputData):
+    def __init__(
+        self,
+        score_input_data: ScoreInputData,
+        temperature_tolerance: Optional[Scalar] = None,
+        skip_default_annuli: bool = False,
+    ):
+        """
+        :param temperature_tolerance:
+            When given, the annulus temperature tables are downsampled keeping only the depths
+            needed to reproduce the formation temperature profile (by linear interpolation)
+            within this tolerance.
+        :param skip_default_annuli:
+            Don't write the inactive annuli in the plugin data, leaving them to the plugin
+            defaults, which may differ from the `Annulus` defaults (see `Annuli.to_dict`).
+        """
         self.score_data = score_input_data
+        self.temperature_tolerance = temperature_tolerance
+        self.skip_default_annuli = skip_default_annuli
+        self._formation_temperature_profile: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _get_formation_temperature_profile(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the formation temperatures mapped to the measured depths in the ALFAsim reference.
+        The mapping is the same for all annuli, so it's calculated only once.
+        """
+        if self._formation_temperature_profile is None:
+            formation_temperature_data = self.score_data.reader.read_formation_temperatures()
+            formation_depths = np.abs(
+                formation_temperature_data["elevations"].GetValues(LENGTH_UNIT)
+            ) + self.score_data.general_data["air_gap"].GetValue(LENGTH_UNIT)
+            trajectory = self.score_data.reader.read_well_trajectory()
+            x = np.abs(trajectory["x"].GetValues(LENGTH_UNIT))
+            y = np.abs(trajectory["y"].GetValues(LENGTH_UNIT))
+            # Calulate the measured depth (MD) based on the trajectory
+            md = np.insert(np.cumsum(np.hypot(np.diff(x), np.diff(y))) + y[0], 0, y[0])
+            formation_md = np.interp(
+                formation_depths, y, md
+            ) - self.score_data.get_well_start_position().GetValue(LENGTH_UNIT)
+            self._formation_temperature_profile = (
+                formation_md,
+                formation_temperature_data["temperatures"].GetValues(TEMPERATURE_UNIT),
+            )
+        return self._formation_temperature_profile
 
     def _build_annular_temperature_table(
         self, final_temperature_depth: Scalar
@@ -38,54 +82,21 @@ class ScoreAPBPluginConverter:
         It uses the well vertical positions in order to interpolates the temperatures of formation and it maps
         each measured depth to the temperature of formation in that position.
         """
-        formation_temperature_data = self.score_data.reader.read_formation_temperatures()
-        formation_depths = (
-            np.abs(formation_temperature_data["elevations"].GetValues())
-            + self.score_data.general_data["air_gap"].GetValue()
-        )
-        formation_temperatures = formation_temperature_data["temperatures"].GetValues()
-        trajectory = self.score_data.reader.read_well_trajectory()
-        x = np.abs(trajectory["x"])
-        y = np.abs(trajectory["y"])
-
-        # Calulate the measured depth (MD) based on the trajectory
-        md = np.insert(np.cumsum(np.hypot(np.diff(x), np.diff(y))) + y[0], 0, y[0])
-
-        formation_md_score_reference = Array(
-            np.interp(formation_depths, y, md),
-            LENGTH_UNIT,
-        )
-
-        formation_md_alfasim_reference = Array(
-            [
-                self.score_data.get_position_in_well(Scalar(depth, LENGTH_UNIT)).GetValue()
-                for depth in formation_md_score_reference.GetValues(LENGTH_UNIT)
-            ],
-            LENGTH_UNIT,
-        )
-
-        annulus_depth_md_alfasim_reference = [
-            self.score_data.get_position_in_well(Scalar(depth, LENGTH_UNIT)).GetValue()
-            for depth in formation_md_score_reference.GetValues(LENGTH_UNIT)
-            if self.score_data.get_position_in_well(Scalar(depth, LENGTH_UNIT)).GetValue()
-            < final_temperature_depth.GetValue()
-        ]
-
-        if final_temperature_depth.GetValue() not in annulus_depth_md_alfasim_reference:
-            annulus_depth_md_alfasim_reference.append(final_temperature_depth.GetValue())
-        annulus_depth_md_alfasim_reference = Array(annulus_depth_md_alfasim_reference, LENGTH_UNIT)
-
-        annulus_temperature = Array(
-            np.interp(
-                annulus_depth_md_alfasim_reference,
-                formation_md_alfasim_reference,
-                formation_temperatures,
-            ),
-            TEMPERATURE_UNIT,
-        )
-
+        formation_md, formation_temperatures = self._get_formation_temperature_profile()
+        final_depth = final_temperature_depth.GetValue(LENGTH_UNIT)
+        annulus_depths = np.append(formation_md[formation_md < final_depth], final_depth)
+        annulus_temperatures = np.interp(annulus_depths, formation_md, formation_temperatures)
+        if self.temperature_tolerance is not None:
+            keep = simplify_polyline(
+                annulus_depths,
+                annulus_temperatures,
+                self.temperature_tolerance.GetValue(TEMPERATURE_UNIT),
+            )
+            annulus_depths = annulus_depths[keep]
+            annulus_temperatures = annulus_temperatures[keep]
         return AnnulusTemperatureTable(
-            depths=annulus_depth_md_alfasim_reference, temperatures=annulus_temperature
+            depths=Array(annulus_depths, LENGTH_UNIT),
+            temperatures=Array(annulus_temperatures, TEMPERATURE_UNIT),
         )
 
     def _build_annular_fluid_depth_table(
@@ -124,18 +135,16 @@ class ScoreAPBPluginConverter:
             # the annulus A uses data from tubing_strings section of SCORE file
             tubing_fluids_data = self.score_data.reader.read_tubing_fluid_data()
             annulus_data = annuli_data.pop(0)
+            annulus_depth_table = self._build_annular_fluid_depth_table(tubing_fluids_data)
             final_temperature_depth = Scalar(
-                self._build_annular_fluid_depth_table(tubing_fluids_data).final_depths.GetValues()[
-                    0
-                ],
-                LENGTH_UNIT,
+                annulus_depth_table.final_depths.GetValues(LENGTH_UNIT)[0], LENGTH_UNIT
             )
             annuli.annulus_a = Annulus(
                 is_active=True,
                 mode_type=initial_conditions_data["mode"],
                 initial_top_pressure=annulus_data["initial_top_pressure"],
                 is_open_seabed=False,
-                annulus_depth_table=self._build_annular_fluid_depth_table(tubing_fluids_data),
+                annulus_depth_table=annulus_depth_table,
                 annulus_temperature_table=self._build_annular_temperature_table(
                     final_temperature_depth
                 ),
@@ -164,11 +173,11 @@ class ScoreAPBPluginConverter:
             casing = casings.pop()
             if self.score_data.has_annular_fluid(casing["annular_fluids"]):
                 is_open_seabed = casing["function"] == WellItemFunction.SURFACE
+                annulus_depth_table = self._build_annular_fluid_depth_table(
+                    casing["annular_fluids"]
+                )
                 final_temperature_depth = Scalar(
-                    self._build_annular_fluid_depth_table(
-                        casing["annular_fluids"]
-                    ).final_depths.GetValues()[0],
-                    LENGTH_UNIT,
+                    annulus_depth_table.final_depths.GetValues(LENGTH_UNIT)[0], LENGTH_UNIT
                 )
                 water_depth_pressure = (
                     self.score_data.get_seabed_hydrostatic_pressure()
@@ -183,9 +192,7 @@ class ScoreAPBPluginConverter:
                         mode_type=initial_conditions_data["mode"],
                         initial_top_pressure=annulus_data["initial_top_pressure"],
                         is_open_seabed=is_open_seabed,
-                        annulus_depth_table=self._build_annular_fluid_depth_table(
-                            casing["annular_fluids"]
-                        ),
+                        annulus_depth_table=annulus_depth_table,
                         annulus_temperature_table=self._build_annular_temperature_table(
                             final_temperature_depth
                         ),
@@ -244,7 +251,7 @@ class ScoreAPBPluginConverter:
         gui_models = {
             "AnnulusDataModel": {
                 "name": "Annulus Data Model",
-                **annuli.to_dict(),
+                **annuli.to_dict(self.skip_default_annuli),
             },
             "FluidContainer": {
                 "name": "Annulus Fluids Container",
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import attr
 from alfasim_sdk import CaseDescription
 from alfasim_sdk import MassInflowSplitType
@@ -24,8 +26,13 @@ from alfasim_score.units import TEMPERATURE_UNIT
 
 
 class InjectionOperationBuilder(BaseOperationBuilder):
-    def __init__(self, score_input_data: ScoreInputData):
-        super().__init__(score_input_data)
+    def __init__(
+        self,
+        score_input_data: ScoreInputData,
+        temperature_tolerance: Optional[Scalar] = None,
+        skip_default_annuli: bool = False,
+    ):
+        super().__init__(score_input_data, temperature_tolerance, skip_default_annuli)
         self.operation_type = OperationType.INJECTION
         self.assert_operation_type(self.operation_type)
 
@@ -1,4 +1,5 @@
 from typing import Dict
+from typing import Optional
 
 import attr
 import numpy as np
@@ -53,8 +54,13 @@ from alfasim_score.units import VELOCITY_UNIT
 
 
 class ProductionOperationBuilder(BaseOperationBuilder):
-    def __init__(self, score_input_data: ScoreInputData):
-        super().__init__(score_input_data)
+    def __init__(
+        self,
+        score_input_data: ScoreInputData,
+        temperature_tolerance: Optional[Scalar] = None,
+        skip_default_annuli: bool = False,
+    ):
+        super().__init__(score_input_data, temperature_tolerance, skip_default_annuli)
         self.operation_type = OperationType.PRODUCTION
         self.lift_method_data = self.score_data.reader.read_operation_method_data()
         self.produced_fluid_data = self.score_data.reader.read_operation_fluid_data()
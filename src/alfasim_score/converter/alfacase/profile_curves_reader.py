@@ -0,0 +1,616 @@
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import h5py
+import json
+import numpy as np
+from alfasim_sdk.result_reader import Results
+from alfasim_sdk.result_reader.aggregator import open_result_files
+from alfasim_sdk.result_reader.aggregator_constants import META_GROUP_NAME
+from alfasim_sdk.result_reader.aggregator_constants import PROFILES_GROUP_NAME
+from alfasim_sdk.result_reader.aggregator_constants import TIME_SET_DSET_NAME
+from alfasim_sdk.result_reader.aggregator_constants import TRENDS_GROUP_NAME
+from barril.units import Array
+from dataclasses import dataclass
+from pathlib import Path
+
+from alfasim_score.common import INVALID_NPZ_FILE_ERRORS
+from alfasim_score.common import save_npz_file
+
+# a profile curve is identified by its property name and the time step index
+ProfileCurveKey = Tuple[str, int]
+# the file (in the ALFAsim data folder) used to cache the curves read from the results
+PROFILE_CURVES_CACHE_FILENAME = "score_curves_cache.npz"
+# the name of the dataset with the values of all trends in the result files
+TRENDS_DSET_NAME = "trends"
+# number of time steps read at once to compute the envelopes of not chunked datasets
+PROFILE_ENVELOPE_BLOCK_SIZE = 128
+
+
+@dataclass
+class ProfileEnvelope:
+    """
+    The maximum and minimum values reached by a profile at each cell over all time steps, and the
+    time each maximum was reached (NaN values are ignored).
+    """
+
+    maximum: np.ndarray
+    minimum: np.ndarray
+    time_of_maximum: np.ndarray
+
+    @classmethod
+    def create_empty(cls, number_of_cells: int) -> "ProfileEnvelope":
+        return cls(
+            np.full(number_of_cells, np.nan),
+            np.full(number_of_cells, np.nan),
+            np.full(number_of_cells, np.nan),
+        )
+
+    def update(self, values: np.ndarray, times: np.ndarray) -> None:
+        """
+        Update the envelope with the values of some time steps (one row per time step), keeping
+        the first time each maximum was reached.
+        """
+        block_maximum = np.fmax.reduce(values, axis=0)
+        block_minimum = np.fmin.reduce(values, axis=0)
+        # the first row with the maximum of each cell (rows of all NaN cells are ignored later)
+        block_time_of_maximum = times[np.argmax(values == block_maximum, axis=0)]
+        is_new_maximum = (block_maximum > self.maximum) | (
+            np.isnan(self.maximum) & ~np.isnan(block_maximum)
+        )
+        self.maximum[is_new_maximum] = block_maximum[is_new_maximum]
+        self.time_of_maximum[is_new_maximum] = block_time_of_maximum[is_new_maximum]
+        self.minimum = np.fmin(self.minimum, block_minimum)
+
+
+def get_result_file_time_step(
+    time_set_info: Dict, time_set_key: Tuple[int, ...], index: int
+) -> Tuple[int, int]:
+    """
+    Locate a profile time step in the result files (negative indexes count from the last time
+    step).
+
+    :return:
+        The key of the result file and the index of the time step in that file.
+    """
+    sizes = [time_set_info[result_key].size for result_key in time_set_key]
+    global_index = index + sum(sizes) if index < 0 else index
+    if global_index >= 0:
+        for result_key, size in zip(time_set_key, sizes):
+            if global_index < size:
+                return result_key, global_index
+            global_index -= size
+    raise IndexError(f"Can not locate the profile for time step index {index}.")
+
+
+def read_dataset_row(
+    dataset: h5py.Dataset, file_buffer: np.ndarray, row: Optional[int] = None
+) -> np.ndarray:
+    """
+    Read a row of a 2D dataset (or all values of a 1D dataset when the row is not given) through
+    the memory mapped result file, so only the pages with the requested values are loaded.
+    Datasets with filters (e.g. compression) or not allocated in the file are read by h5py.
+    """
+    selection = slice(None) if row is None else row
+    if dataset.id.get_create_plist().get_nfilters() > 0 or dataset.size == 0:
+        return dataset[selection]
+    if dataset.chunks is None:
+        offset = dataset.id.get_offset()
+        if offset is None:
+            return dataset[selection]
+        values = np.frombuffer(file_buffer, dataset.dtype, dataset.size, offset)
+        return np.array(values.reshape(dataset.shape)[selection])
+    if row is None:
+        return dataset[selection]
+
+    chunk_rows, chunk_columns = dataset.chunks
+    chunk_row_start = row - row % chunk_rows
+    number_of_columns = dataset.shape[1]
+    row_values = np.empty(number_of_columns, dataset.dtype)
+    for column_start in range(0, number_of_columns, chunk_columns):
+        chunk_info = dataset.id.get_chunk_info_by_coord((chunk_row_start, column_start))
+        if chunk_info.byte_offset is None:
+            return dataset[selection]
+        chunk_values = np.frombuffer(
+            file_buffer, dataset.dtype, chunk_rows * chunk_columns, chunk_info.byte_offset
+        ).reshape(dataset.chunks)
+        column_end = min(column_start + chunk_columns, number_of_columns)
+        row_values[column_start:column_end] = chunk_values[
+            row - chunk_row_start, : column_end - column_start
+        ]
+    return row_values
+
+
+def get_results_files_key(results_folder: Path) -> np.ndarray:
+    """Identify the modification state of the result files by their names, sizes and times."""
+    if not results_folder.is_dir():
+        return np.array([], dtype=str)
+    return np.array(
+        [
+            f"{filepath.name}:{filepath.stat().st_size}:{filepath.stat().st_mtime_ns}"
+            for filepath in sorted(results_folder.iterdir())
+        ]
+    )
+
+
+def _format_cache_key(kind: str, *key: Any) -> str:
+    """Create the name of an array in the cache file (e.g. `image|pressure|-1`)."""
+    return "|".join([kind, *(str(item) for item in key)])
+
+
+def _format_time_set_key(time_set_key: Tuple[int, ...]) -> str:
+    return ",".join(str(result_key) for result_key in time_set_key)
+
+
+def _parse_time_set_key(text: str) -> Tuple[int, ...]:
+    return tuple(int(result_key) for result_key in text.split(",") if result_key)
+
+
+class ProfileCurvesReader:
+    """
+    Read the profile curves of a network element from ALFAsim results.
+    Each (property, time step) pair is read only once: the curves needed can be read up front with
+    `read_profiles`/`read_domains`, which open the result files once for all of them, and the
+    values are kept to be converted to any unit when requested.
+    Only the requested time steps are read, through memory mapped result files, so the time and
+    memory used don't depend on the number of time steps stored in the results.
+    """
+
+    def __init__(
+        self, results: Results, element_name: str, cache_filepath: Optional[Path] = None
+    ) -> None:
+        """
+        :param cache_filepath:
+            When given, the curves saved in this file by `save_cache` are used instead of reading
+            the results again, while the result files aren't modified.
+        """
+        self.results = results
+        self.element_name = element_name
+        self.cache_filepath = cache_filepath
+        # if curves not in the cache file were read from the results
+        self._is_cache_outdated = False
+        self._profile_keys: Optional[Dict[str, str]] = None
+        self._images: Dict[ProfileCurveKey, np.ndarray] = {}
+        self._domains: Dict[ProfileCurveKey, np.ndarray] = {}
+        # the values of all time steps at a cell, identified by the property and the cell index
+        self._histories: Dict[Tuple[str, int], np.ndarray] = {}
+        self._time_sets: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._envelopes: Dict[str, ProfileEnvelope] = {}
+        self._trend_keys: Optional[Dict[str, str]] = None
+        self._trends: Dict[str, np.ndarray] = {}
+        self._trend_time_sets: Dict[Tuple[int, ...], np.ndarray] = {}
+        # the metadata needed to get the values already read, by property name
+        self._profiles_info: Dict[str, Dict[str, Any]] = {}
+        self._trends_info: Dict[str, Dict[str, Any]] = {}
+        if cache_filepath is not None:
+            self._load_cache(cache_filepath)
+
+    def _get_profile_key(self, property_name: str) -> str:
+        """Get the key of the profile of a property in the results metadata."""
+        if self._profile_keys is None:
+            self._profile_keys = {
+                profile_metadata["property_id"]: profile_key
+                for profile_key, profile_metadata in self.results.metadata.profiles.items()
+                if profile_metadata["network_element_name"] == self.element_name
+            }
+        if property_name not in self._profile_keys:
+            raise RuntimeError(
+                f"Can not locate '{property_name}' profile for element '{self.element_name}'."
+            )
+        return self._profile_keys[property_name]
+
+    def _get_profile_info(self, property_name: str) -> Dict[str, Any]:
+        """Get the units and the time set key of a profile, the metadata used to get its values."""
+        if property_name not in self._profiles_info:
+            profile_metadata = self.results.metadata.profiles[self._get_profile_key(property_name)]
+            self._profiles_info[property_name] = {
+                "unit": profile_metadata["unit"],
+                "category": profile_metadata["category"],
+                "domain_unit": profile_metadata["domain_unit"],
+                "time_set_key": tuple(profile_metadata["time_set_key"]),
+            }
+        return self._profiles_info[property_name]
+
+    def _read_arrays(
+        self,
+        curve_keys: Iterable[ProfileCurveKey],
+        is_domain: bool,
+        arrays: Dict[ProfileCurveKey, np.ndarray],
+    ) -> None:
+        """Read the arrays missing in the cache, opening the result files once for all."""
+        missing_keys: List[ProfileCurveKey] = []
+        for curve_key in curve_keys:
+            if curve_key not in arrays and curve_key not in missing_keys:
+                missing_keys.append(curve_key)
+        if not missing_keys:
+            return
+        self._is_cache_outdated = True
+        metadata = self.results.metadata
+        time_set_info = metadata.time_set_info[PROFILES_GROUP_NAME]  # type:ignore[index]
+        group_name = META_GROUP_NAME if is_domain else PROFILES_GROUP_NAME
+        with open_result_files(self.results.results_folder) as result_files:
+            file_buffers: Dict[int, np.ndarray] = {}
+            for property_name, index in missing_keys:
+                profile_metadata = metadata.profiles[self._get_profile_key(property_name)]
+                result_key, file_index = get_result_file_time_step(
+                    time_set_info, profile_metadata["time_set_key"], index
+                )
+                data_ids = (
+                    profile_metadata["domain_id"] if is_domain else profile_metadata["data_id"]
+                )
+                data_id = data_ids.get(result_key)
+                if data_id is None:
+                    raise RuntimeError(
+                        f"The '{property_name}' profile for element '{self.element_name}' has "
+                        f"no data at index {index}."
+                    )
+                result_file = result_files[result_key]
+                if result_key not in file_buffers:
+                    file_buffers[result_key] = np.memmap(result_file.filename, np.uint8, "r")
+                arrays[(property_name, index)] = read_dataset_row(
+                    result_file[group_name][data_id],
+                    file_buffers[result_key],
+                    None if is_domain else file_index,
+                )
+
+    def read_profiles(self, curve_keys: Iterable[ProfileCurveKey]) -> None:
+        """Read the values of several profile curves at once."""
+        self._read_arrays(curve_keys, False, self._images)
+
+    def read_domains(self, curve_keys: Iterable[ProfileCurveKey]) -> None:
+        """Read the domain of several profile curves at once."""
+        self._read_arrays(curve_keys, True, self._domains)
+
+    def get_profile(self, property_name: str, index: int, unit: str) -> np.ndarray:
+        """Get the values of a profile curve in the given unit (it's read when not read yet)."""
+        self.read_profiles([(property_name, index)])
+        profile_info = self._get_profile_info(property_name)
+        return Array(
+            self._images[(property_name, index)], profile_info["unit"], profile_info["category"]
+        ).GetValues(unit)
+
+    def get_domain(self, property_name: str, index: int, unit: str) -> np.ndarray:
+        """Get the domain of a profile curve in the given unit (it's read when not read yet)."""
+        self.read_domains([(property_name, index)])
+        profile_info = self._get_profile_info(property_name)
+        return Array(
+            self._domains[(property_name, index)], profile_info["domain_unit"], "length"
+        ).GetValues(unit)
+
+    def read_histories(self, property_names: Iterable[str], cell_index: int = 0) -> None:
+        """
+        Read the values of all time steps at a cell for several profiles at once, reading only
+        that column of the profile datasets.
+        """
+        missing_names = [
+            name
+            for name in dict.fromkeys(property_names)
+            if (name, cell_index) not in self._histories
+        ]
+        if not missing_names:
+            return
+        self._is_cache_outdated = True
+        metadata = self.results.metadata
+        time_set_info = metadata.time_set_info[PROFILES_GROUP_NAME]  # type:ignore[index]
+        with open_result_files(self.results.results_folder) as result_files:
+            for property_name in missing_names:
+                profile_metadata = metadata.profiles[self._get_profile_key(property_name)]
+                time_set_key = profile_metadata["time_set_key"]
+                values = []
+                for result_key in time_set_key:
+                    data_id = profile_metadata["data_id"].get(result_key)
+                    if data_id is None:
+                        # no output for this property in this file (restart with other outputs)
+                        values.append(np.full(time_set_info[result_key].size, np.nan))
+                    else:
+                        dataset = result_files[result_key][PROFILES_GROUP_NAME][data_id]
+                        values.append(dataset[:, cell_index])
+                self._histories[(property_name, cell_index)] = np.concatenate(values)
+                self._read_time_set(result_files, time_set_key)
+
+    def _read_time_set(self, result_files: Dict, time_set_key: Tuple[int, ...]) -> np.ndarray:
+        """Read the times of the profile time steps stored in the result files, once for all."""
+        if time_set_key not in self._time_sets:
+            self._time_sets[time_set_key] = np.concatenate(
+                [
+                    result_files[result_key][PROFILES_GROUP_NAME][TIME_SET_DSET_NAME][:]
+                    for result_key in time_set_key
+                ]
+            )
+        return self._time_sets[time_set_key]
+
+    def get_history(self, property_name: str, unit: str, cell_index: int = 0) -> np.ndarray:
+        """
+        Get the values of all time steps of a profile at a cell in the given unit (they're read
+        when not read yet).
+        """
+        self.read_histories([property_name], cell_index)
+        profile_info = self._get_profile_info(property_name)
+        return Array(
+            self._histories[(property_name, cell_index)],
+            profile_info["unit"],
+            profile_info["category"],
+        ).GetValues(unit)
+
+    def get_time_set(self, property_name: str, unit: str) -> np.ndarray:
+        """Get the times of all time steps of a profile in the given unit."""
+        time_set_key = self._get_profile_info(property_name)["time_set_key"]
+        if time_set_key not in self._time_sets:
+            self._is_cache_outdated = True
+            with open_result_files(self.results.results_folder) as result_files:
+                self._read_time_set(result_files, time_set_key)
+        return Array(self._time_sets[time_set_key], "s", "time").GetValues(unit)
+
+    def read_envelopes(
+        self, property_names: Iterable[str], block_size: Optional[int] = None
+    ) -> None:
+        """
+        Compute the envelope of several profiles at once, streaming the time steps by blocks of
+        rows (by default the rows of a dataset chunk), so the memory used doesn't depend on the
+        number of time steps stored in the results.
+        """
+        missing_names = [
+            name for name in dict.fromkeys(property_names) if name not in self._envelopes
+        ]
+        if not missing_names:
+            return
+        self._is_cache_outdated = True
+        metadata = self.results.metadata
+        time_set_info = metadata.time_set_info[PROFILES_GROUP_NAME]  # type:ignore[index]
+        with open_result_files(self.results.results_folder) as result_files:
+            for property_name in missing_names:
+                profile_metadata = metadata.profiles[self._get_profile_key(property_name)]
+                time_set_key = profile_metadata["time_set_key"]
+                times = self._read_time_set(result_files, time_set_key)
+                envelope: Optional[ProfileEnvelope] = None
+                time_step_start = 0
+                for result_key in time_set_key:
+                    data_id = profile_metadata["data_id"].get(result_key)
+                    file_times = times[
+                        time_step_start : time_step_start + time_set_info[result_key].size
+                    ]
+                    time_step_start += len(file_times)
+                    if data_id is None:
+                        # no output for this property in this file (restart with other outputs)
+                        continue
+                    dataset = result_files[result_key][PROFILES_GROUP_NAME][data_id]
+                    if envelope is None:
+                        envelope = ProfileEnvelope.create_empty(dataset.shape[1])
+                    rows = block_size or (
+                        dataset.chunks[0] if dataset.chunks else PROFILE_ENVELOPE_BLOCK_SIZE
+                    )
+                    for row_start in range(0, dataset.shape[0], rows):
+                        envelope.update(
+                            dataset[row_start : row_start + rows],
+                            file_times[row_start : row_start + rows],
+                        )
+                if envelope is None:
+                    raise RuntimeError(
+                        f"The '{property_name}' profile for element '{self.element_name}' has "
+                        "no data."
+                    )
+                self._envelopes[property_name] = envelope
+
+    def get_envelope(self, property_name: str, unit: str, time_unit: str) -> ProfileEnvelope:
+        """
+        Get the envelope of a profile with the values and times in the given units (it's
+        computed when not computed yet).
+        """
+        self.read_envelopes([property_name])
+        profile_info = self._get_profile_info(property_name)
+        envelope = self._envelopes[property_name]
+        return ProfileEnvelope(
+            Array(envelope.maximum, profile_info["unit"], profile_info["category"]).GetValues(unit),
+            Array(envelope.minimum, profile_info["unit"], profile_info["category"]).GetValues(unit),
+            Array(envelope.time_of_maximum, "s", "time").GetValues(time_unit),
+        )
+
+    def _get_trend_keys(self) -> Dict[str, str]:
+        """
+        Get the keys of the positional trends in the results metadata by property name (the one
+        closest to the element start when there are trends at several positions).
+        """
+        if self._trend_keys is None:
+            trend_positions: Dict[str, Tuple[float, str]] = {}
+            for trend_key, trend_metadata in self.results.metadata.trends.items():
+                position = trend_metadata.get("position")
+                if trend_metadata["network_element_name"] != self.element_name or position is None:
+                    continue
+                trend_property_name = trend_metadata["property_id"]
+                if (
+                    trend_property_name not in trend_positions
+                    or position < trend_positions[trend_property_name][0]
+                ):
+                    trend_positions[trend_property_name] = (position, trend_key)
+            self._trend_keys = {
+                trend_property_name: trend_key
+                for trend_property_name, (_, trend_key) in trend_positions.items()
+            }
+        return self._trend_keys
+
+    def _get_trend_key(self, property_name: str) -> Optional[str]:
+        """Get the key of the positional trend of a property in the results metadata."""
+        return self._get_trend_keys().get(property_name)
+
+    def has_trend(self, property_name: str) -> bool:
+        """Check if the results have a positional trend of the property for the element."""
+        return self._get_trend_key(property_name) is not None
+
+    def _get_trend_metadata(self, property_name: str) -> Dict:
+        """Get the metadata of the positional trend of a property."""
+        trend_key = self._get_trend_key(property_name)
+        if trend_key is None:
+            raise RuntimeError(
+                f"Can not locate '{property_name}' trend for element '{self.element_name}'."
+            )
+        return dict(self.results.metadata.trends[trend_key])
+
+    def _get_trend_info(self, property_name: str) -> Dict[str, Any]:
+        """Get the units and the time set key of a trend, the metadata used to get its values."""
+        if property_name not in self._trends_info:
+            trend_metadata = self._get_trend_metadata(property_name)
+            self._trends_info[property_name] = {
+                "unit": trend_metadata["unit"],
+                "category": trend_metadata["category"],
+                "time_set_key": tuple(trend_metadata["time_set_key"]),
+            }
+        return self._trends_info[property_name]
+
+    def read_trends(self, property_names: Iterable[str]) -> None:
+        """
+        Read the values of several positional trends at once, reading the columns of all trends
+        from each result file at once.
+        """
+        missing_names = [name for name in dict.fromkeys(property_names) if name not in self._trends]
+        if not missing_names:
+            return
+        self._is_cache_outdated = True
+        metadata = self.results.metadata
+        time_set_info = metadata.time_set_info[TRENDS_GROUP_NAME]  # type:ignore[index]
+        trends_metadata = {
+            property_name: self._get_trend_metadata(property_name)
+            for property_name in missing_names
+        }
+        with open_result_files(self.results.results_folder) as result_files:
+            # the trend values in each file (NaN when the trend isn't in the file)
+            file_values: Dict[str, Dict[int, np.ndarray]] = {name: {} for name in missing_names}
+            for result_key, result_file in result_files.items():
+                size = time_set_info[result_key].size
+                columns = sorted(
+                    {
+                        trend_metadata["index"][result_key]
+                        for trend_metadata in trends_metadata.values()
+                        if result_key in trend_metadata["index"]
+                    }
+                )
+                if columns:
+                    values = result_file[TRENDS_GROUP_NAME][TRENDS_DSET_NAME][:size, columns]
+                for property_name, trend_metadata in trends_metadata.items():
+                    column = trend_metadata["index"].get(result_key)
+                    file_values[property_name][result_key] = (
+                        np.full(size, np.nan)
+                        if column is None
+                        else values[:, columns.index(column)]
+                    )
+            for property_name, trend_metadata in trends_metadata.items():
+                time_set_key = trend_metadata["time_set_key"]
+                self._trends[property_name] = np.concatenate(
+                    [file_values[property_name][result_key] for result_key in time_set_key]
+                )
+                if time_set_key not in self._trend_time_sets:
+                    self._trend_time_sets[time_set_key] = np.concatenate(
+                        [
+                            result_files[result_key][TRENDS_GROUP_NAME][TIME_SET_DSET_NAME][
+                                : time_set_info[result_key].size
+                            ]
+                            for result_key in time_set_key
+                        ]
+                    )
+
+    def get_trend(self, property_name: str, unit: str) -> np.ndarray:
+        """Get the values of a positional trend in the given unit (it's read when not read yet)."""
+        self.read_trends([property_name])
+        trend_info = self._get_trend_info(property_name)
+        return Array(
+            self._trends[property_name], trend_info["unit"], trend_info["category"]
+        ).GetValues(unit)
+
+    def get_trend_time_set(self, property_name: str, unit: str) -> np.ndarray:
+        """Get the times of a positional trend in the given unit (it's read when not read yet)."""
+        self.read_trends([property_name])
+        time_set = self._trend_time_sets[self._get_trend_info(property_name)["time_set_key"]]
+        return Array(time_set, "s", "time").GetValues(unit)
+
+    def _load_cache(self, cache_filepath: Path) -> None:
+        """Load the curves from the cache file if it matches the current result files."""
+        if not cache_filepath.exists():
+            return
+        try:
+            # all arrays are read before any curve is kept, so an invalid cache keeps none of them
+            with np.load(cache_filepath, allow_pickle=False) as cache:
+                arrays = {name: cache[name] for name in cache.files}
+            files_key = get_results_files_key(self.results.results_folder)
+            if not np.array_equal(arrays.pop("files_key"), files_key):
+                return
+            metadata = json.loads(str(arrays.pop("metadata")))
+            if metadata["element_name"] != self.element_name:
+                return
+            for info in [*metadata["profiles"].values(), *metadata["trends"].values()]:
+                info["time_set_key"] = tuple(info["time_set_key"])
+            profiles_info = metadata["profiles"]
+            trends_info = metadata["trends"]
+            trend_keys = metadata["trend_keys"]
+        except INVALID_NPZ_FILE_ERRORS:
+            # an invalid cache file is ignored, the curves are read from the result files
+            return
+        self._profiles_info = profiles_info
+        self._trends_info = trends_info
+        self._trend_keys = trend_keys
+        for name, values in arrays.items():
+            kind, *key = name.split("|")
+            if kind == "image":
+                self._images[(key[0], int(key[1]))] = values
+            elif kind == "domain":
+                self._domains[(key[0], int(key[1]))] = values
+            elif kind == "history":
+                self._histories[(key[0], int(key[1]))] = values
+            elif kind == "time_set":
+                self._time_sets[_parse_time_set_key(key[0])] = values
+            elif kind == "trend":
+                self._trends[key[0]] = values
+            elif kind == "trend_time_set":
+                self._trend_time_sets[_parse_time_set_key(key[0])] = values
+            elif kind == "envelope":
+                self._envelopes[key[0]] = ProfileEnvelope(*values)
+
+    def save_cache(self) -> None:
+        """
+        Save all curves read to the cache file, when curves not in it were read (it's skipped for
+        read-only folders).
+        """
+        if self.cache_filepath is None or not self._is_cache_outdated:
+            return
+        # the metadata needed to get the values of all curves read
+        for property_name, _ in [*self._images, *self._domains, *self._histories]:
+            self._get_profile_info(property_name)
+        for property_name in self._envelopes:
+            self._get_profile_info(property_name)
+        for property_name in self._trends:
+            self._get_trend_info(property_name)
+        metadata = {
+            "element_name": self.element_name,
+            "profiles": self._profiles_info,
+            "trends": self._trends_info,
+            "trend_keys": self._get_trend_keys(),
+        }
+        arrays: Dict[str, Any] = {
+            "files_key": get_results_files_key(self.results.results_folder),
+            "metadata": np.array(json.dumps(metadata)),
+        }
+        for kind, curves in [
+            ("image", self._images),
+            ("domain", self._domains),
+            ("history", self._histories),
+        ]:
+            for (property_name, index), values in curves.items():
+                arrays[_format_cache_key(kind, property_name, index)] = values
+        for time_set_key, values in self._time_sets.items():
+            arrays[_format_cache_key("time_set", _format_time_set_key(time_set_key))] = values
+        for property_name, values in self._trends.items():
+            arrays[_format_cache_key("trend", property_name)] = values
+        for time_set_key, values in self._trend_time_sets.items():
+            key = _format_cache_key("trend_time_set", _format_time_set_key(time_set_key))
+            arrays[key] = values
+        for property_name, envelope in self._envelopes.items():
+            arrays[_format_cache_key("envelope", property_name)] = np.array(
+                [envelope.maximum, envelope.minimum, envelope.time_of_maximum]
+            )
+        try:
+            save_npz_file(self.cache_filepath, arrays)
+        except OSError:
+            return
+        self._is_cache_outdated = False
@@ -60,6 +60,15 @@ class ScoreInputData:
                     all_fluids.add(fluid["name"])
         return sorted(all_fluids)
 
+    def get_all_pvt_table_names(self) -> List[str]:
+        """
+        Get the names of all pvt tables referenced by the case: the annular fluids (used by the
+        APB plugin) and the operation fluid (used by the well).
+        """
+        all_fluids = set(self.get_all_annular_fluid_names())
+        all_fluids.add(self.operation_data["fluid"])
+        return sorted(all_fluids)
+
     def get_fluid_id(self, fluid_name: str) -> int:
         """
         Get the fluid id.
@@ -461,7 +461,7 @@ class ScoreInputReader:
         Get the results from the input file.
         This parsed output curves are used to check cases results.
         """
-        if "result" in self.input_content["operation"]["thermal_simulation"]:
+        if "result" in self.input_content["operation"].get("thermal_simulation", {}):
             result = self.input_content["operation"]["thermal_simulation"]["result"]["0"]
             # this list is not complete, there are other results recorded in the input file.
             return {
@@ -0,0 +1,202 @@
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import argparse
+import time
+from barril.units import Array
+from barril.units import Scalar
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from alfasim_score.converter.alfacase.alfasim_score_converter import AlfasimScoreConverter
+
+
+@dataclass
+class ScoreOutputCaseReport:
+    """The result of the output conversion of a case in a batch."""
+
+    alfasim_results_folder: Path
+    score_output_file: Path
+    # the time spent converting the case, in seconds
+    elapsed_time: float
+    # the description of the error when the conversion failed
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def get_output_tables_folder(score_output_file: Path) -> Path:
+    """The folder of the columnar tables of a case in a batch, next to its SCORE output file."""
+    return score_output_file.with_name(f"{score_output_file.stem}_tables")
+
+
+def generate_score_output_file(
+    score_input_file: Path,
+    alfasim_results_folder: Path,
+    score_output_file: Path,
+    indent: Optional[int] = 2,
+    significant_digits: Optional[int] = None,
+    history_interval: Optional[Scalar] = None,
+    include_envelopes: bool = False,
+    use_cache: bool = False,
+    output_measured_depths: Optional[Array] = None,
+    output_tables_folder: Optional[Path] = None,
+) -> ScoreOutputCaseReport:
+    """
+    Create the output file for SCORE of a case, reporting the error instead of raising it so a
+    failing case doesn't stop the others in a batch. This is the task executed by the worker
+    processes, and the options are the ones of `AlfasimScoreConverter.generate_score_output_file`.
+    """
+    start_time = time.perf_counter()
+    error = None
+    try:
+        # the alfacase builder isn't created when only the output is converted
+        converter = AlfasimScoreConverter(score_input_file, score_output_file)
+        converter.generate_score_output_file(
+            alfasim_results_folder,
+            indent,
+            significant_digits,
+            history_interval,
+            include_envelopes,
+            use_cache,
+            output_measured_depths,
+            output_tables_folder,
+        )
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    return ScoreOutputCaseReport(
+        alfasim_results_folder, score_output_file, time.perf_counter() - start_time, error
+    )
+
+
+def generate_score_output_files(
+    cases: Mapping[Path, Tuple[Path, Path]],
+    max_workers: Optional[int] = None,
+    indent: Optional[int] = 2,
+    significant_digits: Optional[int] = None,
+    history_interval: Optional[Scalar] = None,
+    include_envelopes: bool = False,
+    use_cache: bool = False,
+    output_measured_depths: Optional[Array] = None,
+    include_output_tables: bool = False,
+) -> List[ScoreOutputCaseReport]:
+    """
+    Create the output files for SCORE of several cases concurrently with a process pool, with the
+    options of `AlfasimScoreConverter.generate_score_output_file` applied to all cases.
+
+    :param cases:
+        Maps the ALFAsim results folder of each case to its SCORE input file and the output file
+        to be created.
+    :param include_output_tables:
+        When true, the columnar tables of each case are also written, to the folder given by
+        `get_output_tables_folder`.
+    :return:
+        The report of each case, in the same order of the cases.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                generate_score_output_file,
+                score_input_file,
+                alfasim_results_folder,
+                score_output_file,
+                indent,
+                significant_digits,
+                history_interval,
+                include_envelopes,
+                use_cache,
+                output_measured_depths,
+                get_output_tables_folder(score_output_file) if include_output_tables else None,
+            )
+            for alfasim_results_folder, (score_input_file, score_output_file) in cases.items()
+        ]
+        reports = []
+        for future, (alfasim_results_folder, (_, score_output_file)) in zip(futures, cases.items()):
+            try:
+                reports.append(future.result())
+            except Exception as exception:
+                # the worker process was terminated abruptly
+                error = f"{type(exception).__name__}: {exception}"
+                reports.append(
+                    ScoreOutputCaseReport(alfasim_results_folder, score_output_file, 0.0, error)
+                )
+    return reports
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Create the output files for SCORE of several cases from the command line, printing the report
+    of each case. The exit code is 1 when any case failed.
+    """
+    parser = argparse.ArgumentParser(
+        description="Create the output files for SCORE of several ALFAsim cases in parallel."
+    )
+    parser.add_argument(
+        "--case",
+        nargs=3,
+        action="append",
+        required=True,
+        type=Path,
+        metavar=("ALFASIM_RESULTS_FOLDER", "SCORE_INPUT_FILE", "SCORE_OUTPUT_FILE"),
+        help="a case to convert (can be repeated)",
+    )
+    parser.add_argument("--max-workers", type=int, help="the number of worker processes")
+    parser.add_argument("--indent", type=int, default=2, help="the indentation of the json files")
+    parser.add_argument("--compact", action="store_true", help="write compact json files")
+    parser.add_argument(
+        "--significant-digits", type=int, help="the maximum number of significant digits"
+    )
+    parser.add_argument(
+        "--history-interval",
+        type=float,
+        help="the interval (in days) to sample the history of the annuli",
+    )
+    parser.add_argument(
+        "--include-envelopes", action="store_true", help="write the envelopes of annuli and walls"
+    )
+    parser.add_argument(
+        "--use-cache", action="store_true", help="keep the curves read in a cache file"
+    )
+    parser.add_argument(
+        "--output-measured-depths",
+        nargs="+",
+        type=float,
+        metavar="MD",
+        help="the MDs (in meters) to interpolate the profiles at",
+    )
+    parser.add_argument(
+        "--output-tables",
+        action="store_true",
+        help="also write the columnar tables of each case, next to its output file",
+    )
+    args = parser.parse_args(argv)
+
+    cases = {
+        alfasim_results_folder: (score_input_file, score_output_file)
+        for alfasim_results_folder, score_input_file, score_output_file in args.case
+    }
+    reports = generate_score_output_files(
+        cases,
+        args.max_workers,
+        None if args.compact else args.indent,
+        args.significant_digits,
+        None if args.history_interval is None else Scalar(args.history_interval, "d"),
+        args.include_envelopes,
+        args.use_cache,
+        (None if args.output_measured_depths is None else Array(args.output_measured_depths, "m")),
+        args.output_tables,
+    )
+    for report in reports:
+        status = "ok" if report.succeeded else f"failed ({report.error})"
+        print(f"{report.alfasim_results_folder}: {status} in {report.elapsed_time:.1f} s")
+    return 0 if all(report.succeeded for report in reports) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,26 +1,65 @@
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 
 import numpy as np
 from alfasim_sdk.result_reader import Results
+from barril.units import Array
 from barril.units import Scalar
+from dataclasses import dataclass
+from dataclasses import replace
 from pathlib import Path
 
 from alfasim_score.common import WellItemFunction
 from alfasim_score.constants import ABSOLUTE_ZERO_TEMPERATURE
 from alfasim_score.constants import TOTAL_WALLS
 from alfasim_score.constants import WELLBORE_NAME
+from alfasim_score.converter.alfacase.profile_curves_reader import PROFILE_CURVES_CACHE_FILENAME
+from alfasim_score.converter.alfacase.profile_curves_reader import ProfileCurveKey
+from alfasim_score.converter.alfacase.profile_curves_reader import ProfileCurvesReader
 from alfasim_score.converter.alfacase.score_input_data import ScoreInputData
 from alfasim_score.units import DENSITY_UNIT_SCORE
 from alfasim_score.units import LENGTH_UNIT
-from alfasim_score.units import MASS_UNIT_SCORE
 from alfasim_score.units import PRESSURE_UNIT
 from alfasim_score.units import TEMPERATURE_UNIT
 from alfasim_score.units import TIME_UNIT
 from alfasim_score.units import VOLUME_UNIT_SCORE
 from alfasim_score.units import VOLUME_UNIT_SCORE_GALUS
 
+# the tolerance (in seconds) to consider the final time of the operation reached
+FINAL_TIME_TOLERANCE = 1e-3
+# the annulus scalar quantities exported in the history, with the output unit
+ANNULUS_HISTORY_QUANTITIES = {
+    "APB": ("apb", PRESSURE_UNIT),
+    "TLV": ("tlv", VOLUME_UNIT_SCORE),
+    "ATV": ("atv", VOLUME_UNIT_SCORE),
+    "VTE": ("vte", VOLUME_UNIT_SCORE),
+}
+
+
+@dataclass
+class AnnuliResults:
+    """
+    The results of the active annuli in columnar arrays: the profiles are stacked with a row for
+    each annulus and a column for each MD, and the final value of the scalar quantities (in the
+    output units) has an entry for each annulus.
+    """
+
+    temperature_start: np.ndarray
+    temperature_final: np.ndarray
+    pressure_start: np.ndarray
+    pressure_final: np.ndarray
+    density_start: np.ndarray
+    density_final: np.ndarray
+    # the number of leading MDs inside each annulus (the next ones are filled by ALFAsim)
+    valid_lengths: np.ndarray
+    apb: np.ndarray
+    total_volume: np.ndarray
+    expansion_volume: np.ndarray
+    leakage_volume: np.ndarray
+    leakage_volume_galus: np.ndarray
+
 
 class ScoreOutputBuilder:
     def __init__(
@@ -32,8 +71,10 @@ class ScoreOutputBuilder:
         self.score_output_filepath = score_output_filepath
         self.element_name = WELLBORE_NAME
 
-    def _get_annulus_valid_length(self, temperature: np.ndarray, pressure: np.ndarray) -> int:
-        """Return the number of leading MDs that fall inside the annulus.
+    def _get_annuli_valid_lengths(
+        self, temperature: np.ndarray, pressure: np.ndarray
+    ) -> np.ndarray:
+        """Return the number of leading MDs that fall inside each annulus (the rows of profiles).
 
         MDs beyond the annulus end carry ALFAsim fill values (NaN, or dummies such as
         -273.15 degC / 0 psi). Those trailing rows must be dropped from the output.
@@ -44,26 +85,158 @@ class ScoreOutputBuilder:
             & (temperature > ABSOLUTE_ZERO_TEMPERATURE)  # rules out the -273.15 degC dummy
             & (pressure > 0.0)  # rules out the 0 / -0 dummy
         )
-        invalid = np.nonzero(~valid)[0]
-        return int(invalid[0]) if invalid.size else int(valid.size)
+        # the first invalid MD of each annulus, or the number of MDs when all of them are valid
+        return np.where(np.all(valid, axis=1), valid.shape[1], np.argmin(valid, axis=1))
 
-    def _generate_annuli_output(self, results: Results, measured_depths: List) -> Dict[str, Any]:
-        """Create data for the output results of annuli."""
-        active_annuli = self.score_data.get_annuli_list()
-        annuli_temperature_profiles = [
-            f"annulus_{annuli_label.value}_temperature" for annuli_label in active_annuli
-        ]
-        annuli_pressure_profiles = [
-            f"annulus_{annuli_label.value}_pressure" for annuli_label in active_annuli
+    def _create_curves_reader(
+        self, alfasim_results_filepath: Path, use_cache: bool = False
+    ) -> ProfileCurvesReader:
+        """Create the reader of the results curves, using the cache file when requested."""
+        cache_filepath = (
+            alfasim_results_filepath / PROFILE_CURVES_CACHE_FILENAME if use_cache else None
+        )
+        return ProfileCurvesReader(
+            Results(alfasim_results_filepath), self.element_name, cache_filepath
+        )
+
+    def _get_annuli_scalar_properties(self) -> List[str]:
+        """List the annuli scalar quantities (APB and volumes) used by the output results."""
+        return [
+            f"annulus_{annuli_label.value}_{property_name}"
+            for annuli_label in self.score_data.get_annuli_list()
+            for property_name, _ in ANNULUS_HISTORY_QUANTITIES.values()
         ]
-        annulus_density_profiles = [
-            f"annulus_{annuli_label.value}_rho" for annuli_label in active_annuli
+
+    def _get_required_profiles(self, curves: ProfileCurvesReader) -> List[ProfileCurveKey]:
+        """
+        List the profile curves (property and time step index) used by the output results. The
+        annuli scalar quantities are only read from the profiles when the results (generated by
+        older versions of the converter) have no trends of them.
+        """
+        required_profiles = []
+        for annuli_label in self.score_data.get_annuli_list():
+            for property_name in ["temperature", "pressure", "rho"]:
+                for index in [0, -1]:
+                    required_profiles.append(
+                        (f"annulus_{annuli_label.value}_{property_name}", index)
+                    )
+        for property_name in self._get_annuli_scalar_properties():
+            if not curves.has_trend(property_name):
+                required_profiles.append((property_name, -1))
+        for property_name in ["mixture temperature", "pressure", "mixture_density"]:
+            required_profiles.append((property_name, -1))
+        for wall_label in range(TOTAL_WALLS):
+            required_profiles.append((f"wall_{wall_label}_temperature", -1))
+        return required_profiles
+
+    def _get_envelope_profiles(self) -> List[str]:
+        """List the profiles with envelopes in the output results."""
+        envelope_profiles = []
+        for annuli_label in self.score_data.get_annuli_list():
+            for property_name in ["temperature", "pressure"]:
+                envelope_profiles.append(f"annulus_{annuli_label.value}_{property_name}")
+        for wall_label in range(TOTAL_WALLS):
+            envelope_profiles.append(f"wall_{wall_label}_temperature")
+        return envelope_profiles
+
+    def _get_envelope_output(
+        self,
+        curves: ProfileCurvesReader,
+        property_name: str,
+        unit: str,
+        measured_depths: np.ndarray,
+        valid_length: Optional[int] = None,
+        output_measured_depths: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create the envelope of a profile over the operation (with the time in months), resampled
+        at the output MDs when given. The output MDs beyond the `valid_length` of the profile are
+        dropped, as in the profile itself. Without `valid_length` (profiles valid along the whole
+        domain, like the walls) all output MDs are kept and the values are clamped at the ends.
+        """
+        envelope = curves.get_envelope(property_name, unit, TIME_UNIT)
+        maximum = envelope.maximum
+        minimum = envelope.minimum
+        time_of_maximum = envelope.time_of_maximum
+        if output_measured_depths is not None:
+            profile_length = len(measured_depths) if valid_length is None else valid_length
+            valid_lengths = np.array([profile_length, profile_length])
+            maximum, minimum = self._resample_profiles(
+                np.stack([maximum, minimum]),
+                measured_depths,
+                output_measured_depths,
+                valid_lengths,
+            )
+            # the time of the maximum can't be interpolated, the one of the nearest MD is used
+            nearest_indexes = self._get_nearest_indexes(
+                measured_depths[:profile_length], output_measured_depths
+            )
+            time_of_maximum = time_of_maximum[nearest_indexes]
+            if valid_length is not None:
+                valid_length = int(
+                    self._get_resampled_lengths(
+                        measured_depths, valid_lengths[:1], output_measured_depths
+                    )[0]
+                )
+        return {
+            "max": maximum[:valid_length],
+            "min": minimum[:valid_length],
+            # month is not available in barril
+            "time_of_max": time_of_maximum[:valid_length] / 30 + 0.0,
+        }
+
+    def _get_annulus_final_value(
+        self, curves: ProfileCurvesReader, property_name: str, unit: str
+    ) -> float:
+        """Get the final value of an annulus scalar quantity, from its trend when available."""
+        if curves.has_trend(property_name):
+            return float(curves.get_trend(property_name, unit)[-1])
+        return float(curves.get_profile(property_name, -1, unit)[0])
+
+    def _read_annuli_results(self, curves: ProfileCurvesReader) -> AnnuliResults:
+        """Stack the results of the active annuli in columnar arrays."""
+        profile_prefixes = [
+            f"annulus_{annuli_label.value}_" for annuli_label in self.score_data.get_annuli_list()
         ]
-        annulus_apb_value = [f"annulus_{annuli_label.value}_apb" for annuli_label in active_annuli]
-        annulus_tlv_value = [f"annulus_{annuli_label.value}_tlv" for annuli_label in active_annuli]
-        annulus_vte_value = [f"annulus_{annuli_label.value}_vte" for annuli_label in active_annuli]
-        annulus_atv_value = [f"annulus_{annuli_label.value}_atv" for annuli_label in active_annuli]
-        final_time = self.score_data.operation_data["duration"]
+
+        def stack_profiles(property_name: str, index: int, unit: str) -> np.ndarray:
+            return np.stack(
+                [
+                    curves.get_profile(profile_prefix + property_name, index, unit)
+                    for profile_prefix in profile_prefixes
+                ]
+            )
+
+        def stack_final_values(property_name: str, unit: str) -> np.ndarray:
+            return np.array(
+                [
+                    self._get_annulus_final_value(curves, profile_prefix + property_name, unit)
+                    for profile_prefix in profile_prefixes
+                ]
+            )
+
+        temperature_final = stack_profiles("temperature", -1, TEMPERATURE_UNIT)
+        pressure_final = stack_profiles("pressure", -1, PRESSURE_UNIT)
+        return AnnuliResults(
+            temperature_start=stack_profiles("temperature", 0, TEMPERATURE_UNIT),
+            temperature_final=temperature_final,
+            pressure_start=stack_profiles("pressure", 0, PRESSURE_UNIT),
+            pressure_final=pressure_final,
+            density_start=stack_profiles("rho", 0, DENSITY_UNIT_SCORE),
+            density_final=stack_profiles("rho", -1, DENSITY_UNIT_SCORE),
+            valid_lengths=self._get_annuli_valid_lengths(temperature_final, pressure_final),
+            apb=stack_final_values("apb", PRESSURE_UNIT),
+            total_volume=stack_final_values("atv", VOLUME_UNIT_SCORE),
+            expansion_volume=stack_final_values("vte", VOLUME_UNIT_SCORE),
+            leakage_volume=stack_final_values("tlv", VOLUME_UNIT_SCORE),
+            leakage_volume_galus=stack_final_values("tlv", VOLUME_UNIT_SCORE_GALUS),
+        )
+
+    def _get_annuli_casings(self, number_of_annuli: int) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get the casing outside each annulus: the annulus B is inside the innermost casing and
+        the next annuli follow outwards. There is no casing for the annulus A.
+        """
         casings_data = {
             casing["function"]: casing for casing in self.score_data.reader.read_casings()
         }
@@ -75,181 +248,457 @@ class ScoreOutputBuilder:
         ]
         casings = [
             casings_data[casing_type]
-            for casing_type in all_casing_types
+            for casing_type in reversed(all_casing_types)
             if casing_type in casings_data
         ]
-        annuli_output: Dict[str, Any] = {}
-        annulus_index = 0
-        for temperature_profile_name, pressure_profile_name in zip(
-            annuli_temperature_profiles, annuli_pressure_profiles
-        ):
-            annuli_output[str(annulus_index)] = {}
-            temperature_start = results.get_profile_curve(
-                temperature_profile_name, self.element_name, 0
-            ).image.GetValues(TEMPERATURE_UNIT)
-            temperature_final = results.get_profile_curve(
-                temperature_profile_name, self.element_name, -1
-            ).image.GetValues(TEMPERATURE_UNIT)
-            pressure_start = results.get_profile_curve(
-                pressure_profile_name, self.element_name, 0
-            ).image.GetValues(PRESSURE_UNIT)
-            pressure_final = results.get_profile_curve(
-                pressure_profile_name, self.element_name, -1
-            ).image.GetValues(PRESSURE_UNIT)
-            density_start = results.get_profile_curve(
-                annulus_density_profiles[annulus_index], self.element_name, 0
-            ).image.GetValues(DENSITY_UNIT_SCORE)
-            density_final = results.get_profile_curve(
-                annulus_density_profiles[annulus_index], self.element_name, -1
-            ).image.GetValues(DENSITY_UNIT_SCORE)
-            # Drop MDs beyond the annulus end (filled by ALFAsim with NaN/dummy values).
-            valid_length = self._get_annulus_valid_length(temperature_final, pressure_final)
-            annulus_measured_depths = measured_depths[:valid_length]
-            annuli_output[str(annulus_index)]["MD"] = annulus_measured_depths
-            temperature = {
-                "start": temperature_start[:valid_length].tolist(),
-                "final": temperature_final[:valid_length].tolist(),
-            }
-            pressure = {
-                "start": pressure_start[:valid_length].tolist(),
-                "final": pressure_final[:valid_length].tolist(),
-            }
-            pressure["diff"] = [
-                final - start for final, start in zip(pressure["final"], pressure["start"])
+        if number_of_annuli - 1 > len(casings):
+            raise IndexError("There are more annuli than casings in the well")
+        return [None] + casings[: max(number_of_annuli - 1, 0)]
+
+    def _interpolate_profiles(
+        self,
+        positions: np.ndarray,
+        measured_depths: np.ndarray,
+        values: np.ndarray,
+        valid_lengths: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Interpolate each profile (the rows of `values`) at the positions given for it (a value or
+        a row of `positions`), using only the valid MDs of the profile. It gives the same results
+        of `np.interp` for each profile: the values are clamped to the ends of the valid MDs.
+        """
+        rows = np.arange(len(positions)).reshape((-1,) + (1,) * (np.ndim(positions) - 1))
+        last_indexes = (valid_lengths - 1).reshape(rows.shape)
+        max_index = values.shape[1] - 1
+        indexes = np.searchsorted(measured_depths, positions, side="right") - 1
+        indexes = np.clip(indexes, 0, np.maximum(last_indexes - 1, 0))
+        next_indexes = np.minimum(indexes + 1, max_index)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slopes = (values[rows, next_indexes] - values[rows, indexes]) / (
+                measured_depths[next_indexes] - measured_depths[indexes]
+            )
+            interpolated = slopes * (positions - measured_depths[indexes]) + values[rows, indexes]
+        # avoid non-finite interpolations at the MDs themselves
+        interpolated = np.where(
+            positions == measured_depths[indexes], values[rows, indexes], interpolated
+        )
+        interpolated = np.where(positions <= measured_depths[0], values[rows, 0], interpolated)
+        return np.where(
+            positions >= measured_depths[last_indexes], values[rows, last_indexes], interpolated
+        )
+
+    def _get_resampled_lengths(
+        self,
+        measured_depths: np.ndarray,
+        valid_lengths: np.ndarray,
+        output_measured_depths: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Get the number of leading output MDs inside the valid MDs of each profile, the output MDs
+        beyond the last valid MD are dropped (the output MDs must be increasing).
+        """
+        return np.searchsorted(
+            output_measured_depths, measured_depths[valid_lengths - 1], side="right"
+        )
+
+    def _get_nearest_indexes(
+        self, measured_depths: np.ndarray, positions: np.ndarray
+    ) -> np.ndarray:
+        """Get the index of the nearest MD of each position."""
+        if len(measured_depths) == 1:
+            return np.zeros(len(positions), dtype=int)
+        indexes = np.clip(np.searchsorted(measured_depths, positions), 1, len(measured_depths) - 1)
+        previous_is_nearest = (
+            positions - measured_depths[indexes - 1] <= measured_depths[indexes] - positions
+        )
+        return indexes - previous_is_nearest
+
+    def _resample_profiles(
+        self,
+        values: np.ndarray,
+        measured_depths: np.ndarray,
+        output_measured_depths: np.ndarray,
+        valid_lengths: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Interpolate the profiles (the rows of `values`) at the output MDs, using only the valid
+        MDs of each profile (all of them when `valid_lengths` isn't given). The values at the
+        output MDs beyond the valid MDs of a profile are the last valid value.
+        """
+        if valid_lengths is None:
+            valid_lengths = np.full(len(values), len(measured_depths))
+        positions = np.broadcast_to(
+            output_measured_depths, (len(values), len(output_measured_depths))
+        )
+        return self._interpolate_profiles(positions, measured_depths, values, valid_lengths)
+
+    def _resample_annuli_results(
+        self,
+        annuli_results: AnnuliResults,
+        measured_depths: np.ndarray,
+        output_measured_depths: np.ndarray,
+    ) -> AnnuliResults:
+        """Resample the profiles of all annuli at the output MDs at once."""
+
+        def resample(values: np.ndarray) -> np.ndarray:
+            return self._resample_profiles(
+                values, measured_depths, output_measured_depths, annuli_results.valid_lengths
+            )
+
+        return replace(
+            annuli_results,
+            temperature_start=resample(annuli_results.temperature_start),
+            temperature_final=resample(annuli_results.temperature_final),
+            pressure_start=resample(annuli_results.pressure_start),
+            pressure_final=resample(annuli_results.pressure_final),
+            density_start=resample(annuli_results.density_start),
+            density_final=resample(annuli_results.density_final),
+            valid_lengths=self._get_resampled_lengths(
+                measured_depths, annuli_results.valid_lengths, output_measured_depths
+            ),
+        )
+
+    def _get_annuli_leakage_mass(
+        self, annuli_results: AnnuliResults, measured_depths: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the mass leaked from each annulus: the leaked volume times the density at the
+        pressure relief or, when the annulus is open to seabed, at the well head.
+        """
+        casings = self._get_annuli_casings(len(annuli_results.valid_lengths))
+        # pressure relief and open to seabed are not available for Annulus A
+        has_relief = np.array(
+            [casing is not None and casing["pressure_relief"]["is_active"] for casing in casings]
+        )
+        is_open_to_seabed = np.array(
+            [
+                casing is not None and casing["function"] == WellItemFunction.SURFACE
+                for casing in casings
             ]
-            pressure["APB"] = (
-                results.get_profile_curve(annulus_apb_value[annulus_index], self.element_name, -1)
-                .image.GetValues(PRESSURE_UNIT)
-                .tolist()[0]
+        )
+        leakage_mass = np.zeros(len(casings))
+        if np.any(has_relief):
+            relief_positions = np.array(
+                [
+                    casing["pressure_relief"]["position"].GetValue(LENGTH_UNIT)
+                    for casing in casings
+                    if casing is not None and casing["pressure_relief"]["is_active"]
+                ]
             )
-            density = {
-                "start": density_start[:valid_length].tolist(),
-                "final": density_final[:valid_length].tolist(),
-            }
-            volume = {}
-            volume["start"] = (
-                results.get_profile_curve(annulus_atv_value[annulus_index], self.element_name, -1)
-                .image.GetValues(VOLUME_UNIT_SCORE)
-                .tolist()[0]
-                - results.get_profile_curve(annulus_vte_value[annulus_index], self.element_name, -1)
-                .image.GetValues(VOLUME_UNIT_SCORE)
-                .tolist()[0]
+            density_at_relief = self._interpolate_profiles(
+                relief_positions,
+                measured_depths,
+                annuli_results.density_final[has_relief],
+                annuli_results.valid_lengths[has_relief],
             )
-            volume["final"] = (
-                results.get_profile_curve(annulus_atv_value[annulus_index], self.element_name, -1)
-                .image.GetValues(VOLUME_UNIT_SCORE)
-                .tolist()[0]
+            leakage_mass[has_relief] = (
+                density_at_relief * annuli_results.leakage_volume_galus[has_relief]
             )
-            volume["diff"] = volume["final"] - volume["start"]
-            leakage = {}
-            leakage[str(final_time.GetValue(TIME_UNIT) / 30)] = (
-                results.get_profile_curve(annulus_tlv_value[annulus_index], self.element_name, -1)
-                .image.GetValues(VOLUME_UNIT_SCORE)
-                .tolist()[0]
+        density_at_well_head = annuli_results.density_final[is_open_to_seabed, 0]
+        leakage_mass[is_open_to_seabed] = (
+            density_at_well_head * annuli_results.leakage_volume_galus[is_open_to_seabed]
+        )
+        return leakage_mass
+
+    def _generate_annuli_output(
+        self,
+        curves: ProfileCurvesReader,
+        measured_depths: np.ndarray,
+        include_envelopes: bool = False,
+        output_measured_depths: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create data for the output results of annuli. The results of all annuli are processed
+        together in columnar arrays and split by annulus at the end.
+        """
+        active_annuli = self.score_data.get_annuli_list()
+        if not active_annuli:
+            return {}
+        annuli_results = self._read_annuli_results(curves)
+        volume_start = annuli_results.total_volume - annuli_results.expansion_volume
+        volume_diff = annuli_results.total_volume - volume_start
+        # the leakage mass is computed with the results at the ALFAsim MDs
+        leakage_mass = self._get_annuli_leakage_mass(annuli_results, measured_depths)
+        if output_measured_depths is not None:
+            resampled_results = self._resample_annuli_results(
+                annuli_results, measured_depths, output_measured_depths
             )
-            leakage_mass_value = None
-            # pressure relief and open to seabed are not available for Annulus A
-            if annulus_index >= 1:
-                casing = casings.pop()
-                leakage_value = (
-                    results.get_profile_curve(
-                        annulus_tlv_value[annulus_index], self.element_name, -1
-                    )
-                    .image.GetValues(VOLUME_UNIT_SCORE_GALUS)
-                    .tolist()[0]
-                )
-                # if there is pressure relief
-                if casing["pressure_relief"]["is_active"]:
-                    relief_position = casing["pressure_relief"]["position"]
-                    density_at_relief = np.interp(
-                        relief_position.GetValue(LENGTH_UNIT),
-                        annulus_measured_depths,
-                        density["final"],
-                    )
-                    leakage_mass_value = Scalar(density_at_relief * leakage_value, MASS_UNIT_SCORE)
-                # if is open to seabed
-                if casing["function"] == WellItemFunction.SURFACE:
-                    density_at_well_head = density["final"][0]
-                    leakage_mass_value = Scalar(
-                        density_at_well_head * leakage_value, MASS_UNIT_SCORE
-                    )
-            leakage_mass = {
-                # month is not available in barril
-                str(final_time.GetValue(TIME_UNIT) / 30): (
-                    leakage_mass_value.GetValue(MASS_UNIT_SCORE)
-                    if leakage_mass_value is not None
-                    else 0.0
-                )
+            annuli_measured_depths = output_measured_depths
+        else:
+            resampled_results = annuli_results
+            annuli_measured_depths = measured_depths
+        pressure_diff = resampled_results.pressure_final - resampled_results.pressure_start
+        # month is not available in barril
+        final_time = str(self.score_data.operation_data["duration"].GetValue(TIME_UNIT) / 30)
+        annuli_output: Dict[str, Any] = {}
+        for annulus_index, annuli_label in enumerate(active_annuli):
+            # Drop MDs beyond the annulus end (filled by ALFAsim with NaN/dummy values).
+            valid_length = int(resampled_results.valid_lengths[annulus_index])
+            annulus_output: Dict[str, Any] = {
+                "MD": annuli_measured_depths[:valid_length],
+                "temperature": {
+                    "start": resampled_results.temperature_start[annulus_index, :valid_length],
+                    "final": resampled_results.temperature_final[annulus_index, :valid_length],
+                },
+                "pressure": {
+                    "start": resampled_results.pressure_start[annulus_index, :valid_length],
+                    "final": resampled_results.pressure_final[annulus_index, :valid_length],
+                    "diff": pressure_diff[annulus_index, :valid_length],
+                    "APB": float(annuli_results.apb[annulus_index]),
+                },
+                "density": {
+                    "start": resampled_results.density_start[annulus_index, :valid_length],
+                    "final": resampled_results.density_final[annulus_index, :valid_length],
+                },
+                "volume": {
+                    "start": float(volume_start[annulus_index]),
+                    "final": float(annuli_results.total_volume[annulus_index]),
+                    "diff": float(volume_diff[annulus_index]),
+                },
+                "leakage_bbl": {final_time: float(annuli_results.leakage_volume[annulus_index])},
+                "leakage_mass": {final_time: float(leakage_mass[annulus_index])},
             }
-
-            annuli_output[str(annulus_index)]["temperature"] = temperature
-            annuli_output[str(annulus_index)]["pressure"] = pressure
-            annuli_output[str(annulus_index)]["density"] = density
-            annuli_output[str(annulus_index)]["volume"] = volume
-            annuli_output[str(annulus_index)]["leakage_bbl"] = leakage
-            annuli_output[str(annulus_index)]["leakage_mass"] = leakage_mass
-            annulus_index += 1
+            if include_envelopes:
+                profile_prefix = f"annulus_{annuli_label.value}_"
+                annulus_output["envelope"] = {
+                    "temperature": self._get_envelope_output(
+                        curves,
+                        profile_prefix + "temperature",
+                        TEMPERATURE_UNIT,
+                        measured_depths,
+                        int(annuli_results.valid_lengths[annulus_index]),
+                        output_measured_depths,
+                    ),
+                    "pressure": self._get_envelope_output(
+                        curves,
+                        profile_prefix + "pressure",
+                        PRESSURE_UNIT,
+                        measured_depths,
+                        int(annuli_results.valid_lengths[annulus_index]),
+                        output_measured_depths,
+                    ),
+                }
+            annuli_output[str(annulus_index)] = annulus_output
         return annuli_output
 
-    def _generate_production_tubing_output(self, results: Results) -> Dict[str, Any]:
+    def _get_history_indexes(self, times: np.ndarray, history_interval: Scalar) -> np.ndarray:
+        """
+        Get the time steps sampled at every interval (the last time step at or before each sample
+        time), always including the last time step.
+        """
+        sample_times = np.arange(0.0, times[-1], history_interval.GetValue(TIME_UNIT))
+        indexes = np.searchsorted(times, sample_times, side="right") - 1
+        return np.unique(np.append(np.maximum(indexes, 0), len(times) - 1))
+
+    def _generate_annuli_history(
+        self, curves: ProfileCurvesReader, history_interval: Scalar
+    ) -> Dict[str, Any]:
+        """Create the history of the scalar quantities of annuli sampled at every interval."""
+        active_annuli = self.score_data.get_annuli_list()
+        # read the histories of all annuli without trends at once (the trends are already read)
+        curves.read_histories(
+            [
+                property_name
+                for property_name in self._get_annuli_scalar_properties()
+                if not curves.has_trend(property_name)
+            ]
+        )
+        annuli_history: Dict[str, Any] = {}
+        for annulus_index, annuli_label in enumerate(active_annuli):
+            profile_prefix = f"annulus_{annuli_label.value}_"
+            property_names = [
+                profile_prefix + property_name
+                for property_name, _ in ANNULUS_HISTORY_QUANTITIES.values()
+            ]
+            # all quantities of the annulus are sampled at the same times, so the trends are only
+            # used when all of them are available
+            use_trends = all(curves.has_trend(property_name) for property_name in property_names)
+            # the sum turns the -0.0 given by the unit conversion of the initial time into 0.0
+            if use_trends:
+                times = curves.get_trend_time_set(property_names[0], TIME_UNIT) + 0.0
+            else:
+                times = curves.get_time_set(property_names[0], TIME_UNIT) + 0.0
+            indexes = self._get_history_indexes(times, history_interval)
+            # month is not available in barril
+            history = {"time": times[indexes] / 30}
+            for quantity, (property_name, unit) in ANNULUS_HISTORY_QUANTITIES.items():
+                if use_trends:
+                    values = curves.get_trend(profile_prefix + property_name, unit)
+                else:
+                    values = curves.get_history(profile_prefix + property_name, unit)
+                history[quantity] = values[indexes]
+            annuli_history[str(annulus_index)] = history
+        return annuli_history
+
+    def _generate_production_tubing_output(
+        self,
+        curves: ProfileCurvesReader,
+        measured_depths: np.ndarray,
+        output_measured_depths: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
         """Create data for the output results of production tubing."""
+        temperature = curves.get_profile("mixture temperature", -1, TEMPERATURE_UNIT)
+        pressure = curves.get_profile("pressure", -1, PRESSURE_UNIT)
+        density = curves.get_profile("mixture_density", -1, DENSITY_UNIT_SCORE)
+        if output_measured_depths is not None:
+            temperature, pressure, density = self._resample_profiles(
+                np.stack([temperature, pressure, density]), measured_depths, output_measured_depths
+            )
         production_tubing = {
-            "temperature": {
-                "final": (
-                    results.get_profile_curve("mixture temperature", self.element_name, -1)
-                    .image.GetValues(TEMPERATURE_UNIT)
-                    .tolist()
-                )
-            },
-            "pressure": {
-                "final": (
-                    results.get_profile_curve("pressure", self.element_name, -1)
-                    .image.GetValues(PRESSURE_UNIT)
-                    .tolist()
-                )
-            },
-            "density": {
-                "final": (
-                    results.get_profile_curve("mixture_density", self.element_name, -1)
-                    .image.GetValues(DENSITY_UNIT_SCORE)
-                    .tolist()
-                )
-            },
+            "temperature": {"final": temperature},
+            "pressure": {"final": pressure},
+            "density": {"final": density},
         }
         return production_tubing
 
-    def _generate_walls_output(self, results: Results, measured_depths: List) -> Dict[str, Any]:
+    def _generate_walls_output(
+        self,
+        curves: ProfileCurvesReader,
+        measured_depths: np.ndarray,
+        include_envelopes: bool = False,
+        output_measured_depths: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
         """Create data for the output results of walls."""
         walls_output: Dict[str, Any] = {}
-        wall_index = 0
+        wall_names = []
         # Score wall labels are inverted with respect to PWPA
         for wall_label in range(TOTAL_WALLS - 1, -1, -1):
             wall_name = f"wall_{wall_label}_temperature"
-            wall = {}
-            wall["MD"] = measured_depths
-            wall_temperatures = results.get_profile_curve(
-                wall_name, self.element_name, -1
-            ).image.GetValues(TEMPERATURE_UNIT)
+            wall_temperatures = curves.get_profile(wall_name, -1, TEMPERATURE_UNIT)
             # Ignore walls with NaN or negative dummy values from ALFAsim
             if not np.all(np.isnan(wall_temperatures)) and not np.all(wall_temperatures < 0):
-                wall["temperature"] = wall_temperatures.tolist()
-                walls_output[str(wall_index)] = wall
-                wall_index += 1
+                wall_names.append(wall_name)
+        if not wall_names:
+            return walls_output
+        walls_temperatures = np.stack(
+            [curves.get_profile(wall_name, -1, TEMPERATURE_UNIT) for wall_name in wall_names]
+        )
+        if output_measured_depths is not None:
+            walls_temperatures = self._resample_profiles(
+                walls_temperatures, measured_depths, output_measured_depths
+            )
+        for wall_index, wall_name in enumerate(wall_names):
+            wall: Dict[str, Any] = {}
+            wall["MD"] = (
+                measured_depths if output_measured_depths is None else output_measured_depths
+            )
+            wall["temperature"] = walls_temperatures[wall_index]
+            if include_envelopes:
+                wall["envelope"] = {
+                    "temperature": self._get_envelope_output(
+                        curves,
+                        wall_name,
+                        TEMPERATURE_UNIT,
+                        measured_depths,
+                        output_measured_depths=output_measured_depths,
+                    )
+                }
+            walls_output[str(wall_index)] = wall
         return walls_output
 
-    def generate_output_results(self, alfasim_results_filepath: Path) -> Dict[str, Any]:
-        """Create data for the output results."""
-        results = Results(alfasim_results_filepath)
+    def generate_output_results(
+        self,
+        alfasim_results_filepath: Path,
+        history_interval: Optional[Scalar] = None,
+        include_envelopes: bool = False,
+        use_cache: bool = False,
+        output_measured_depths: Optional[Array] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create data for the output results. The curves are kept as NumPy arrays (the measured depths
+        array is shared by all annuli and walls) to be written by `ScoreOutputWriter`.
+
+        :param history_interval:
+            When given, the APB, TLV, ATV and VTE of each annulus sampled at this interval are
+            added to the annuli output as a `history` (with the time in months).
+        :param include_envelopes:
+            When true, the maximum and minimum temperature and pressure reached at each MD over
+            the operation (and the time of the maximum, in months) are added to the annuli and walls
+            output as an `envelope`. All time steps are streamed by blocks to compute them.
+        :param use_cache:
+            When true, the curves read are saved in a cache file in the ALFAsim data folder, which
+            is used by the next output generations while the result files aren't modified.
+        :param output_measured_depths:
+            When given, the profiles of the production tubing, annuli and walls are interpolated
+            at these (increasing) MDs instead of given at the ALFAsim cells, so the size of the
+            output doesn't depend on the mesh (e.g. the MDs of `get_score_measured_depths`). The
+            MDs beyond the end of each annulus are dropped from the annulus output.
+        """
+        curves = self._create_curves_reader(alfasim_results_filepath, use_cache)
+        # read all curves up front, opening the result files once for each time step
+        curves.read_trends(
+            [
+                property_name
+                for property_name in self._get_annuli_scalar_properties()
+                if curves.has_trend(property_name)
+            ]
+        )
+        curves.read_profiles(self._get_required_profiles(curves))
+        if include_envelopes:
+            curves.read_envelopes(self._get_envelope_profiles())
         well_start_position = self.score_data.get_well_start_position().GetValue(LENGTH_UNIT)
-        measured_depths = list(
-            well_start_position
-            + results.get_profile_curve("pressure", self.element_name, -1).domain.GetValues(
-                LENGTH_UNIT
-            )
+        measured_depths = well_start_position + curves.get_domain("pressure", -1, LENGTH_UNIT)
+        resampling_measured_depths = (
+            output_measured_depths.GetValues(LENGTH_UNIT)
+            if output_measured_depths is not None
+            else None
+        )
+        annuli_output = self._generate_annuli_output(
+            curves, measured_depths, include_envelopes, resampling_measured_depths
         )
+        if history_interval is not None:
+            annuli_history = self._generate_annuli_history(curves, history_interval)
+            for annulus_index, history in annuli_history.items():
+                annuli_output[annulus_index]["history"] = history
+        output_results = {
+            "annuli": annuli_output,
+            "MD": (
+                measured_depths
+                if resampling_measured_depths is None
+                else resampling_measured_depths
+            ),
+            "production_tubing": self._generate_production_tubing_output(
+                curves, measured_depths, resampling_measured_depths
+            ),
+            "layers": self._generate_walls_output(
+                curves, measured_depths, include_envelopes, resampling_measured_depths
+            ),
+        }
+        curves.save_cache()
+        return output_results
+
+    def get_score_measured_depths(self) -> Array:
+        """Get the MDs of the results recorded by SCORE in its input file."""
+        output_curves = self.score_data.reader.read_output_curves()
+        if "measured_depth" not in output_curves:
+            raise RuntimeError("The SCORE input file has no results with the measured depths")
+        return output_curves["measured_depth"]
+
+    def generate_progress_results(self, alfasim_results_filepath: Path) -> Dict[str, Any]:
+        """
+        Create a summary of the simulation progress: the time (in months) and number of the last
+        profile time step written, the current APB of each annulus and whether the final time of
+        the operation was reached. Only the last time step of the profiles is read, so it can be
+        called often while ALFAsim is running (the time steps times and the APB trends are read
+        whole, but they have a single value per time step).
+        """
+        curves = self._create_curves_reader(alfasim_results_filepath)
+        # the sum turns the -0.0 given by the unit conversion of the initial time into 0.0
+        times = curves.get_time_set("pressure", TIME_UNIT) + 0.0
+        annuli_progress: Dict[str, Any] = {}
+        for annulus_index, annuli_label in enumerate(self.score_data.get_annuli_list()):
+            annuli_progress[str(annulus_index)] = {
+                "APB": self._get_annulus_final_value(
+                    curves, f"annulus_{annuli_label.value}_apb", PRESSURE_UNIT
+                )
+            }
+        # compared in seconds, the time in months can't be converted back exactly
+        last_time = curves.get_time_set("pressure", "s")[-1]
+        final_time = self.score_data.operation_data["duration"].GetValue("s")
         return {
-            "annuli": self._generate_annuli_output(results, measured_depths),
-            "MD": measured_depths,
-            "production_tubing": self._generate_production_tubing_output(results),
-            "layers": self._generate_walls_output(results, measured_depths),
+            # month is not available in barril
+            "time": float(times[-1] / 30),
+            "time_steps": len(times),
+            "annuli": annuli_progress,
+            "finished": bool(last_time >= final_time - FINAL_TIME_TOLERANCE),
         }
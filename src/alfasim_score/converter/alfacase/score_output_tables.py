@@ -0,0 +1,130 @@
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Literal
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from pathlib import Path
+
+# the name of the table with the scalar quantities of the annuli, one row for each annulus
+ANNULI_TABLE_NAME = "annuli"
+PRODUCTION_TUBING_TABLE_NAME = "production_tubing"
+# the extension of the file of each column of the tables
+COLUMN_FILE_SUFFIX = ".npy"
+
+
+def _flatten_columns(values: Mapping, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Flatten the nested output dicts, joining the keys with `_` (e.g. `pressure_final`)."""
+    for key, value in values.items():
+        if isinstance(value, Mapping):
+            yield from _flatten_columns(value, f"{prefix}{key}_")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def get_output_tables(output: Mapping[str, Any]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Arrange the SCORE output results (created by `ScoreOutputBuilder.generate_output_results` or
+    loaded from a SCORE output file) in columnar tables, with the values in the units of the SCORE
+    output:
+
+    - `production_tubing`, `annulus_<index>` and `wall_<index>`: indexed by the `MD` column, with a
+      column for each profile (e.g. `pressure_final` or `envelope_temperature_max`);
+    - `annulus_<index>_history`: indexed by the `time` column, when the history is in the output;
+    - `annuli`: the scalar quantities (e.g. `pressure_APB` or `volume_diff`) with a row for each annulus.
+    """
+    tables: Dict[str, Dict[str, np.ndarray]] = {}
+    tables[PRODUCTION_TUBING_TABLE_NAME] = {
+        "MD": np.asarray(output["MD"]),
+        **{
+            name: np.asarray(values)
+            for name, values in _flatten_columns(output["production_tubing"])
+        },
+    }
+    annuli_scalars: Dict[str, list] = {"annulus": []}
+    for annulus_index, annulus in output["annuli"].items():
+        annulus_table = {}
+        for name, values in _flatten_columns(annulus):
+            if name.startswith(("leakage_", "history_")):
+                continue
+            if isinstance(values, (np.ndarray, list)):
+                annulus_table[name] = np.asarray(values)
+            else:
+                annuli_scalars.setdefault(name, []).append(values)
+        tables[f"annulus_{annulus_index}"] = annulus_table
+        annuli_scalars["annulus"].append(int(annulus_index))
+        # the leakages are given only at the final time (in months)
+        for leakage_name in ["leakage_bbl", "leakage_mass"]:
+            ((leakage_time, leakage_value),) = annulus[leakage_name].items()
+            annuli_scalars.setdefault(leakage_name, []).append(leakage_value)
+        annuli_scalars.setdefault("leakage_time", []).append(float(leakage_time))
+        if "history" in annulus:
+            tables[f"annulus_{annulus_index}_history"] = {
+                name: np.asarray(values) for name, values in annulus["history"].items()
+            }
+    tables[ANNULI_TABLE_NAME] = {
+        name: np.asarray(values, dtype=int if name == "annulus" else float)
+        for name, values in annuli_scalars.items()
+    }
+    for wall_index, wall in output["layers"].items():
+        tables[f"wall_{wall_index}"] = {
+            name: np.asarray(values) for name, values in _flatten_columns(wall)
+        }
+    return tables
+
+
+def write_output_tables(folder: Path, output: Mapping[str, Any]) -> None:
+    """
+    Write the SCORE output results as columnar tables in a folder, with a folder for each table
+    and a `.npy` file for each column (e.g. `annulus_1/pressure_final.npy`), so the columns can
+    be memory-mapped and only the columns used are read. The columns (and tables) of a previous
+    output in the folder that aren't in this output are removed.
+    """
+    written_filepaths = set()
+    for table_name, table in get_output_tables(output).items():
+        table_folder = folder / table_name
+        table_folder.mkdir(parents=True, exist_ok=True)
+        for column_name, values in table.items():
+            column_filepath = table_folder / f"{column_name}{COLUMN_FILE_SUFFIX}"
+            np.save(column_filepath, values, allow_pickle=False)
+            written_filepaths.add(column_filepath)
+    for column_filepath in folder.glob(f"*/*{COLUMN_FILE_SUFFIX}"):
+        if column_filepath not in written_filepaths:
+            column_filepath.unlink()
+            # the tables not in this output are removed with their last column
+            if not any(column_filepath.parent.iterdir()):
+                column_filepath.parent.rmdir()
+
+
+def read_output_tables(
+    folder: Path,
+    table_names: Optional[Iterable[str]] = None,
+    mmap_mode: Optional[Literal["r", "c"]] = "r",
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Read the columnar tables written by `write_output_tables`.
+
+    :param table_names:
+        The tables to read (e.g. `["annuli", "annulus_1"]`), or `None` to read all of them.
+    :param mmap_mode:
+        How the columns are memory-mapped (see `np.load`), by default read-only, or `None` to
+        read the columns to memory.
+    """
+    if table_names is None:
+        table_names = sorted(
+            table_folder.name for table_folder in folder.iterdir() if table_folder.is_dir()
+        )
+    tables: Dict[str, Dict[str, np.ndarray]] = {}
+    for table_name in table_names:
+        table_folder = folder / table_name
+        if not table_folder.is_dir():
+            raise KeyError(f"There is no table '{table_name}' in '{folder}'")
+        tables[table_name] = {
+            column_filepath.stem: np.load(column_filepath, mmap_mode=mmap_mode, allow_pickle=False)
+            for column_filepath in sorted(table_folder.glob(f"*{COLUMN_FILE_SUFFIX}"))
+        }
+    return tables
@@ -0,0 +1,111 @@
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import time
+from alfasim_sdk.result_reader.aggregator_constants import RESULTS_FOLDER_NAME
+from pathlib import Path
+
+from alfasim_score.converter.alfacase.score_output_generator import ScoreOutputBuilder
+
+# the default number of seconds between two checks of the results folder
+SCORE_OUTPUT_WATCH_POLL_INTERVAL = 10.0
+# the default number of consecutive updates failing to read the result files before the error is
+# raised (a single failure is expected when the files are read while ALFAsim writes them)
+SCORE_OUTPUT_WATCH_MAX_FAILURES = 5
+
+
+class ScoreOutputWatcher:
+    """
+    Follow the results folder of a running ALFAsim simulation, summarizing the progress each
+    time new profile time steps are written. The result files are only read when they changed
+    since the last check. Only the last time step of the profiles is read, but the times of the
+    time steps and the annuli APB trends are read whole, which are small (a value per time step)
+    but grow with the number of time steps already written.
+    """
+
+    def __init__(
+        self,
+        output_builder: ScoreOutputBuilder,
+        alfasim_results_folder: Path,
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_failures: int = SCORE_OUTPUT_WATCH_MAX_FAILURES,
+    ) -> None:
+        """
+        :param on_update:
+            Called with the progress summary after each update with new time steps (e.g. to
+            regenerate the SCORE output file). Its errors aren't handled by the watcher.
+        :param max_failures:
+            The number of consecutive updates failing to read the result files (with an
+            `OSError`, like a truncated dataset being written) before the error is raised.
+        """
+        self.output_builder = output_builder
+        self.alfasim_results_folder = alfasim_results_folder
+        self.on_update = on_update
+        self.max_failures = max_failures
+        self.time_steps = 0
+        self._failures = 0
+        self._files_state: Dict[str, Tuple[int, int]] = {}
+
+    def _get_files_state(self) -> Dict[str, Tuple[int, int]]:
+        """Get the size and modification time of the result files."""
+        results_folder = self.alfasim_results_folder / RESULTS_FOLDER_NAME
+        if not results_folder.is_dir():
+            return {}
+        files_state = {}
+        for filepath in results_folder.iterdir():
+            file_stat = filepath.stat()
+            files_state[filepath.name] = (file_stat.st_size, file_stat.st_mtime_ns)
+        return files_state
+
+    def update(self) -> Optional[Dict[str, Any]]:
+        """
+        Check the results folder, returning the progress summary when new profile time steps
+        were written since the last update (`None` otherwise).
+        """
+        files_state = self._get_files_state()
+        if not files_state or files_state == self._files_state:
+            return None
+        try:
+            progress = self.output_builder.generate_progress_results(self.alfasim_results_folder)
+        except OSError:
+            # the result files are still being written, try again in the next update
+            self._failures += 1
+            if self._failures >= self.max_failures:
+                raise
+            return None
+        self._failures = 0
+        self._files_state = files_state
+        if progress["time_steps"] <= self.time_steps:
+            return None
+        self.time_steps = progress["time_steps"]
+        if self.on_update is not None:
+            self.on_update(progress)
+        return progress
+
+    def watch(
+        self,
+        poll_interval: float = SCORE_OUTPUT_WATCH_POLL_INTERVAL,
+        idle_timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the progress summary each time new time steps are written, until the final time of
+        the operation is reached (or no time step is written for `idle_timeout` seconds).
+
+        :param poll_interval:
+            The number of seconds between two checks of the results folder.
+        """
+        last_update_time = time.monotonic()
+        while True:
+            progress = self.update()
+            if progress is not None:
+                yield progress
+                if progress["finished"]:
+                    return
+                last_update_time = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - last_update_time >= idle_timeout:
+                return
+            time.sleep(poll_interval)
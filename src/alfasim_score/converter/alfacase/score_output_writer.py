@@ -0,0 +1,130 @@
+from typing import Any
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+from typing import TextIO
+
+import json
+import math
+import numpy as np
+
+# number of array values formatted and written at once
+SCORE_OUTPUT_WRITE_CHUNK_SIZE = 10000
+# the representation of the non finite numbers, the same used by `json.dumps`
+NON_FINITE_NUMBERS = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}
+
+
+class ScoreOutputWriter:
+    """
+    Write the SCORE output structure (dicts, lists and NumPy arrays) as json directly to a file,
+    formatting the arrays by blocks of values, so the whole content is never kept in memory.
+    With the default options the content is the same written by `json.dumps(output, indent=2)`.
+    """
+
+    def __init__(
+        self, file: TextIO, indent: Optional[int] = 2, significant_digits: Optional[int] = None
+    ) -> None:
+        """
+        :param indent:
+            The number of spaces used to indent each level, or `None` to write compact json.
+        :param significant_digits:
+            The maximum number of significant digits of the floats, or `None` to write the floats
+            with all digits needed to read back the same values.
+        """
+        self.file = file
+        self.indent = indent
+        self.float_format = None if significant_digits is None else f"%.{significant_digits}g"
+
+    def _format_float(self, value: float) -> str:
+        if not math.isfinite(value):
+            return NON_FINITE_NUMBERS[repr(value)]
+        if self.float_format is None:
+            return repr(value)
+        # the rounded value is written with repr so integers are still written as floats
+        return repr(float(self.float_format % value))
+
+    def _format_scalar(self, value: Any) -> str:
+        if value is None:
+            return "null"
+        if isinstance(value, (bool, np.bool_)):
+            return "true" if value else "false"
+        if isinstance(value, (int, np.integer)):
+            return str(int(value))
+        if isinstance(value, (float, np.floating)):
+            return self._format_float(float(value))
+        if isinstance(value, str):
+            return json.dumps(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def _get_separators(self, level: int) -> tuple:
+        """Get the text written after the opening bracket, between items and before the closing."""
+        if self.indent is None:
+            return "", ",", ""
+        inner_indent = "\n" + " " * (self.indent * (level + 1))
+        return inner_indent, "," + inner_indent, "\n" + " " * (self.indent * level)
+
+    def _write_array(self, values: np.ndarray, level: int) -> None:
+        if values.ndim == 0:
+            self.file.write(self._format_scalar(values.item()))
+            return
+        if values.ndim != 1 or values.dtype.kind not in "fiu":
+            self._write_sequence(values.tolist(), level)
+            return
+        if values.size == 0:
+            self.file.write("[]")
+            return
+        opening, separator, closing = self._get_separators(level)
+        is_float = values.dtype.kind == "f"
+        self.file.write("[" + opening)
+        for start in range(0, values.size, SCORE_OUTPUT_WRITE_CHUNK_SIZE):
+            chunk = values[start : start + SCORE_OUTPUT_WRITE_CHUNK_SIZE]
+            if start > 0:
+                self.file.write(separator)
+            if is_float and self.float_format is None and np.all(np.isfinite(chunk)):
+                self.file.write(separator.join(map(repr, chunk.tolist())))
+            elif is_float:
+                self.file.write(separator.join(map(self._format_float, chunk.tolist())))
+            else:
+                self.file.write(separator.join(map(str, chunk.tolist())))
+        self.file.write(closing + "]")
+
+    def _write_sequence(self, values: Iterable, level: int) -> None:
+        values = list(values)
+        if not values:
+            self.file.write("[]")
+            return
+        opening, separator, closing = self._get_separators(level)
+        self.file.write("[" + opening)
+        for index, value in enumerate(values):
+            if index > 0:
+                self.file.write(separator)
+            self._write_value(value, level + 1)
+        self.file.write(closing + "]")
+
+    def _write_mapping(self, values: Mapping, level: int) -> None:
+        if not values:
+            self.file.write("{}")
+            return
+        opening, separator, closing = self._get_separators(level)
+        key_separator = ":" if self.indent is None else ": "
+        self.file.write("{" + opening)
+        for index, (key, value) in enumerate(values.items()):
+            if index > 0:
+                self.file.write(separator)
+            self.file.write(json.dumps(str(key)) + key_separator)
+            self._write_value(value, level + 1)
+        self.file.write(closing + "}")
+
+    def _write_value(self, value: Any, level: int) -> None:
+        if isinstance(value, Mapping):
+            self._write_mapping(value, level)
+        elif isinstance(value, np.ndarray):
+            self._write_array(value, level)
+        elif isinstance(value, (list, tuple)):
+            self._write_sequence(value, level)
+        else:
+            self.file.write(self._format_scalar(value))
+
+    def write(self, output: Any) -> None:
+        """Write the output structure to the file."""
+        self._write_value(output, 0)
@@ -0,0 +1,290 @@
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import io
+import json
+import numpy as np
+import sqlite3
+from barril.units import Scalar
+from enum import Enum
+from pathlib import Path
+
+from alfasim_score.common import AnnulusLabel
+from alfasim_score.converter.alfacase.score_input_reader import ScoreInputReader
+from alfasim_score.converter.alfacase.score_output_tables import ANNULI_TABLE_NAME
+from alfasim_score.converter.alfacase.score_output_tables import get_output_tables
+
+# the scalar quantities of each annulus kept in the warehouse, named as in the `annuli` table
+ANNULUS_SCALAR_COLUMNS = [
+    "pressure_APB",
+    "volume_start",
+    "volume_final",
+    "volume_diff",
+    "leakage_bbl",
+    "leakage_mass",
+    "leakage_time",
+]
+# the name, value, text value and unit of an operation parameter
+OperationParameter = Tuple[str, Optional[float], Optional[str], Optional[str]]
+# the comparison operators allowed in the query conditions
+QUERY_OPERATORS = ["=", "!=", "<", "<=", ">", ">="]
+
+WAREHOUSE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    score_output_file TEXT NOT NULL UNIQUE,
+    score_input_file TEXT NOT NULL,
+    files_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS operation_parameters (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    text_value TEXT,
+    unit TEXT,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS operation_parameters_value ON operation_parameters(name, value);
+CREATE INDEX IF NOT EXISTS operation_parameters_text ON operation_parameters(name, text_value);
+CREATE TABLE IF NOT EXISTS annuli (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    annulus INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    {", ".join(f"{column} REAL" for column in ANNULUS_SCALAR_COLUMNS)},
+    PRIMARY KEY (run_id, annulus)
+);
+CREATE INDEX IF NOT EXISTS annuli_label ON annuli(label);
+CREATE TABLE IF NOT EXISTS profiles (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, table_name)
+);
+"""
+
+
+def get_run_files_key(score_input_file: Path, score_output_file: Path) -> str:
+    """Identify the state of the files of a run by their size and modification time."""
+    keys = []
+    for filepath in [score_input_file, score_output_file]:
+        file_stat = filepath.stat()
+        keys.append(f"{file_stat.st_size}:{file_stat.st_mtime_ns}")
+    return "|".join(keys)
+
+
+def _get_operation_parameters(score_input_file: Path) -> List[OperationParameter]:
+    """
+    Get the operation parameters of the SCORE input file as (name, value, text value, unit), with
+    the quantities in the units read by `ScoreInputReader.read_operation_data`.
+    """
+    operation_data = ScoreInputReader(score_input_file).read_operation_data()
+    parameters: List[OperationParameter] = []
+    for name, value in operation_data.items():
+        if isinstance(value, Scalar):
+            parameters.append((name, value.GetValue(), None, value.unit))
+        elif isinstance(value, Enum):
+            parameters.append((name, None, value.value, None))
+        elif isinstance(value, (int, float)):
+            parameters.append((name, float(value), None, None))
+        else:
+            parameters.append((name, None, str(value), None))
+    return parameters
+
+
+def _pack_table(table: Dict[str, Any]) -> bytes:
+    """Pack the columns of a table in a npz blob."""
+    content = io.BytesIO()
+    np.savez(content, **table)
+    return content.getvalue()
+
+
+class ScoreResultsWarehouse:
+    """
+    Index the inputs and outputs of many SCORE runs in a SQLite database, so they can be queried
+    without loading the SCORE files again. The operation parameters and the scalar quantities of
+    the annuli are kept in indexed tables, and the profiles (the columnar tables of
+    `get_output_tables`) are kept as npz blobs, read only when requested.
+    """
+
+    def __init__(self, database_filepath: Path) -> None:
+        self.database_filepath = database_filepath
+        self.connection = sqlite3.connect(database_filepath)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(WAREHOUSE_SCHEMA)
+
+    def __enter__(self) -> "ScoreResultsWarehouse":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _insert_run(self, score_input_file: Path, score_output_file: Path, files_key: str) -> None:
+        """Insert the run, replacing its previous version (and the rows of it)."""
+        self.connection.execute(
+            "DELETE FROM runs WHERE score_output_file = ?", (str(score_output_file),)
+        )
+        cursor = self.connection.execute(
+            "INSERT INTO runs (score_output_file, score_input_file, files_key) VALUES (?, ?, ?)",
+            (str(score_output_file), str(score_input_file), files_key),
+        )
+        run_id = cursor.lastrowid
+        self.connection.executemany(
+            "INSERT INTO operation_parameters (run_id, name, value, text_value, unit) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(run_id, *parameter) for parameter in _get_operation_parameters(score_input_file)],
+        )
+        with open(score_output_file, encoding="utf-8") as file:
+            output = json.load(file)
+        tables = get_output_tables(output)
+        annuli = tables.pop(ANNULI_TABLE_NAME)
+        annulus_labels = list(AnnulusLabel)
+        self.connection.executemany(
+            f"INSERT INTO annuli (run_id, annulus, label, {', '.join(ANNULUS_SCALAR_COLUMNS)}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(ANNULUS_SCALAR_COLUMNS))})",
+            [
+                (
+                    run_id,
+                    int(annulus_index),
+                    # the active annuli are always the first ones
+                    annulus_labels[annulus_index].value,
+                    *[float(annuli[column][row]) for column in ANNULUS_SCALAR_COLUMNS],
+                )
+                for row, annulus_index in enumerate(annuli["annulus"])
+            ],
+        )
+        self.connection.executemany(
+            "INSERT INTO profiles (run_id, table_name, data) VALUES (?, ?, ?)",
+            [(run_id, table_name, _pack_table(table)) for table_name, table in tables.items()],
+        )
+
+    def ingest(self, runs: Iterable[Tuple[Path, Path]]) -> int:
+        """
+        Add the runs to the warehouse. The runs already in the warehouse are skipped while their
+        files aren't modified, so the same runs can be ingested again to update the warehouse.
+
+        :param runs:
+            The SCORE input file and output file of each run (the runs are identified by the
+            output file).
+        :return:
+            The number of runs added or updated.
+        """
+        ingested_runs = 0
+        with self.connection:
+            for score_input_file, score_output_file in runs:
+                files_key = get_run_files_key(score_input_file, score_output_file)
+                row = self.connection.execute(
+                    "SELECT files_key FROM runs WHERE score_output_file = ?",
+                    (str(score_output_file),),
+                ).fetchone()
+                if row is not None and row[0] == files_key:
+                    continue
+                self._insert_run(score_input_file, score_output_file, files_key)
+                ingested_runs += 1
+        return ingested_runs
+
+    def query_annuli(
+        self,
+        annulus_label: Optional[AnnulusLabel] = None,
+        conditions: Sequence[Tuple[str, str, Any]] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the scalar quantities of the annuli of the runs with the operation parameters
+        satisfying all conditions. For example, the largest final APB of the annulus B of the runs
+        with GOR above 200 sm3/sm3 is given by::
+
+            warehouse.query_annuli(
+                AnnulusLabel.B,
+                [("gas_oil_ratio", ">", 200.0)],
+                order_by="pressure_APB",
+                descending=True,
+                limit=1,
+            )
+
+        :param conditions:
+            The (name, operator, value) of the conditions of the operation parameters, with the
+            values in the units of `ScoreInputReader.read_operation_data` (or a text, compared to
+            the text parameters, like the `lift_method`).
+        :param order_by:
+            One of the quantities in `ANNULUS_SCALAR_COLUMNS` to sort the annuli.
+        :return:
+            The annuli found, with the SCORE output file of the run, the annulus index and label
+            and the quantities in `ANNULUS_SCALAR_COLUMNS`.
+        """
+        query = (
+            "SELECT runs.score_output_file, annuli.annulus, annuli.label, "
+            f"{', '.join(f'annuli.{column}' for column in ANNULUS_SCALAR_COLUMNS)} "
+            "FROM annuli JOIN runs ON runs.run_id = annuli.run_id"
+        )
+        filters = []
+        parameters: List[Any] = []
+        if annulus_label is not None:
+            filters.append("annuli.label = ?")
+            parameters.append(annulus_label.value)
+        for name, operator, value in conditions:
+            if operator not in QUERY_OPERATORS:
+                raise ValueError(
+                    f"Invalid operator '{operator}', expected one of {QUERY_OPERATORS}"
+                )
+            if isinstance(value, Enum):
+                value = value.value
+            value_column = "text_value" if isinstance(value, str) else "value"
+            filters.append(
+                "annuli.run_id IN (SELECT run_id FROM operation_parameters "
+                f"WHERE name = ? AND {value_column} {operator} ?)"
+            )
+            parameters.extend([name, value])
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        if order_by is not None:
+            if order_by not in ANNULUS_SCALAR_COLUMNS:
+                raise ValueError(
+                    f"Invalid order '{order_by}', expected one of {ANNULUS_SCALAR_COLUMNS}"
+                )
+            query += f" ORDER BY annuli.{order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        columns = ["score_output_file", "annulus", "label", *ANNULUS_SCALAR_COLUMNS]
+        return [dict(zip(columns, row)) for row in self.connection.execute(query, parameters)]
+
+    def get_operation_parameters(self, score_output_file: Path) -> Dict[str, Any]:
+        """Get the operation parameters of a run (the quantities as `Scalar`)."""
+        rows = self.connection.execute(
+            "SELECT name, value, text_value, unit FROM operation_parameters "
+            "JOIN runs ON runs.run_id = operation_parameters.run_id "
+            "WHERE runs.score_output_file = ?",
+            (str(score_output_file),),
+        )
+        parameters: Dict[str, Any] = {}
+        for name, value, text_value, unit in rows:
+            if unit is not None:
+                parameters[name] = Scalar(value, unit)
+            else:
+                parameters[name] = value if text_value is None else text_value
+        return parameters
+
+    def read_profiles(self, score_output_file: Path, table_name: str) -> Dict[str, np.ndarray]:
+        """
+        Read a table of profiles of a run (e.g. `annulus_1` or `production_tubing`, see
+        `get_output_tables`).
+        """
+        row = self.connection.execute(
+            "SELECT data FROM profiles JOIN runs ON runs.run_id = profiles.run_id "
+            "WHERE runs.score_output_file = ? AND profiles.table_name = ?",
+            (str(score_output_file), table_name),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"There is no table '{table_name}' for '{score_output_file}'")
+        with np.load(io.BytesIO(row[0]), allow_pickle=False) as content:
+            return {column_name: content[column_name] for column_name in content.files}
@@ -1,9 +1,23 @@
+import numpy as np
+import os
 import pytest
+import time
 from pathlib import Path
-from pytest_regressions.dataframe_regression import DataFrameRegressionFixture
+from pytest_mock import MockerFixture
 from pytest_regressions.file_regression import FileRegressionFixture
+from pytest_regressions.num_regression import NumericRegressionFixture
 
+from alfasim_score.converter.wellprop import wellprop_pvt_table_converter
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PVT_TABLE_COLUMNS
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WELLPROP_CACHE_FILENAME
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
 from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WellpropToPvtConverter
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import calculate_gradient
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import coarsen_pvt_table_data
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import generate_pvt_table_files
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import (
+    get_pvt_table_info_filepath,)
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import is_pvt_table_up_to_date
 
 
 @pytest.mark.parametrize("fluid_name", ("N2_LIFT", "DFLT_FCBA_9.90", "DFLT_FPBNA_OLEO_NACL_10.00"))
@@ -21,17 +35,204 @@ def test_generate_pvt_table_content(
 @pytest.mark.parametrize("fluid_name", ("N2_LIFT", "DFLT_FCBA_9.90", "DFLT_FPBNA_OLEO_NACL_10.00"))
 def test_convert_pvt_table_data(
     shared_datadir: Path,
-    dataframe_regression: DataFrameRegressionFixture,
+    num_regression: NumericRegressionFixture,
     fluid_name: str,
 ) -> None:
     converter = WellpropToPvtConverter(shared_datadir / fluid_name)
-    dataframe_regression.check(converter._convert_pvt_table_data().table)
+    pvt_data = converter._convert_pvt_table_data()
+    num_regression.check({column: pvt_data.get_column(column) for column in pvt_data.columns})
 
 
 def test_convert_pvt_table_file(
     shared_datadir: Path,
+    monkeypatch: pytest.MonkeyPatch,
 ) -> None:
+    # a chunk size that doesn't divide the number of points to check the rows between chunks
+    monkeypatch.setattr(wellprop_pvt_table_converter, "PVT_TABLE_WRITE_CHUNK_SIZE", 7)
     converter = WellpropToPvtConverter(shared_datadir / "N2_LIFT")
     converter.generate_pvt_table_file(shared_datadir)
     output_pvt_filepath = Path(shared_datadir / "N2_LIFT.tab")
     assert output_pvt_filepath.exists(), "PVT table could not be created."
+    expected_content = converter._generate_pvt_table_content(converter._convert_pvt_table_data())
+    assert output_pvt_filepath.read_text() == expected_content.getvalue()
+
+
+def test_generate_pvt_table_files(shared_datadir: Path, tmp_path: Path) -> None:
+    fluid_names = ["N2_LIFT", "DFLT_FCBA_9.90", "DFLT_FPBNA_OLEO_NACL_10.00"]
+    wellprop_folders = [shared_datadir / name for name in fluid_names]
+    pvt_table_filepaths = generate_pvt_table_files(wellprop_folders, tmp_path, max_workers=2)
+    assert pvt_table_filepaths == [tmp_path / f"{name}.tab" for name in fluid_names]
+    for wellprop_folder, pvt_table_filepath in zip(wellprop_folders, pvt_table_filepaths):
+        assert is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath)
+
+    # up to date tables are not converted again
+    modified_times = [filepath.stat().st_mtime_ns for filepath in pvt_table_filepaths]
+    generate_pvt_table_files(wellprop_folders, tmp_path)
+    assert [filepath.stat().st_mtime_ns for filepath in pvt_table_filepaths] == modified_times
+
+    density_filepath = shared_datadir / "N2_LIFT" / "temperature_GAS_density.csv"
+    os.utime(density_filepath, (time.time() + 10.0, time.time() + 10.0))
+    assert not is_pvt_table_up_to_date(shared_datadir / "N2_LIFT", pvt_table_filepaths[0])
+
+
+def test_pvt_table_up_to_date_conversion(
+    shared_datadir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    wellprop_folder = shared_datadir / "DFLT_FCBA_9.90"
+    (pvt_table_filepath,) = generate_pvt_table_files([wellprop_folder], tmp_path)
+    assert is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath)
+    # the tables created with other conversion options are outdated
+    tolerances = {PvtTableProperties.LiquidDensity: 0.1}
+    assert not is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath, tolerances)
+    generate_pvt_table_files([wellprop_folder], tmp_path, coarsening_tolerances=tolerances)
+    assert is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath, tolerances)
+    assert not is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath)
+
+    # the tables created by other format versions (or without the info) are outdated
+    monkeypatch.setattr(wellprop_pvt_table_converter, "PVT_TABLE_FORMAT_VERSION", "0")
+    assert not is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath, tolerances)
+    monkeypatch.undo()
+    assert is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath, tolerances)
+    get_pvt_table_info_filepath(pvt_table_filepath).unlink()
+    assert not is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath, tolerances)
+
+    # the info doesn't match a table file replaced by another one
+    generate_pvt_table_files([wellprop_folder], tmp_path)
+    pvt_table_filepath.write_text(pvt_table_filepath.read_text() + "\n")
+    assert not is_pvt_table_up_to_date(wellprop_folder, pvt_table_filepath)
+
+
+def test_calculate_gradient_non_uniform_grid() -> None:
+    pressures = np.array([0.0, 1.0, 3.0, 4.0, 7.0])
+    temperatures = np.array([0.0, 0.5, 2.0])
+    values = 2.0 * pressures[:, np.newaxis] ** 2 + 3.0 * temperatures[np.newaxis, :] ** 2
+    # second order differences are exact for quadratic functions
+    assert np.allclose(
+        calculate_gradient(values, pressures, axis=0),
+        np.repeat(4.0 * pressures[:, np.newaxis], len(temperatures), axis=1),
+    )
+    assert np.allclose(
+        calculate_gradient(values, temperatures, axis=1),
+        np.repeat(6.0 * temperatures[np.newaxis, :], len(pressures), axis=0),
+    )
+
+
+def test_calculate_derivatives_from_wellprop_coefficients(shared_datadir: Path) -> None:
+    converter = WellpropToPvtConverter(shared_datadir / "N2_LIFT")
+    densities = converter.properties["GAS_density"]
+    analytic_dp, analytic_dt = converter._calculate_derivatives(
+        densities,
+        converter.pressures,
+        converter.temperatures,
+        converter.properties["GAS_compressibility"],
+        converter.properties["GAS_expansivity"],
+    )
+    numeric_dp, numeric_dt = converter._calculate_derivatives(
+        densities, converter.pressures, converter.temperatures
+    )
+    assert np.allclose(analytic_dp, numeric_dp, rtol=0.05)
+    assert np.allclose(analytic_dt, numeric_dt, rtol=0.05)
+
+
+def test_read_wellprop_files_cache(shared_datadir: Path, mocker: MockerFixture) -> None:
+    wellprop_folder = shared_datadir / "DFLT_FCBA_9.90"
+    converter = WellpropToPvtConverter(wellprop_folder)
+    assert (wellprop_folder / WELLPROP_CACHE_FILENAME).exists()
+    assert converter.pressures.shape == (50,)
+    assert converter.temperatures.shape == (50,)
+    assert converter.properties["GAS_density"].shape == (50, 50)
+    assert converter.properties["GAS_enthalpy"].size == 0
+
+    read_mock = mocker.spy(wellprop_pvt_table_converter, "read_wellprop_values")
+    cached_converter = WellpropToPvtConverter(wellprop_folder)
+    assert read_mock.call_count == 0
+    assert np.array_equal(cached_converter.pressures, converter.pressures)
+    assert np.array_equal(cached_converter.temperatures, converter.temperatures)
+    assert cached_converter.properties.keys() == converter.properties.keys()
+    for name, values in converter.properties.items():
+        assert np.array_equal(cached_converter.properties[name], values)
+
+    # the cache is discarded when any wellprop file changes
+    density_filepath = wellprop_folder / "temperature_GAS_density.csv"
+    os.utime(density_filepath, (time.time() + 10.0, time.time() + 10.0))
+    WellpropToPvtConverter(wellprop_folder)
+    assert read_mock.call_count == 11
+
+
+def test_read_wellprop_files_invalid_cache(shared_datadir: Path, mocker: MockerFixture) -> None:
+    wellprop_folder = shared_datadir / "DFLT_FCBA_9.90"
+    converter = WellpropToPvtConverter(wellprop_folder)
+    cache_filepath = wellprop_folder / WELLPROP_CACHE_FILENAME
+    # a cache file truncated (e.g. by a process killed while writing it) is read again
+    cache_content = cache_filepath.read_bytes()
+    cache_filepath.write_bytes(cache_content[: len(cache_content) // 2])
+    read_mock = mocker.spy(wellprop_pvt_table_converter, "read_wellprop_values")
+    recovered_converter = WellpropToPvtConverter(wellprop_folder)
+    assert read_mock.call_count > 0
+    assert np.array_equal(recovered_converter.pressures, converter.pressures)
+    # the cache is replaced by a valid one, with no temporary files left
+    assert [filepath.name for filepath in wellprop_folder.glob("*.npz*")] == [
+        WELLPROP_CACHE_FILENAME
+    ]
+    read_count = read_mock.call_count
+    WellpropToPvtConverter(wellprop_folder)
+    assert read_mock.call_count == read_count
+
+
+def test_pvt_table_data_grid(shared_datadir: Path) -> None:
+    converter = WellpropToPvtConverter(shared_datadir / "N2_LIFT")
+    pvt_data = converter._convert_pvt_table_data()
+    assert pvt_data.table.shape == (51 * 51, len(PVT_TABLE_COLUMNS))
+    assert np.array_equal(
+        pvt_data.get_property_grid(PvtTableProperties.GasDensity),
+        converter.properties["GAS_density"],
+    )
+    pressures, temperatures = np.meshgrid(
+        pvt_data.pressures.GetValues("Pa"), pvt_data.temperatures.GetValues("degC"), indexing="ij"
+    )
+    assert np.array_equal(pvt_data.get_column("PT"), pressures.ravel())
+    assert np.array_equal(pvt_data.get_column("TM"), temperatures.ravel())
+
+
+@pytest.mark.parametrize("fluid_name", ("N2_LIFT", "DFLT_FCBA_9.90"))
+def test_coarsen_pvt_table_data(shared_datadir: Path, fluid_name: str) -> None:
+    pvt_data = WellpropToPvtConverter(shared_datadir / fluid_name)._convert_pvt_table_data()
+    tolerances = {
+        PvtTableProperties.GasDensity: 0.5,
+        PvtTableProperties.LiquidDensity: 0.5,
+        PvtTableProperties.GasViscosity: 1.0e-6,
+        PvtTableProperties.LiquidViscosity: 1.0e-5,
+    }
+    coarse_data, report = coarsen_pvt_table_data(pvt_data, tolerances)
+    assert report.compression_ratio == len(pvt_data.table) / len(coarse_data.table)
+    assert report.compression_ratio > 1.0
+
+    # check the error of the bilinear interpolation at every original point independently
+    pressures = pvt_data.pressures.GetValues("Pa")
+    temperatures = pvt_data.temperatures.GetValues("degC")
+    coarse_pressures = coarse_data.pressures.GetValues("Pa")
+    coarse_temperatures = coarse_data.temperatures.GetValues("degC")
+    assert coarse_pressures[[0, -1]].tolist() == pressures[[0, -1]].tolist()
+    assert coarse_temperatures[[0, -1]].tolist() == temperatures[[0, -1]].tolist()
+    for pvt_property, tolerance in tolerances.items():
+        coarse_grid = coarse_data.get_property_grid(pvt_property)
+        along_temperature = np.array(
+            [np.interp(temperatures, coarse_temperatures, line) for line in coarse_grid]
+        )
+        interpolated = np.array(
+            [np.interp(pressures, coarse_pressures, line) for line in along_temperature.T]
+        ).T
+        error = np.abs(interpolated - pvt_data.get_property_grid(pvt_property)).max()
+        assert error <= tolerance
+        assert report.errors[pvt_property] == pytest.approx(error, abs=1.0e-12)
+
+
+def test_generate_coarse_pvt_table_file(shared_datadir: Path, tmp_path: Path) -> None:
+    tolerances = {PvtTableProperties.GasDensity: 0.5}
+    converter = WellpropToPvtConverter(shared_datadir / "N2_LIFT", coarsening_tolerances=tolerances)
+    converter.generate_pvt_table_file(tmp_path)
+    assert converter.coarsening_report is not None
+    assert converter.coarsening_report.errors[PvtTableProperties.GasDensity] <= 0.5
+    coarse_data = coarsen_pvt_table_data(converter._convert_pvt_table_data(), tolerances)[0]
+    content = (tmp_path / "N2_LIFT.tab").read_text()
+    assert content == converter._generate_pvt_table_content(coarse_data).getvalue()
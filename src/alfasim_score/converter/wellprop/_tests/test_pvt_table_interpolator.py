@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from barril.units import Array
+from pathlib import Path
+
+from alfasim_score.converter.wellprop.pvt_table_interpolator import PvtTableInterpolator
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableData
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WellpropToPvtConverter
+
+
+def test_interpolate_at_table_points(shared_datadir: Path) -> None:
+    pvt_data = WellpropToPvtConverter(shared_datadir / "N2_LIFT")._convert_pvt_table_data()
+    interpolator = PvtTableInterpolator(pvt_data)
+    values = interpolator.interpolate_properties(
+        list(PvtTableProperties),
+        Array(pvt_data.get_column("PT"), "Pa"),
+        Array(pvt_data.get_column("TM"), "degC"),
+    )
+    for pvt_property, property_values in values.items():
+        assert np.allclose(property_values, pvt_data.get_column(pvt_property.value), rtol=1e-12)
+
+
+def test_interpolate_bilinear_function() -> None:
+    pressures = np.array([1.0e5, 2.0e5, 5.0e5])
+    temperatures = np.array([10.0, 20.0, 25.0, 60.0])
+    grid_pressures, grid_temperatures = np.meshgrid(pressures, temperatures, indexing="ij")
+    # a bilinear function is reproduced exactly by the interpolation
+    densities = 2.0 + 1.0e-5 * grid_pressures - 0.5 * grid_temperatures
+    densities += 1.0e-7 * grid_pressures * grid_temperatures
+    table = np.zeros((densities.size, 3))
+    table[:, 0] = grid_pressures.ravel()
+    table[:, 1] = grid_temperatures.ravel()
+    table[:, 2] = densities.ravel()
+    pvt_data = PvtTableData(
+        name="BILINEAR",
+        pressures=Array(pressures, "Pa"),
+        temperatures=Array(temperatures, "degC"),
+        table=table,
+        columns=["PT", "TM", PvtTableProperties.GasDensity.value],
+    )
+    interpolator = PvtTableInterpolator(pvt_data)
+
+    rng = np.random.default_rng(0)
+    sample_pressures = rng.uniform(1.0e5, 5.0e5, 100_000)
+    sample_temperatures = rng.uniform(10.0, 60.0, 100_000)
+    values = interpolator.interpolate(
+        PvtTableProperties.GasDensity,
+        Array(sample_pressures, "Pa"),
+        Array(sample_temperatures + 273.15, "K"),
+    )
+    expected = 2.0 + 1.0e-5 * sample_pressures - 0.5 * sample_temperatures
+    expected += 1.0e-7 * sample_pressures * sample_temperatures
+    assert np.allclose(values, expected, rtol=1e-12)
+
+    # points outside the grid are clamped to its edges
+    values = interpolator.interpolate(
+        PvtTableProperties.GasDensity,
+        Array([0.5e5, 6.0e5], "Pa"),
+        Array([0.0, 100.0], "degC"),
+    )
+    assert values.tolist() == pytest.approx([densities[0, 0], densities[-1, -1]])
+
+    with pytest.raises(ValueError, match="same size"):
+        interpolator.interpolate(
+            PvtTableProperties.GasDensity, Array([1.0e5, 2.0e5], "Pa"), Array([10.0], "degC")
+        )
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from pathlib import Path
+
+from alfasim_score.converter.wellprop.pvt_table_reader import compare_pvt_tables
+from alfasim_score.converter.wellprop.pvt_table_reader import read_pvt_table_file
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PVT_TABLE_COLUMNS
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WellpropToPvtConverter
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import coarsen_pvt_table_data
+
+
+@pytest.mark.parametrize("fluid_name", ("N2_LIFT", "DFLT_FCBA_9.90"))
+def test_read_pvt_table_file(shared_datadir: Path, tmp_path: Path, fluid_name: str) -> None:
+    converter = WellpropToPvtConverter(shared_datadir / fluid_name)
+    converter.generate_pvt_table_file(tmp_path)
+    pvt_data = converter._convert_pvt_table_data()
+
+    # a small chunk size to parse the points in many blocks
+    read_data = read_pvt_table_file(tmp_path / f"{fluid_name}.tab", chunk_size=1000)
+    assert read_data.name == fluid_name
+    assert read_data.columns == PVT_TABLE_COLUMNS
+    assert np.allclose(
+        read_data.pressures.GetValues("Pa"), pvt_data.pressures.GetValues("Pa"), rtol=1e-6
+    )
+    assert np.allclose(
+        read_data.temperatures.GetValues("degC"), pvt_data.temperatures.GetValues("degC"), rtol=1e-6
+    )
+    assert read_data.table.shape == pvt_data.table.shape
+    assert np.allclose(read_data.table, pvt_data.table, rtol=1e-6, atol=0.0)
+
+    # writing the table read gives the same file
+    content = converter._generate_pvt_table_content(read_data).getvalue()
+    assert content == (tmp_path / f"{fluid_name}.tab").read_text()
+
+
+def test_read_pvt_table_file_with_missing_points(shared_datadir: Path, tmp_path: Path) -> None:
+    WellpropToPvtConverter(shared_datadir / "N2_LIFT").generate_pvt_table_file(tmp_path)
+    filepath = tmp_path / "N2_LIFT.tab"
+    lines = filepath.read_text().splitlines(keepends=True)
+    filepath.write_text("".join(lines[:-1]))
+    with pytest.raises(ValueError, match="should have 2601 points with 18 columns"):
+        read_pvt_table_file(filepath)
+
+
+def test_compare_pvt_tables(shared_datadir: Path, tmp_path: Path) -> None:
+    converter = WellpropToPvtConverter(shared_datadir / "N2_LIFT")
+    converter.generate_pvt_table_file(tmp_path)
+    pvt_data = converter._convert_pvt_table_data()
+    read_data = read_pvt_table_file(tmp_path / "N2_LIFT.tab")
+
+    errors = compare_pvt_tables(pvt_data, read_data)
+    assert errors.keys() == set(PvtTableProperties)
+    # the values are written with 7 significant digits
+    assert max(errors.values()) < 1e-6
+
+    changed_data = read_pvt_table_file(tmp_path / "N2_LIFT.tab")
+    changed_data.get_column(PvtTableProperties.GasViscosity.value)[10] *= 1.1
+    errors = compare_pvt_tables(read_data, changed_data)
+    assert errors[PvtTableProperties.GasViscosity] == pytest.approx(0.1 / 1.1)
+    assert errors[PvtTableProperties.GasDensity] == 0.0
+
+    # tables with different grids are compared interpolating at the reference points
+    coarse_data, report = coarsen_pvt_table_data(read_data, {PvtTableProperties.GasDensity: 0.5})
+    assert report.compression_ratio > 1.0
+    errors = compare_pvt_tables(read_data, coarse_data)
+    gas_densities = np.abs(read_data.get_column(PvtTableProperties.GasDensity.value))
+    assert errors[PvtTableProperties.GasDensity] <= 0.5 / gas_densities.min()
+    assert errors[PvtTableProperties.GasDensity] > 0.0
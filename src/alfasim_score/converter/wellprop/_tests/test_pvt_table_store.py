@@ -0,0 +1,122 @@
+import os
+import shutil
+import time
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from alfasim_score.converter.wellprop import pvt_table_store
+from alfasim_score.converter.wellprop.pvt_table_store import PvtTableStore
+from alfasim_score.converter.wellprop.pvt_table_store import get_wellprop_data_hash
+from alfasim_score.converter.wellprop.pvt_table_store import link_pvt_table_files
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WellpropToPvtConverter
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import generate_pvt_table_files
+
+
+def test_get_wellprop_data_hash(shared_datadir: Path, tmp_path: Path) -> None:
+    wellprop_folder = shared_datadir / "N2_LIFT"
+    data_hash = get_wellprop_data_hash(wellprop_folder)
+    # the same data in another folder with the same name has the same hash
+    copied_folder = tmp_path / "N2_LIFT"
+    shutil.copytree(wellprop_folder, copied_folder)
+    assert get_wellprop_data_hash(copied_folder) == data_hash
+    # the fluid name is written in the table, so it's part of the hash
+    renamed_folder = tmp_path / "N2_LIFT_COPY"
+    shutil.copytree(wellprop_folder, renamed_folder)
+    assert get_wellprop_data_hash(renamed_folder) != data_hash
+
+    tolerances = {PvtTableProperties.GasDensity: 0.5}
+    assert get_wellprop_data_hash(copied_folder, tolerances) != data_hash
+
+    density_filepath = copied_folder / "temperature_GAS_density.csv"
+    density_filepath.write_text(density_filepath.read_text().replace("0.", "1.", 1))
+    assert get_wellprop_data_hash(copied_folder) != data_hash
+
+
+def test_link_pvt_table_file(shared_datadir: Path, tmp_path: Path, mocker: MockerFixture) -> None:
+    wellprop_folder = shared_datadir / "N2_LIFT"
+    store = PvtTableStore(tmp_path / "store")
+    convert_spy = mocker.spy(WellpropToPvtConverter, "generate_pvt_table_file")
+    case_folders = [tmp_path / "case_1", tmp_path / "case_2"]
+    for case_folder in case_folders:
+        case_folder.mkdir()
+        pvt_table_filepath = store.link_pvt_table_file(wellprop_folder, case_folder)
+        assert pvt_table_filepath == case_folder / "N2_LIFT.tab"
+    # the second case is a cache hit
+    assert convert_spy.call_count == 1
+
+    stored_filepath = store.get_stored_filepath(wellprop_folder)
+    assert stored_filepath.parent.parent.parent == tmp_path / "store"
+    for case_folder in case_folders:
+        assert os.path.samefile(case_folder / "N2_LIFT.tab", stored_filepath)
+    assert stored_filepath.stat().st_nlink == 3
+
+    expected_folder = tmp_path / "expected"
+    expected_folder.mkdir()
+    WellpropToPvtConverter(wellprop_folder).generate_pvt_table_file(expected_folder)
+    assert stored_filepath.read_text() == (expected_folder / "N2_LIFT.tab").read_text()
+
+    # files are copied when hard links aren't supported and replace the existing files
+    mocker.patch.object(pvt_table_store.os, "link", side_effect=OSError)
+    (tmp_path / "case_3").mkdir()
+    (tmp_path / "case_3" / "N2_LIFT.tab").write_text("old content")
+    pvt_table_filepath = store.link_pvt_table_file(wellprop_folder, tmp_path / "case_3")
+    assert not os.path.samefile(pvt_table_filepath, stored_filepath)
+    assert pvt_table_filepath.read_text() == stored_filepath.read_text()
+    assert [path.name for path in (tmp_path / "case_3").iterdir()] == ["N2_LIFT.tab"]
+
+
+def test_link_pvt_table_files(shared_datadir: Path, tmp_path: Path) -> None:
+    wellprop_folders = [shared_datadir / "N2_LIFT", shared_datadir / "DFLT_FCBA_9.90"]
+    store_folder = tmp_path / "store"
+    pvt_table_filepaths = link_pvt_table_files(wellprop_folders, tmp_path, store_folder, 2)
+    assert pvt_table_filepaths == [tmp_path / "N2_LIFT.tab", tmp_path / "DFLT_FCBA_9.90.tab"]
+    store = PvtTableStore(store_folder)
+    for wellprop_folder, pvt_table_filepath in zip(wellprop_folders, pvt_table_filepaths):
+        assert os.path.samefile(pvt_table_filepath, store.get_stored_filepath(wellprop_folder))
+
+    # the coarsened tables are stored apart from the full tables
+    tolerances = {PvtTableProperties.GasDensity: 0.5}
+    coarse_folder = tmp_path / "coarse"
+    coarse_folder.mkdir()
+    coarse_filepaths = link_pvt_table_files(
+        wellprop_folders, coarse_folder, store_folder, 2, coarsening_tolerances=tolerances
+    )
+    for wellprop_folder, coarse_filepath in zip(wellprop_folders, coarse_filepaths):
+        stored_filepath = store.get_stored_filepath(wellprop_folder, tolerances)
+        assert os.path.samefile(coarse_filepath, stored_filepath)
+        assert stored_filepath != store.get_stored_filepath(wellprop_folder)
+        expected_folder = tmp_path / "expected" / wellprop_folder.name
+        expected_folder.mkdir(parents=True)
+        WellpropToPvtConverter(
+            wellprop_folder, coarsening_tolerances=tolerances
+        ).generate_pvt_table_file(expected_folder)
+        expected_filepath = expected_folder / coarse_filepath.name
+        assert coarse_filepath.read_text() == expected_filepath.read_text()
+
+
+def test_generate_pvt_table_files_over_linked_tables(shared_datadir: Path, tmp_path: Path) -> None:
+    wellprop_folder = shared_datadir / "N2_LIFT"
+    store = PvtTableStore(tmp_path / "store")
+    case_folder = tmp_path / "case"
+    case_folder.mkdir()
+    pvt_table_filepath = store.link_pvt_table_file(wellprop_folder, case_folder)
+    stored_filepath = store.get_stored_filepath(wellprop_folder)
+    stored_content = stored_filepath.read_text()
+
+    # converting the modified wellprop files again replaces the linked file in the case folder
+    # instead of writing through the link into the stored table
+    density_filepath = wellprop_folder / "temperature_GAS_density.csv"
+    header, first_row, *rows = density_filepath.read_text().splitlines()
+    pressure, density, *densities = first_row.split(",")
+    first_row = ",".join([pressure, str(2.0 * float(density)), *densities])
+    density_filepath.write_text("\n".join([header, first_row, *rows]) + "\n")
+    os.utime(density_filepath, (time.time() + 10.0, time.time() + 10.0))
+    generate_pvt_table_files([wellprop_folder], case_folder)
+    assert not os.path.samefile(pvt_table_filepath, stored_filepath)
+    assert stored_filepath.read_text() == stored_content
+    assert pvt_table_filepath.read_text() != stored_content
+    assert sorted(path.name for path in case_folder.iterdir()) == [
+        "N2_LIFT.tab",
+        "N2_LIFT.tab.json",
+    ]
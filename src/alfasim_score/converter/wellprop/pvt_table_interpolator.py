@@ -0,0 +1,94 @@
+from typing import Dict
+from typing import Iterable
+from typing import Tuple
+
+import numpy as np
+from barril.units import Array
+
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableData
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+
+
+def _get_cell_positions(grid: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locate the values in the grid intervals.
+
+    :return:
+        The index of the first grid point of the interval containing each value and the position
+        of the value in the interval (0 to 1). Values outside the grid are clamped to its edges.
+    """
+    values = np.clip(values, grid[0], grid[-1])
+    indexes = np.clip(np.searchsorted(grid, values, side="right") - 1, 0, len(grid) - 2)
+    weights = (values - grid[indexes]) / (grid[indexes + 1] - grid[indexes])
+    return indexes, weights
+
+
+class PvtTableInterpolator:
+    """
+    Evaluate the pvt table properties at any pressure and temperature with bilinear interpolation
+    in the regular grid of the table. The points outside the grid use the values at its edges.
+    The properties are given in the pvt table units.
+    """
+
+    def __init__(self, pvt_table_data: PvtTableData) -> None:
+        if len(pvt_table_data.pressures) < 2 or len(pvt_table_data.temperatures) < 2:
+            raise ValueError(
+                f"The pvt table {pvt_table_data.name} needs at least two pressures and two "
+                "temperatures to be interpolated."
+            )
+        self.pvt_table_data = pvt_table_data
+        self.pressures = pvt_table_data.pressures.GetValues("Pa")
+        self.temperatures = pvt_table_data.temperatures.GetValues("degC")
+
+    def _get_cell_positions(
+        self, pressures: Array, temperatures: Array
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        pressure_values = np.asarray(pressures.GetValues("Pa"), dtype=float)
+        temperature_values = np.asarray(temperatures.GetValues("degC"), dtype=float)
+        if pressure_values.shape != temperature_values.shape:
+            raise ValueError(
+                "The pressures and temperatures must have the same size to be interpolated."
+            )
+        pressure_indexes, pressure_weights = _get_cell_positions(self.pressures, pressure_values)
+        temperature_indexes, temperature_weights = _get_cell_positions(
+            self.temperatures, temperature_values
+        )
+        return pressure_indexes, pressure_weights, temperature_indexes, temperature_weights
+
+    def interpolate_properties(
+        self,
+        pvt_properties: Iterable[PvtTableProperties],
+        pressures: Array,
+        temperatures: Array,
+    ) -> Dict[PvtTableProperties, np.ndarray]:
+        """
+        Evaluate the properties at each pair of pressure and temperature, locating the points in
+        the grid only once for all properties.
+        """
+        pressure_indexes, pressure_weights, temperature_indexes, temperature_weights = (
+            self._get_cell_positions(pressures, temperatures)
+        )
+        # the table points are ordered by pressure and then by temperature
+        number_of_temperatures = len(self.temperatures)
+        lower_lower = pressure_indexes * number_of_temperatures + temperature_indexes
+        upper_lower = lower_lower + number_of_temperatures
+        lower_weights = 1.0 - pressure_weights
+        values = {}
+        for pvt_property in pvt_properties:
+            column = self.pvt_table_data.get_column(pvt_property.value)
+            lower_pressure_values = column[lower_lower] + temperature_weights * (
+                column[lower_lower + 1] - column[lower_lower]
+            )
+            upper_pressure_values = column[upper_lower] + temperature_weights * (
+                column[upper_lower + 1] - column[upper_lower]
+            )
+            values[pvt_property] = (
+                lower_weights * lower_pressure_values + pressure_weights * upper_pressure_values
+            )
+        return values
+
+    def interpolate(
+        self, pvt_property: PvtTableProperties, pressures: Array, temperatures: Array
+    ) -> np.ndarray:
+        """Evaluate a property at each pair of pressure and temperature."""
+        return self.interpolate_properties([pvt_property], pressures, temperatures)[pvt_property]
@@ -0,0 +1,144 @@
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import mmap
+import numpy as np
+import re
+from barril.units import Array
+from pathlib import Path
+
+from alfasim_score.converter.wellprop.pvt_table_interpolator import PvtTableInterpolator
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableData
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+
+# number of bytes of table points parsed at once
+PVT_TABLE_READ_CHUNK_SIZE = 16 * 1024 * 1024
+# the relative precision of the values written in the pvt table files (7 significant digits)
+PVT_TABLE_FILE_RTOL = 1e-6
+PVT_TABLE_POINT_PREFIX = b"PVTTABLE POINT = ("
+# the units used by the pvt table files for the grid values
+PVT_TABLE_FILE_UNITS = {"Pa": "Pa", "C": "degC", "K": "K"}
+# the characters around the values of the table points, replaced by spaces before parsing
+_POINT_SEPARATORS = bytes.maketrans(b"(),=", b"    ")
+
+
+def _read_header_values(header: str, keyword: str) -> Tuple[List[str], str]:
+    """Read the values of a keyword in the form `KEYWORD = (v1, v2, ...) unit`."""
+    match = re.search(rf"^{keyword} = \(([^)]*)\)\s*([^,\\\s]*)", header, re.MULTILINE)
+    if match is None:
+        raise ValueError(f"The keyword {keyword} was not found in the pvt table header.")
+    return [value.strip() for value in match.group(1).split(",")], match.group(2)
+
+
+def _read_grid(header: str, keyword: str, expected_unit: str) -> Array:
+    values, unit = _read_header_values(header, keyword)
+    if unit not in PVT_TABLE_FILE_UNITS:
+        raise ValueError(f"The {keyword} unit {unit} of the pvt table file is not supported.")
+    return Array(np.array(values, dtype=float), PVT_TABLE_FILE_UNITS[unit]).CreateCopy(
+        unit=expected_unit
+    )
+
+
+def _parse_points(content: bytes) -> np.ndarray:
+    """Parse the values of the table points in a block of complete lines."""
+    content = content.replace(PVT_TABLE_POINT_PREFIX, b"").translate(_POINT_SEPARATORS)
+    return np.fromstring(content, sep=" ")
+
+
+def read_pvt_table_file(
+    filepath: Path, chunk_size: int = PVT_TABLE_READ_CHUNK_SIZE
+) -> PvtTableData:
+    """
+    Read a pvt table file in the format written by `WellpropToPvtConverter`.
+    The file is memory mapped and the table points are parsed by blocks of lines, so only the
+    parsed values are kept in memory.
+    """
+    with open(filepath, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        points_start = data.find(PVT_TABLE_POINT_PREFIX)
+        if points_start == -1:
+            points_start = len(data)
+        header = data[:points_start].decode()
+
+        label_match = re.search(r'PVTTABLE LABEL = "([^"]*)"', header)
+        if label_match is None:
+            raise ValueError(f"The pvt table label was not found in {filepath}.")
+        pressures = _read_grid(header, "PRESSURE", "Pa")
+        temperatures = _read_grid(header, "TEMPERATURE", "degC")
+        columns = _read_header_values(header, "COLUMNS")[0]
+
+        blocks = []
+        start = points_start
+        while start < len(data):
+            end = data.find(b"\n", min(start + chunk_size, len(data)) - 1)
+            end = len(data) if end == -1 else end + 1
+            blocks.append(_parse_points(data[start:end]))
+            start = end
+
+    values = np.concatenate(blocks) if blocks else np.empty(0)
+    number_of_points = len(pressures) * len(temperatures)
+    if values.size != number_of_points * len(columns):
+        raise ValueError(
+            f"The pvt table file {filepath} should have {number_of_points} points with "
+            f"{len(columns)} columns, but {values.size} values were read."
+        )
+    return PvtTableData(
+        name=label_match.group(1),
+        pressures=pressures,
+        temperatures=temperatures,
+        table=values.reshape(number_of_points, len(columns)),
+        columns=columns,
+    )
+
+
+def _is_same_grid(reference_values: np.ndarray, other_values: np.ndarray) -> bool:
+    """Check if the grid values are the same, up to the precision of the pvt table files."""
+    return reference_values.shape == other_values.shape and np.allclose(
+        reference_values, other_values, rtol=PVT_TABLE_FILE_RTOL, atol=0.0
+    )
+
+
+def compare_pvt_tables(
+    reference: PvtTableData, other: PvtTableData
+) -> Dict[PvtTableProperties, float]:
+    """
+    Calculate the maximum relative error of the properties of a pvt table compared to a reference
+    pvt table, at the points of the reference table. When the grids of the tables are different
+    (beyond the precision of the pvt table files) the other table is interpolated to the
+    reference table points.
+    The relative error of each point is given by `|a - b| / max(|a|, |b|)` (zero when both are
+    zero), so it's bounded by 2 when the values have opposite signs.
+
+    :return:
+        The maximum relative error of each property found in both tables.
+    """
+    pvt_properties = [
+        pvt_property
+        for pvt_property in PvtTableProperties
+        if pvt_property.value in reference.columns and pvt_property.value in other.columns
+    ]
+    same_grid = _is_same_grid(reference.pressures.GetValues("Pa"), other.pressures.GetValues("Pa"))
+    same_grid &= _is_same_grid(
+        reference.temperatures.GetValues("degC"), other.temperatures.GetValues("degC")
+    )
+    if same_grid:
+        other_values = {
+            pvt_property: other.get_column(pvt_property.value) for pvt_property in pvt_properties
+        }
+    else:
+        other_values = PvtTableInterpolator(other).interpolate_properties(
+            pvt_properties,
+            Array(reference.get_column("PT"), "Pa"),
+            Array(reference.get_column("TM"), "degC"),
+        )
+
+    errors = {}
+    for pvt_property in pvt_properties:
+        reference_values = reference.get_column(pvt_property.value)
+        scale = np.maximum(np.abs(reference_values), np.abs(other_values[pvt_property]))
+        difference = np.abs(reference_values - other_values[pvt_property])
+        relative_errors = np.divide(
+            difference, scale, out=np.zeros_like(difference), where=scale > 0.0
+        )
+        errors[pvt_property] = float(relative_errors.max(initial=0.0))
+    return errors
@@ -0,0 +1,174 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PVT_TABLE_FORMAT_VERSION
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WELLPROP_FILES
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import PvtTableProperties
+from alfasim_score.converter.wellprop.wellprop_pvt_table_converter import WellpropToPvtConverter
+
+# number of bytes of the wellprop files read at once to calculate their hash
+WELLPROP_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_wellprop_data_hash(
+    wellprop_folder: Path,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> str:
+    """
+    Calculate the hash identifying the pvt table converted from a wellprop folder, based on the
+    content of the wellprop files, the fluid name (used as table label), the conversion options
+    and the converter version.
+    """
+    data_hash = hashlib.sha256()
+    data_hash.update(f"{PVT_TABLE_FORMAT_VERSION}\n{wellprop_folder.name}\n".encode())
+    if coarsening_tolerances is not None:
+        for pvt_property, tolerance in sorted(
+            coarsening_tolerances.items(), key=lambda item: item[0].value
+        ):
+            data_hash.update(f"{pvt_property.value}={tolerance!r}\n".encode())
+    for filename in WELLPROP_FILES:
+        filepath = wellprop_folder / filename
+        if not filepath.exists():
+            continue
+        data_hash.update(f"{filename}:{filepath.stat().st_size}\n".encode())
+        with open(filepath, "rb") as file:
+            for block in iter(lambda: file.read(WELLPROP_HASH_BLOCK_SIZE), b""):
+                data_hash.update(block)
+    return data_hash.hexdigest()
+
+
+def link_file(source_filepath: Path, destiny_filepath: Path) -> None:
+    """
+    Create a hard link to a file, replacing the destiny file if it exists. When a hard link
+    can't be created (e.g. the destiny is in another file system) the file is copied.
+    """
+    if destiny_filepath.exists() and os.path.samefile(source_filepath, destiny_filepath):
+        return
+    temporary_filepath = destiny_filepath.with_name(f".{destiny_filepath.name}.{os.getpid()}.tmp")
+    try:
+        os.link(source_filepath, temporary_filepath)
+    except OSError:
+        shutil.copyfile(source_filepath, temporary_filepath)
+    os.replace(temporary_filepath, destiny_filepath)
+
+
+class PvtTableStore:
+    """
+    Keep the pvt table files in a folder indexed by the hash of their source wellprop data, so each
+    fluid is converted only once and the case folders get hard links to the stored files.
+
+    The stored files are shared by all their links, so the pvt table files linked to the case
+    folders must not be edited in place.
+    """
+
+    def __init__(self, store_folder: Path) -> None:
+        self.store_folder = store_folder
+
+    def get_stored_filepath(
+        self,
+        wellprop_folder: Path,
+        coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+    ) -> Path:
+        """Get the path of the pvt table in the store, which may not be converted yet."""
+        data_hash = get_wellprop_data_hash(wellprop_folder, coarsening_tolerances)
+        return self.store_folder / data_hash[:2] / data_hash / f"{wellprop_folder.name}.tab"
+
+    def store_pvt_table(
+        self,
+        wellprop_folder: Path,
+        coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+    ) -> Path:
+        """
+        Convert the wellprop folder to a pvt table in the store, unless it's already stored.
+
+        :return:
+            The path of the pvt table in the store.
+        """
+        stored_filepath = self.get_stored_filepath(wellprop_folder, coarsening_tolerances)
+        if stored_filepath.exists():
+            return stored_filepath
+        stored_filepath.parent.mkdir(parents=True, exist_ok=True)
+        # the table is converted in a temporary folder and moved at once to the store, so
+        # concurrent conversions never leave a partial file in the store
+        with tempfile.TemporaryDirectory(dir=stored_filepath.parent) as temporary_folder:
+            converter = WellpropToPvtConverter(
+                wellprop_folder, coarsening_tolerances=coarsening_tolerances
+            )
+            converter.generate_pvt_table_file(Path(temporary_folder))
+            os.replace(Path(temporary_folder) / stored_filepath.name, stored_filepath)
+        return stored_filepath
+
+    def link_pvt_table_file(
+        self,
+        wellprop_folder: Path,
+        destiny_folder: Path,
+        coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+    ) -> Path:
+        """
+        Create the pvt table file of a wellprop folder in the destiny folder as a link to the
+        stored pvt table, converting it first when it's not stored yet.
+        """
+        stored_filepath = self.store_pvt_table(wellprop_folder, coarsening_tolerances)
+        pvt_table_filepath = destiny_folder / stored_filepath.name
+        link_file(stored_filepath, pvt_table_filepath)
+        return pvt_table_filepath
+
+
+def _store_pvt_table(
+    store_folder: Path,
+    wellprop_folder: Path,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> Path:
+    """Store a single wellprop folder, this is the task executed by the worker processes."""
+    return PvtTableStore(store_folder).store_pvt_table(wellprop_folder, coarsening_tolerances)
+
+
+def link_pvt_table_files(
+    wellprop_folders: List[Path],
+    destiny_folder: Path,
+    store_folder: Path,
+    max_workers: Optional[int] = None,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> List[Path]:
+    """
+    Create the pvt table files for several wellprop folders as links to the tables in a store.
+    The tables missing in the store are converted concurrently with a process pool.
+
+    :param coarsening_tolerances:
+        When given, the tables are stored with the grid coarsened within these tolerances (see
+        `WellpropToPvtConverter`).
+    :return:
+        The pvt table files, in the same order of the wellprop folders.
+    """
+    store = PvtTableStore(store_folder)
+    stored_filepaths = [
+        store.get_stored_filepath(folder, coarsening_tolerances) for folder in wellprop_folders
+    ]
+    missing_folders = [
+        folder
+        for folder, stored_filepath in zip(wellprop_folders, stored_filepaths)
+        if not stored_filepath.exists()
+    ]
+    if missing_folders:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # consume the results to raise errors happening in the worker processes
+            list(
+                executor.map(
+                    _store_pvt_table,
+                    [store_folder] * len(missing_folders),
+                    missing_folders,
+                    [coarsening_tolerances] * len(missing_folders),
+                )
+            )
+    pvt_table_filepaths = [destiny_folder / filepath.name for filepath in stored_filepaths]
+    for stored_filepath, pvt_table_filepath in zip(stored_filepaths, pvt_table_filepaths):
+        link_file(stored_filepath, pvt_table_filepath)
+    return pvt_table_filepaths
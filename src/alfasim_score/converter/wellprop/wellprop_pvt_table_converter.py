@@ -1,45 +1,88 @@
+from typing import IO
+from typing import Any
 from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
 from typing import Tuple
 
-import itertools
+import json
 import numpy as np
-import pandas as pd
+import os
+import tempfile
 from barril.units import Array
 from barril.units import Scalar
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from dataclasses import field
 from enum import Enum
 from io import StringIO
 from pathlib import Path
 
+from alfasim_score.common import INVALID_NPZ_FILE_ERRORS
+from alfasim_score.common import save_npz_file
+
 LABEL_NUMBER_OF_PHASES = "TWO"
 STDPRESSURE = Scalar(1.0, "atm")
 STDTEMPERATURE = Scalar(2.887100e02, "K")
+# the pressure and temperature grid is read from this wellprop file
+WELLPROP_GRID_PROPERTY = "GAS_cp"
+# file used to cache the parsed wellprop csv files
+WELLPROP_CACHE_FILENAME = "wellprop_cache.npz"
+# number of table points formatted and written at once
+PVT_TABLE_WRITE_CHUNK_SIZE = 10000
+# the version of the pvt table files content, it must be changed whenever the conversion changes
+# the generated files, so the tables kept in a `PvtTableStore` are converted again
+PVT_TABLE_FORMAT_VERSION = "1"
+# the suffix of the file written next to each pvt table file with the conversion used to create it
+PVT_TABLE_INFO_SUFFIX = ".json"
 
 WELLPROP_FILES = [
+    "temperature_GAS_compressibility.csv",
     "temperature_GAS_conductivity.csv",
     "temperature_GAS_cp.csv",
     "temperature_GAS_density.csv",
     "temperature_GAS_enthalpy.csv",
+    "temperature_GAS_expansivity.csv",
     "temperature_GAS_interfacial_tension.csv",
     "temperature_GAS_mass_fraction.csv",
     "temperature_GAS_viscosity.csv",
+    "temperature_equivLIQUID_compressibility.csv",
     "temperature_equivLIQUID_conductivity.csv",
     "temperature_equivLIQUID_cp.csv",
     "temperature_equivLIQUID_density.csv",
     "temperature_equivLIQUID_enthalpy.csv",
+    "temperature_equivLIQUID_expansivity.csv",
     "temperature_equivLIQUID_interfacial_tension.csv",
     "temperature_equivLIQUID_mass_fraction.csv",
     "temperature_equivLIQUID_viscosity.csv",
+    "temperature_WATER_compressibility.csv",
     "temperature_WATER_conductivity.csv",
     "temperature_WATER_cp.csv",
     "temperature_WATER_density.csv",
     "temperature_WATER_enthalpy.csv",
+    "temperature_WATER_expansivity.csv",
     "temperature_WATER_interfacial_tension.csv",
     "temperature_WATER_mass_fraction.csv",
     "temperature_WATER_viscosity.csv",
 ]
 
 
+def calculate_gradient(values: np.ndarray, coordinates: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Calculate the derivative of the values along an axis with second order differences, both in
+    the interior and at the boundaries (first order when there are only two points).
+    """
+    edge_order: Literal[1, 2] = 2 if len(coordinates) > 2 else 1
+    return np.gradient(
+        np.asarray(values, dtype=float),
+        np.asarray(coordinates, dtype=float),
+        axis=axis,
+        edge_order=edge_order,
+    )
+
+
 class PvtTableProperties(Enum):
     GasDensity = "ROG"
     LiquidDensity = "ROHL"
@@ -59,203 +102,527 @@ class PvtTableProperties(Enum):
     GasLiquidSurfaceTension = "SIGGHL"
 
 
+# the columns with the pressure and temperature of each table point
+PVT_TABLE_GRID_COLUMNS = ["PT", "TM"]
+PVT_TABLE_COLUMNS = PVT_TABLE_GRID_COLUMNS + [property.value for property in PvtTableProperties]
+
+# the wellprop data used for properties that are directly copied to the pvt table
+WELLPROP_TABLE_PROPERTIES = {
+    PvtTableProperties.GasMassFraction: "GAS_mass_fraction",
+    PvtTableProperties.GasViscosity: "GAS_viscosity",
+    PvtTableProperties.LiquidViscosity: "equivLIQUID_viscosity",
+    PvtTableProperties.GasSpecificHeat: "GAS_cp",
+    PvtTableProperties.LiquidSpecificHeat: "equivLIQUID_cp",
+    PvtTableProperties.GasSpecificEnthalpy: "GAS_enthalpy",
+    PvtTableProperties.LiquidSpecificEnthalpy: "equivLIQUID_enthalpy",
+    PvtTableProperties.GasThermalConductivity: "GAS_conductivity",
+    PvtTableProperties.LiquidThermalConductivity: "equivLIQUID_conductivity",
+}
+
+
 @dataclass
 class PvtTableData:
+    """
+    The pvt table points are stored in a single array with a row for each point (ordered by
+    pressure and then by temperature) and a column for each one of the `columns`.
+    """
+
     name: str
     pressures: Array
     temperatures: Array
-    table: pd.DataFrame
+    table: np.ndarray
+    columns: List[str] = field(default_factory=lambda: list(PVT_TABLE_COLUMNS))
+
+    def get_column(self, column: str) -> np.ndarray:
+        """Get the values of a column for all table points."""
+        return self.table[:, self.columns.index(column)]
+
+    def get_property_grid(self, pvt_property: PvtTableProperties) -> np.ndarray:
+        """Get the values of a property as a (pressures x temperatures) array."""
+        return self.get_column(pvt_property.value).reshape(
+            len(self.pressures), len(self.temperatures)
+        )
+
+
+@dataclass
+class PvtTableCoarseningReport:
+    """
+    :ivar errors:
+        The maximum absolute error of the coarse table (bilinear interpolation) at the points of
+        the original table, per property.
+    :ivar compression_ratio:
+        The number of points in the original table divided by the number in the coarse table.
+    """
+
+    errors: Dict[PvtTableProperties, float]
+    compression_ratio: float
+
+
+def _interpolate_grid_lines(
+    values: np.ndarray, coordinates: np.ndarray, keep: np.ndarray
+) -> np.ndarray:
+    """
+    Rebuild the values at all grid lines (first axis) by linear interpolation between the kept
+    grid lines.
+    """
+    kept_indexes = np.flatnonzero(keep)
+    right = kept_indexes[
+        np.clip(
+            np.searchsorted(kept_indexes, np.arange(len(coordinates))), 1, len(kept_indexes) - 1
+        )
+    ]
+    left = kept_indexes[np.searchsorted(kept_indexes, right) - 1]
+    weights = (coordinates - coordinates[left]) / (coordinates[right] - coordinates[left])
+    weights = weights.reshape((-1,) + (1,) * (values.ndim - 1))
+    return (1.0 - weights) * values[left] + weights * values[right]
+
+
+def _select_grid_lines(
+    line_values: np.ndarray,
+    reference_values: np.ndarray,
+    coordinates: np.ndarray,
+    tolerances: np.ndarray,
+) -> np.ndarray:
+    """
+    Select the grid lines (first axis) needed to reproduce the reference values by linear
+    interpolation of the line values between the selected lines, within the tolerances of each
+    property (last axis). The segments between selected lines are extended as far as possible.
+
+    :return:
+        A boolean mask with the grid lines to keep.
+    """
+    number_of_lines = len(coordinates)
+    keep = np.zeros(number_of_lines, dtype=bool)
+    keep[[0, -1]] = True
+    first = 0
+    while first < number_of_lines - 1:
+        last = first + 1
+        while last + 1 < number_of_lines:
+            candidate = last + 1
+            weights = (coordinates[first + 1 : candidate] - coordinates[first]) / (
+                coordinates[candidate] - coordinates[first]
+            )
+            weights = weights.reshape((-1,) + (1,) * (line_values.ndim - 1))
+            interpolated = (1.0 - weights) * line_values[first] + weights * line_values[candidate]
+            errors = np.abs(interpolated - reference_values[first + 1 : candidate])
+            if not np.all(errors <= tolerances):
+                break
+            last = candidate
+        keep[last] = True
+        first = last
+    return keep
+
+
+def coarsen_pvt_table_data(
+    pvt_table_data: PvtTableData, tolerances: Dict[PvtTableProperties, float]
+) -> Tuple[PvtTableData, PvtTableCoarseningReport]:
+    """
+    Remove pressure and temperature grid lines from a pvt table while the bilinear interpolation
+    of the coarse table reproduces the original values within the tolerances.
+
+    :param tolerances:
+        The maximum absolute error allowed for each property (in the table units). Properties
+        without a tolerance are not taken into account to remove grid lines.
+    """
+    pressures = pvt_table_data.pressures.GetValues("Pa")
+    temperatures = pvt_table_data.temperatures.GetValues("degC")
+    properties = list(PvtTableProperties)
+    values = np.stack([pvt_table_data.get_property_grid(property) for property in properties], -1)
+    property_tolerances = np.array([tolerances.get(property, np.inf) for property in properties])
+
+    # the pressure lines use half of the tolerances, the temperature lines are selected checking
+    # the error of the bilinear interpolation, thus including the error from the pressure lines
+    keep_pressures = _select_grid_lines(values, values, pressures, property_tolerances / 2.0)
+    pressure_interpolated = _interpolate_grid_lines(values, pressures, keep_pressures)
+    keep_temperatures = _select_grid_lines(
+        pressure_interpolated.swapaxes(0, 1),
+        values.swapaxes(0, 1),
+        temperatures,
+        property_tolerances,
+    )
+    interpolated = _interpolate_grid_lines(
+        pressure_interpolated.swapaxes(0, 1), temperatures, keep_temperatures
+    ).swapaxes(0, 1)
+    errors = np.abs(interpolated - values).reshape(-1, len(properties)).max(axis=0)
+
+    keep_points = np.outer(keep_pressures, keep_temperatures).ravel()
+    coarse_pvt_table_data = PvtTableData(
+        name=pvt_table_data.name,
+        pressures=Array(pressures[keep_pressures], "Pa"),
+        temperatures=Array(temperatures[keep_temperatures], "degC"),
+        table=pvt_table_data.table[keep_points],
+        columns=list(pvt_table_data.columns),
+    )
+    report = PvtTableCoarseningReport(
+        errors={property: float(error) for property, error in zip(properties, errors)},
+        compression_ratio=len(pvt_table_data.table) / len(coarse_pvt_table_data.table),
+    )
+    return coarse_pvt_table_data, report
+
+
+def read_wellprop_grid(filepath: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """Read the pressures (first column) and temperatures (header) of a wellprop csv file."""
+    with open(filepath) as file:
+        header = file.readline()
+    temperatures = np.array(header.strip().split(",")[1:], dtype=float)
+    pressures = np.loadtxt(filepath, delimiter=",", skiprows=1, usecols=0, ndmin=1)
+    return pressures, temperatures
+
+
+def read_wellprop_values(filepath: Path) -> np.ndarray:
+    """Read the property values of a wellprop csv file, skipping its pressure and temperature grid."""
+    with open(filepath) as file:
+        number_of_columns = file.readline().count(",") + 1
+    return np.loadtxt(
+        filepath, delimiter=",", skiprows=1, usecols=range(1, number_of_columns), ndmin=2
+    )
 
 
 class WellpropToPvtConverter:
-    def __init__(self, wellprop_folder: Path) -> None:
+    def __init__(
+        self,
+        wellprop_folder: Path,
+        use_cache: bool = True,
+        coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+    ) -> None:
+        """
+        :param use_cache:
+            Keep the parsed wellprop data in a compressed sidecar file in the wellprop folder,
+            which is used instead of the csv files while they aren't modified.
+        :param coarsening_tolerances:
+            When given, the pvt table file is generated with the grid coarsened to keep the
+            interpolation error of each property within these tolerances
+            (see `coarsen_pvt_table_data`). The result is kept in `coarsening_report`.
+        """
         self.wellprop_folder = wellprop_folder
         self.pvt_filename = wellprop_folder.name
-        self.dataframes = self._read_wellprop_files()
+        self.use_cache = use_cache
+        self.coarsening_tolerances = coarsening_tolerances
+        self.coarsening_report: Optional[PvtTableCoarseningReport] = None
+        self.pressures, self.temperatures, self.properties = self._read_wellprop_files()
+
+    def _get_wellprop_filepaths(self) -> Dict[str, Path]:
+        """Get the existing wellprop csv files mapped by their property name."""
+        filepaths = {}
+        for filename in WELLPROP_FILES:
+            filepath = Path(self.wellprop_folder) / filename
+            if filepath.exists():
+                filepaths[filepath.stem.replace("temperature_", "")] = filepath
+        return filepaths
+
+    def _load_cache(
+        self, files_key: np.ndarray
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]]:
+        """Load the wellprop data from the cache file if it matches the current csv files."""
+        cache_filepath = self.wellprop_folder / WELLPROP_CACHE_FILENAME
+        if not cache_filepath.exists():
+            return None
+        try:
+            with np.load(cache_filepath, allow_pickle=False) as cache:
+                if not np.array_equal(cache["files_key"], files_key):
+                    return None
+                properties = {
+                    name.replace("property_", ""): cache[name]
+                    for name in cache.files
+                    if name.startswith("property_")
+                }
+                return cache["pressures"], cache["temperatures"], properties
+        except INVALID_NPZ_FILE_ERRORS:
+            # an invalid cache file is replaced by the csv files read
+            return None
+
+    def _save_cache(
+        self,
+        files_key: np.ndarray,
+        pressures: np.ndarray,
+        temperatures: np.ndarray,
+        properties: Dict[str, np.ndarray],
+    ) -> None:
+        """Save the wellprop data to the cache file (it's skipped for read-only folders)."""
+        arrays: Dict[str, Any] = {
+            "files_key": files_key,
+            "pressures": pressures,
+            "temperatures": temperatures,
+            **{f"property_{name}": values for name, values in properties.items()},
+        }
+        try:
+            save_npz_file(self.wellprop_folder / WELLPROP_CACHE_FILENAME, arrays)
+        except OSError:
+            pass
 
-    def _read_wellprop_files(self) -> Dict[str, pd.DataFrame]:
+    def _read_wellprop_files(self) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
         """
         Read wellprop csv files.
+        The pressure (Pa) and temperature (K) grid is shared by all files, so it's parsed only
+        once and the property values of the files are read concurrently.
         """
-        dataframes = {}
+        filepaths = self._get_wellprop_filepaths()
+        files_key = np.array(
+            [
+                f"{filepath.name}:{filepath.stat().st_size}:{filepath.stat().st_mtime_ns}"
+                for filepath in filepaths.values()
+            ]
+        )
+        loaded = self._load_cache(files_key) if self.use_cache else None
+        if loaded is None:
+            pressures, temperatures = read_wellprop_grid(filepaths[WELLPROP_GRID_PROPERTY])
+            with ThreadPoolExecutor() as executor:
+                properties = dict(
+                    zip(filepaths, executor.map(read_wellprop_values, filepaths.values()))
+                )
+            if self.use_cache:
+                self._save_cache(files_key, pressures, temperatures, properties)
+        else:
+            pressures, temperatures, properties = loaded
+
         for filename in WELLPROP_FILES:
-            filepath = Path(self.wellprop_folder) / filename
-            dataframe_name = filepath.stem.replace("temperature_", "")
-            if Path(filepath).exists():
-                dataframes[dataframe_name] = pd.read_csv(filepath, index_col=0)
-            else:
-                dataframes[dataframe_name] = pd.DataFrame(index=[], columns=[], data=[])
-        return dataframes
+            properties.setdefault(Path(filename).stem.replace("temperature_", ""), np.empty((0, 0)))
+        return pressures, temperatures, properties
 
     def _calculate_derivatives(
-        self, densities: np.ndarray, pressures: np.ndarray, temperatures: np.ndarray
+        self,
+        densities: np.ndarray,
+        pressures: np.ndarray,
+        temperatures: np.ndarray,
+        compressibilities: Optional[np.ndarray] = None,
+        expansivities: Optional[np.ndarray] = None,
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Calculate the pressure and temperature derivatives for the densities.
+        The derivatives are analytic when the wellprop isothermal compressibility (1/rho drho/dp)
+        and the thermal expansivity (-1/rho drho/dT) are available, otherwise they are calculated
+        with second order finite differences (which handle the non-uniform grids).
         """
-        # Initialize derivative arrays
-        densities_dp = np.zeros_like(densities)
-        densities_dt = np.zeros_like(densities)
-
-        # Central differences for pressure
-        for i in range(1, len(pressures) - 1):
-            dp = pressures[i + 1] - pressures[i - 1]
-            densities_dp[i, :] = (densities[i + 1, :] - densities[i - 1, :]) / dp
-
-        # Forward difference for the first pressure point
-        dp_first = pressures[1] - pressures[0]
-        densities_dp[0, :] = (densities[1, :] - densities[0, :]) / dp_first
-
-        # Backward difference for the last pressure point
-        dp_last = pressures[-1] - pressures[-2]
-        densities_dp[-1, :] = (densities[-1, :] - densities[-2, :]) / dp_last
-
-        # Central differences for temperature
-        for j in range(1, len(temperatures) - 1):
-            dt = temperatures[j + 1] - temperatures[j - 1]
-            densities_dt[:, j] = (densities[:, j + 1] - densities[:, j - 1]) / dt
-
-        # Forward difference for the first temperature point
-        dt_first = temperatures[1] - temperatures[0]
-        densities_dt[:, 0] = (densities[:, 1] - densities[:, 0]) / dt_first
-
-        # Backward difference for the last temperature point
-        dt_last = temperatures[-1] - temperatures[-2]
-        densities_dt[:, -1] = (densities[:, -1] - densities[:, -2]) / dt_last
-
+        if compressibilities is not None and compressibilities.size:
+            densities_dp = densities * compressibilities
+        else:
+            densities_dp = calculate_gradient(densities, pressures, axis=0)
+        if expansivities is not None and expansivities.size:
+            densities_dt = -densities * expansivities
+        else:
+            densities_dt = calculate_gradient(densities, temperatures, axis=1)
         return densities_dp, densities_dt
 
-    def _convert_pvt_table_data(self) -> pd.DataFrame:
+    def _convert_pvt_table_data(self) -> PvtTableData:
         """
         Convert the data from wellprop tables into PVT tab file format.
         """
-        temperatures = self.dataframes["GAS_cp"].columns.astype(float) - 273.15
-        pressures = self.dataframes["GAS_cp"].index.astype(float)
-        number_of_points = len(temperatures) * len(pressures)
-        properties = {}
-        liquid_densities = self.dataframes["equivLIQUID_density"].values
-        gas_densities = self.dataframes["GAS_density"].values
-
-        liquid_densities_dp, liquid_densities_dt = self._calculate_derivatives(
-            liquid_densities, pressures, temperatures
-        )
-        gas_densities_dp, gas_densities_dt = self._calculate_derivatives(
-            gas_densities, pressures, temperatures
-        )
+        temperatures = self.temperatures - 273.15
+        pressures = self.pressures
+        table = np.zeros((len(pressures) * len(temperatures), len(PVT_TABLE_COLUMNS)))
+        columns = {column: index for index, column in enumerate(PVT_TABLE_COLUMNS)}
+        table[:, columns["PT"]] = np.repeat(pressures, len(temperatures))
+        table[:, columns["TM"]] = np.tile(temperatures, len(pressures))
 
-        liquid_densities_dp = liquid_densities_dp.flatten()
-        liquid_densities_dt = liquid_densities_dt.flatten()
-        gas_densities_dp = gas_densities_dp.flatten()
-        gas_densities_dt = gas_densities_dt.flatten()
-
-        liquid_densities = liquid_densities.flatten()
-        gas_densities = gas_densities.flatten()
-        gas_constants = {
-            "mass_fraction": self.dataframes["GAS_mass_fraction"].values.astype(float).flatten(),
-            "viscosity": self.dataframes["GAS_viscosity"].values.astype(float).flatten(),
-            "specific_heat": self.dataframes["GAS_cp"].values.astype(float).flatten(),
-            "specific_enthalpy": self.dataframes["GAS_enthalpy"].values.astype(float).flatten(),
-            "conductivity": self.dataframes["GAS_conductivity"].values.astype(float).flatten(),
+        densities = {
+            PvtTableProperties.LiquidDensity: "equivLIQUID",
+            PvtTableProperties.GasDensity: "GAS",
         }
-
-        liquid_constants = {
-            "viscosity": self.dataframes["equivLIQUID_viscosity"].values.astype(float).flatten(),
-            "specific_heat": self.dataframes["equivLIQUID_cp"].values.astype(float).flatten(),
-            "specific_enthalpy": self.dataframes["equivLIQUID_enthalpy"]
-            .values.astype(float)
-            .flatten(),
-            "conductivity": self.dataframes["equivLIQUID_conductivity"]
-            .values.astype(float)
-            .flatten(),
+        derivatives = {
+            PvtTableProperties.LiquidDensity: (
+                PvtTableProperties.LiquidDensityDP,
+                PvtTableProperties.LiquidDensityDT,
+            ),
+            PvtTableProperties.GasDensity: (
+                PvtTableProperties.GasDensityDP,
+                PvtTableProperties.GasDensityDT,
+            ),
         }
+        for density_property, phase in densities.items():
+            phase_densities = self.properties[f"{phase}_density"]
+            if not phase_densities.size:
+                continue
+            densities_dp, densities_dt = self._calculate_derivatives(
+                phase_densities,
+                pressures,
+                temperatures,
+                self.properties[f"{phase}_compressibility"],
+                self.properties[f"{phase}_expansivity"],
+            )
+            density_dp_property, density_dt_property = derivatives[density_property]
+            table[:, columns[density_property.value]] = phase_densities.ravel()
+            table[:, columns[density_dp_property.value]] = densities_dp.ravel()
+            table[:, columns[density_dt_property.value]] = densities_dt.ravel()
 
-        properties[PvtTableProperties.LiquidDensity.value] = np.array(liquid_densities)
-        properties[PvtTableProperties.LiquidDensityDP.value] = np.array(liquid_densities_dp)
-        properties[PvtTableProperties.LiquidDensityDT.value] = np.array(liquid_densities_dt)
-        properties[PvtTableProperties.GasDensity.value] = np.array(gas_densities)
-        properties[PvtTableProperties.GasDensityDP.value] = np.array(gas_densities_dp)
-        properties[PvtTableProperties.GasDensityDT.value] = np.array(gas_densities_dt)
-        properties[PvtTableProperties.GasMassFraction.value] = np.array(
-            gas_constants["mass_fraction"]
-        )
-        properties[PvtTableProperties.GasViscosity.value] = np.array(gas_constants["viscosity"])
-        properties[PvtTableProperties.LiquidViscosity.value] = np.array(
-            liquid_constants["viscosity"]
-        )
-        properties[PvtTableProperties.GasSpecificHeat.value] = np.array(
-            gas_constants["specific_heat"]
-        )
-        properties[PvtTableProperties.LiquidSpecificHeat.value] = np.array(
-            liquid_constants["specific_heat"]
-        )
-        properties[PvtTableProperties.GasSpecificEnthalpy.value] = np.array(
-            gas_constants["specific_enthalpy"]
-        )
-        properties[PvtTableProperties.LiquidSpecificEnthalpy.value] = np.array(
-            liquid_constants["specific_enthalpy"]
-        )
-        properties[PvtTableProperties.GasThermalConductivity.value] = np.array(
-            gas_constants["conductivity"]
-        )
-        properties[PvtTableProperties.LiquidThermalConductivity.value] = np.array(
-            liquid_constants["conductivity"]
-        )
-        properties[PvtTableProperties.GasLiquidSurfaceTension.value] = np.array(
-            [Scalar(0.0, "N/m").GetValue("N/m")] * number_of_points
-        )
-        for key, value in properties.items():
-            if not value.size:
-                properties[key] = np.zeros(number_of_points)
+        for pvt_property, wellprop_name in WELLPROP_TABLE_PROPERTIES.items():
+            values = self.properties[wellprop_name]
+            if values.size:
+                table[:, columns[pvt_property.value]] = values.ravel()
+        # the surface tension is not used, so it's kept as zero
+        table[:, columns[PvtTableProperties.GasLiquidSurfaceTension.value]] = 0.0
 
         return PvtTableData(
             name=self.pvt_filename,
-            pressures=Array(list(pressures), "Pa"),
-            temperatures=Array(list(temperatures), "degC"),
-            table=pd.concat(
-                [
-                    pd.DataFrame(
-                        list(itertools.product(pressures, temperatures)), columns=["PT", "TM"]
-                    ),
-                    pd.DataFrame(
-                        properties, columns=[property.value for property in PvtTableProperties]
-                    ),
-                ],
-                axis=1,
-            ),
+            pressures=Array(pressures, "Pa"),
+            temperatures=Array(temperatures, "degC"),
+            table=table,
         )
 
-    def _generate_pvt_table_content(self, pvt_table_data: PvtTableData) -> StringIO:
+    def _write_pvt_table_content(self, pvt_table_data: PvtTableData, file: IO[str]) -> None:
+        """
+        Write the pvt table content to a text file.
+        The points are formatted by blocks of rows (a single formatting operation per block) and
+        written as they are formatted, so the whole content is never kept in memory.
+        """
         format_numbers = lambda number: "{:.6e}".format(number)
-        file_buffer = StringIO(f"{pvt_table_data.name}.tab")
-        file_buffer.write(
-            f'PVTTABLE LABEL = "{pvt_table_data.name}", PHASE = {LABEL_NUMBER_OF_PHASES},\n'
-        )
-        file_buffer.write(
-            "STDPRESSURE = {} ATM,\\\n".format(format_numbers(STDPRESSURE.GetValue("atm")))
-        )
-        file_buffer.write(
+        file.write(f'PVTTABLE LABEL = "{pvt_table_data.name}", PHASE = {LABEL_NUMBER_OF_PHASES},\n')
+        file.write("STDPRESSURE = {} ATM,\\\n".format(format_numbers(STDPRESSURE.GetValue("atm"))))
+        file.write(
             "STDTEMPERATURE = {} K,\\\n".format(format_numbers(STDTEMPERATURE.GetValue("K")))
         )
-        file_buffer.write(
+        file.write(
             "PRESSURE = ({}) Pa,\\\n".format(
                 ", ".join(map(format_numbers, pvt_table_data.pressures.GetValues("Pa")))
             )
         )
-        file_buffer.write(
+        file.write(
             "TEMPERATURE = ({}) C,\\\n".format(
                 ", ".join(map(format_numbers, pvt_table_data.temperatures.GetValues("degC")))
             )
         )
-        file_buffer.write("COLUMNS = ({})\n".format(", ".join(pvt_table_data.table.columns)))
-        for _, row in pvt_table_data.table.iterrows():
-            file_buffer.write(
-                f"PVTTABLE POINT = ({', '.join(map(format_numbers, row.tolist()))})\n"
-            )
+        file.write("COLUMNS = ({})\n".format(", ".join(pvt_table_data.columns)))
+        points = pvt_table_data.table
+        point_format = "PVTTABLE POINT = ({})\n".format(", ".join(["%.6e"] * points.shape[1]))
+        for start in range(0, len(points), PVT_TABLE_WRITE_CHUNK_SIZE):
+            chunk = points[start : start + PVT_TABLE_WRITE_CHUNK_SIZE]
+            file.write((point_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+    def _generate_pvt_table_content(self, pvt_table_data: PvtTableData) -> StringIO:
+        """Create the pvt table content in memory."""
+        file_buffer = StringIO()
+        self._write_pvt_table_content(pvt_table_data, file_buffer)
         return file_buffer
 
     def generate_pvt_table_file(self, destiny_folder: Path) -> None:
-        """Create a pvt table file with data from welprop csv files."""
+        """
+        Create a pvt table file with data from welprop csv files.
+        The table is written to a temporary file in the destiny folder, which then replaces the
+        pvt table file at once. So an existing file is never edited in place, which would also
+        change the files hard linked to it (e.g. the tables of a `PvtTableStore`).
+        """
         pvt_data = self._convert_pvt_table_data()
-        content = self._generate_pvt_table_content(pvt_data)
-        with open(destiny_folder / f"{pvt_data.name}.tab", "w") as file:
-            file.write(content.getvalue())
+        if self.coarsening_tolerances is not None:
+            pvt_data, self.coarsening_report = coarsen_pvt_table_data(
+                pvt_data, self.coarsening_tolerances
+            )
+        pvt_table_filepath = destiny_folder / f"{pvt_data.name}.tab"
+        temporary_file = tempfile.NamedTemporaryFile(
+            "w",
+            dir=destiny_folder,
+            prefix=f"{pvt_table_filepath.name}.",
+            suffix=".tmp",
+            delete=False,
+        )
+        try:
+            with temporary_file:
+                self._write_pvt_table_content(pvt_data, temporary_file)
+            os.replace(temporary_file.name, pvt_table_filepath)
+        except BaseException:
+            Path(temporary_file.name).unlink(missing_ok=True)
+            raise
+        # written after the table is replaced, since the info identifies the table file
+        get_pvt_table_info_filepath(pvt_table_filepath).write_text(
+            json.dumps(get_pvt_table_info(pvt_table_filepath, self.coarsening_tolerances))
+        )
+
+
+def get_pvt_table_info_filepath(pvt_table_filepath: Path) -> Path:
+    """Get the path of the file with the conversion info of a pvt table file."""
+    return pvt_table_filepath.with_name(f"{pvt_table_filepath.name}{PVT_TABLE_INFO_SUFFIX}")
+
+
+def get_pvt_table_info(
+    pvt_table_filepath: Path,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Describe the conversion of a pvt table file: the format version, the conversion options and
+    the size and modification time of the table file (so the info of a replaced table file, e.g.
+    linked from a `PvtTableStore`, doesn't match it).
+    """
+    table_stat = pvt_table_filepath.stat()
+    return {
+        "format_version": PVT_TABLE_FORMAT_VERSION,
+        "coarsening_tolerances": (
+            None
+            if coarsening_tolerances is None
+            else {
+                pvt_property.value: tolerance
+                for pvt_property, tolerance in sorted(
+                    coarsening_tolerances.items(), key=lambda item: item[0].value
+                )
+            }
+        ),
+        "table_key": f"{table_stat.st_size}:{table_stat.st_mtime_ns}",
+    }
+
+
+def is_pvt_table_up_to_date(
+    wellprop_folder: Path,
+    pvt_table_filepath: Path,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> bool:
+    """
+    Check if the pvt table file is newer than all wellprop csv files used to create it and was
+    created by the current format version with the same conversion options.
+    """
+    if not pvt_table_filepath.exists():
+        return False
+    try:
+        pvt_table_info = json.loads(get_pvt_table_info_filepath(pvt_table_filepath).read_text())
+    except (OSError, ValueError):
+        # tables written by older versions have no info file
+        return False
+    if pvt_table_info != get_pvt_table_info(pvt_table_filepath, coarsening_tolerances):
+        return False
+    wellprop_mtimes = [filepath.stat().st_mtime for filepath in wellprop_folder.glob("*.csv")]
+    return pvt_table_filepath.stat().st_mtime >= max(wellprop_mtimes, default=0.0)
+
+
+def _generate_pvt_table_file(
+    wellprop_folder: Path,
+    destiny_folder: Path,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> Path:
+    """Convert a single wellprop folder, this is the task executed by the worker processes."""
+    WellpropToPvtConverter(
+        wellprop_folder, coarsening_tolerances=coarsening_tolerances
+    ).generate_pvt_table_file(destiny_folder)
+    return destiny_folder / f"{wellprop_folder.name}.tab"
+
+
+def generate_pvt_table_files(
+    wellprop_folders: List[Path],
+    destiny_folder: Path,
+    max_workers: Optional[int] = None,
+    coarsening_tolerances: Optional[Dict[PvtTableProperties, float]] = None,
+) -> List[Path]:
+    """
+    Create the pvt table files for several wellprop folders concurrently with a process pool.
+    The tables that are already up to date with their wellprop files (see
+    `is_pvt_table_up_to_date`) are not converted again.
+
+    :param coarsening_tolerances:
+        When given, the tables are created with the grid coarsened within these tolerances (see
+        `WellpropToPvtConverter`).
+    :return:
+        The pvt table files, in the same order of the wellprop folders.
+    """
+    pvt_table_filepaths = [destiny_folder / f"{folder.name}.tab" for folder in wellprop_folders]
+    outdated_folders = [
+        folder
+        for folder, pvt_table_filepath in zip(wellprop_folders, pvt_table_filepaths)
+        if not is_pvt_table_up_to_date(folder, pvt_table_filepath, coarsening_tolerances)
+    ]
+    if outdated_folders:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # consume the results to raise errors happening in the worker processes
+            list(
+                executor.map(
+                    _generate_pvt_table_file,
+                    outdated_folders,
+                    [destiny_folder] * len(outdated_folders),
+                    [coarsening_tolerances] * len(outdated_folders),
+                )
+            )
+    return pvt_table_filepaths